@@ -0,0 +1,283 @@
+"""
+Query plan check for every router query.
+
+Builds a fresh SQLite database with the Alembic migrations, seeds it, then
+calls every GET route (as the role its prefix needs, with a few extra query
+variants) and the main write flows. Every SELECT, UPDATE and DELETE the
+handlers send is captured and run through `EXPLAIN QUERY PLAN`.
+
+A plan step that scans a whole table (`SCAN <table>`, with or without an
+index to walk it in order) is a full scan. Queries are keyed by a
+fingerprint of their SQL (services.query_stats.fingerprint), and
+`explain_baseline.json` lists the full scans that are accepted, e.g. admin
+counts across every order. The check fails with exit code 1 when a query
+scans a table its baseline entry does not allow, which is what happens when
+an index is dropped or a query stops matching one.
+
+tests/test_explain_plans.py runs the same check under pytest. From the
+backend directory:
+    python -m benchmarks.explain_plans            # check against the baseline
+    python -m benchmarks.explain_plans --update   # accept the current plans
+    python -m benchmarks.explain_plans --verbose  # print every plan
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "explain_baseline.json")
+
+SLUG = "sparkle-jewels"
+LOGINS = {
+    "admin": ("admin@jewelryplatform.com", "admin123"),
+    "reseller": ("demo@mystore.com", "demo123"),
+    "manufacturer": ("manufacturer@jewelrycrafts.com", "mfr123"),
+}
+ROLE_PREFIXES = (
+    ("/api/auth", "reseller"),
+    ("/api/admin", "admin"),
+    ("/api/manufacturers", "manufacturer"),
+    ("/api/resellers", "reseller"),
+    ("/api/products", "reseller"),
+    ("/api/orders", "reseller"),
+    ("/api/payouts", "reseller"),
+)
+
+# Query variants that take a different path through a handler
+VARIANTS = [
+    ("reseller", "/api/products/catalog?category=Rings&search=gold"),
+    ("reseller", "/api/products/my-products?is_active=true&is_featured=true"),
+    ("reseller", "/api/products/my-products?search=ring"),
+    ("reseller", "/api/orders?status_filter=pending"),
+    ("reseller", "/api/orders/search?email=customer1@example.com"),
+    ("reseller", "/api/orders/search?phone=9876543210"),
+    ("reseller", "/api/payouts?status_filter=pending"),
+    ("reseller", "/api/resellers/dashboard/top-products?rank_by=units"),
+    ("reseller", "/api/resellers/dashboard/timeseries?granularity=week"),
+    ("manufacturer", "/api/manufacturers/products?category=Rings&is_active=true&search=gold"),
+    ("manufacturer", "/api/manufacturers/dashboard/top-resellers?rank_by=units"),
+    ("admin", "/api/admin/dashboard?fresh=true"),
+    ("admin", "/api/admin/resellers?is_published=true&search=sparkle"),
+    ("admin", "/api/admin/orders?status_filter=pending&reseller_id=1"),
+    ("admin", "/api/admin/orders/search?email=customer1@example.com"),
+    ("admin", "/api/admin/payouts?status_filter=pending"),
+    ("admin", "/api/admin/tickets?status_filter=open&priority_filter=high"),
+    (None, f"/api/store/{SLUG}/products?sort=bestsellers"),
+    (None, f"/api/store/{SLUG}/products?page=2&per_page=5"),
+    (None, f"/api/store/{SLUG}/products?category=Rings&material=Gold&min_price=100&max_price=100000"),
+    (None, f"/api/store/{SLUG}/products?search=ring"),
+    (None, f"/api/store/{SLUG}/products?featured_only=true"),
+]
+
+# Routes that need query parameters; VARIANTS and the write flows cover them
+NEEDS_QUERY = ("/api/orders/track", "/api/orders/search", "/api/admin/orders/search")
+
+CHECKOUT = {
+    "customer_email": "plans@example.com",
+    "customer_name": "Plan Check",
+    "shipping_address_line1": "1 Index Lane",
+    "shipping_city": "Mumbai",
+    "shipping_state": "Maharashtra",
+    "shipping_postal_code": "400001",
+}
+
+
+def partial_indexes(metadata) -> set:
+    return {
+        index.name
+        for table in metadata.tables.values()
+        for index in table.indexes
+        if index.dialect_options["sqlite"].get("where") is not None
+    }
+
+
+def full_scans(plan, statement: str, tables, partial) -> list:
+    """Tables the plan reads in full, with aliases resolved to table names"""
+    aliases = {alias: table for table, alias in re.findall(r"\b(\w+) AS (\w+)\b", statement) if table in tables}
+    scans = set()
+    for detail in plan:
+        match = re.match(r"SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?", detail)
+        # Walking a partial index only reads the rows it covers
+        if match and match.group(2) not in partial:
+            table = aliases.get(match.group(1), match.group(1))
+            if table in tables:
+                scans.add(table)
+    return sorted(scans)
+
+
+def role_for(path: str):
+    for prefix, role in ROLE_PREFIXES:
+        if path.startswith(prefix):
+            return role
+    return None
+
+
+def tour(client, call) -> None:
+    """Call every GET route, the query variants and the main write flows"""
+    from fastapi.routing import APIRoute
+    import main
+
+    listing = client.get(f"/api/store/{SLUG}/products", params={"per_page": 5}).json()["products"]
+    params = {"slug": SLUG, "reseller_slug": SLUG, "product_slug": listing[0]["slug"]}
+
+    for route in main.app.routes:
+        if not isinstance(route, APIRoute) or "GET" not in route.methods or route.path in NEEDS_QUERY:
+            continue
+        url = re.sub(r"\{(\w+)\}", lambda m: str(params.get(m.group(1), 1)), route.path)
+        call("GET", role_for(url), url)
+    for role, url in VARIANTS:
+        call("GET", role, url)
+
+    order = call("POST", None, f"/api/orders/storefront/{SLUG}", json={
+        **CHECKOUT, "items": [{"product_id": listing[0]["id"], "quantity": 1}]
+    })
+    if order.status_code == 200:
+        placed = order.json()
+        call("GET", None, "/api/orders/track",
+             params={"order_number": placed["order_number"], "email": CHECKOUT["customer_email"]})
+        call("GET", "reseller", f"/api/orders/{placed['order_id']}")
+        call("GET", "reseller", "/api/orders/search", params={"order_number": placed["order_number"]})
+        call("PATCH", "admin", f"/api/orders/{placed['order_id']}/status", json={"status": "confirmed"})
+        call("PATCH", "admin", f"/api/orders/{placed['order_id']}/status", json={"status": "delivered"})
+    call("POST", None, f"/api/store/{SLUG}/events", json={
+        "events": [{"type": "product_view", "product_id": listing[0]["id"]}]
+    })
+    call("POST", "reseller", "/api/payouts/request", json={"amount": 1})
+    call("POST", None, "/api/auth/login/json",
+         json={"email": LOGINS["reseller"][0], "password": LOGINS["reseller"][1]})
+
+
+def capture() -> dict:
+    from alembic import command
+    from alembic.config import Config
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from database.database import engine, Base
+    from seed_data import seed_database
+    from services.query_stats import fingerprint
+    import main
+
+    command.upgrade(Config(os.path.join(os.path.dirname(BASELINE), "..", "alembic.ini")), "head")
+    seed_database()
+
+    client = TestClient(main.app)
+    tokens = {
+        role: client.post("/api/auth/login/json", json={"email": email, "password": password}).json()["access_token"]
+        for role, (email, password) in LOGINS.items()
+    }
+
+    statements = []
+    current = {"label": None}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            statements.append((current["label"], statement, parameters))
+
+    def call(method, role, url, **kwargs):
+        current["label"] = f"{method} {url}"
+        headers = {"Authorization": f"Bearer {tokens[role]}"} if role else {}
+        response = client.request(method, url, headers=headers, **kwargs)
+        if response.status_code >= 400:
+            print(f"[ERROR] {method} {url} -> {response.status_code}: {response.text[:120]}")
+        return response
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        tour(client, call)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    tables = set(Base.metadata.tables)
+    partial = partial_indexes(Base.metadata)
+    queries = {}
+    with engine.connect() as conn:
+        for label, statement, parameters in statements:
+            key = hashlib.sha1(fingerprint(statement).encode()).hexdigest()[:12]
+            entry = queries.setdefault(key, {"sql": fingerprint(statement), "routes": set()})
+            entry["routes"].add(label)
+            if "plan" in entry:
+                continue
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            entry["plan"] = [row[-1] for row in rows]
+            entry["scans"] = full_scans(entry["plan"], statement, tables, partial)
+    return queries
+
+
+def load_baseline() -> dict:
+    if not os.path.exists(BASELINE):
+        return {}
+    with open(BASELINE) as f:
+        return json.load(f)
+
+
+def find_regressions(queries: dict, baseline: dict) -> list:
+    """(key, entry, tables) for each query scanning tables its baseline entry does not allow"""
+    regressions = []
+    for key, entry in sorted(queries.items(), key=lambda item: item[1]["sql"]):
+        allowed = set(baseline.get(key, {}).get("scans", []))
+        new = [table for table in entry["scans"] if table not in allowed]
+        if new:
+            regressions.append((key, entry, new))
+    return regressions
+
+
+def describe_regression(key: str, entry: dict, new: list) -> str:
+    lines = [
+        f"Full scan of {', '.join(new)} in {key}",
+        f"    routes: {', '.join(sorted(entry['routes']))}",
+        f"    sql:    {entry['sql'][:300]}",
+    ]
+    lines.extend(f"    plan:   {detail}" for detail in entry["plan"])
+    return "\n".join(lines)
+
+
+def main_check(args) -> int:
+    queries = capture()
+    baseline = load_baseline()
+    regressions = find_regressions(queries, baseline)
+    regressed = {key for key, _, _ in regressions}
+    accepted = sum(1 for key, entry in queries.items() if entry["scans"] and key not in regressed)
+
+    if args.verbose:
+        for key, entry in sorted(queries.items(), key=lambda item: item[1]["sql"]):
+            print(f"{key}  {entry['sql'][:160]}")
+            for detail in entry["plan"]:
+                print(f"    {detail}")
+
+    stale = sorted(set(baseline) - set(queries))
+    print(f"[OK] {len(queries)} distinct queries, {accepted} accepted full scans, "
+          f"{len(regressions)} new full scans, {len(stale)} baseline entries not seen")
+
+    if args.update:
+        with open(BASELINE, "w") as f:
+            json.dump({
+                key: {"sql": entry["sql"], "scans": entry["scans"], "routes": sorted(entry["routes"])}
+                for key, entry in sorted(queries.items())
+                if entry["scans"]
+            }, f, indent=2)
+            f.write("\n")
+        print(f"[OK] Baseline written to {BASELINE}")
+        return 0
+
+    for key, entry, new in regressions:
+        print(f"[ERROR] {describe_regression(key, entry, new)}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail when a router query regresses to a full table scan")
+    parser.add_argument("--update", action="store_true", help="write the current full scans as the baseline")
+    parser.add_argument("--verbose", action="store_true", help="print every query plan")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Plans are checked on SQLite; set before the engine is created
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'plans.db')}"
+        os.environ["RATE_LIMIT_ENABLED"] = "0"
+        os.environ["AUTO_SEED"] = "0"
+        sys.exit(main_check(args))
@@ -0,0 +1,508 @@
+"""
+End-to-end load test of the API hot paths.
+
+Boots the app under uvicorn against a generated dataset
+(benchmarks.synthetic_data) and drives a weighted mix of requests from
+`--clients` concurrent virtual users over HTTP for `--duration` seconds,
+after a `--warmup`:
+
+    storefront   store page, listings, filters, sorts, search, product detail
+    checkout     storefront orders of 1-3 items
+    reseller     dashboard stats, time series, top products, order list
+    catalog      the manufacturer catalog resellers pick products from
+    admin        dashboard and the order, reseller and payout listings
+
+Reports throughput, p50/p95/p99 latency, errors and SQL statements per
+request (from X-DB-Queries) for each endpoint. Results are written as JSON
+to benchmarks/results/ and compared with the latest earlier result for the
+same dataset, client count and worker count. The run exits with code 1 when
+an endpoint's p95 or throughput is more than `--threshold` worse, its error
+rate went up, or it issues more queries than before.
+
+Datasets are generated once per preset and cached in
+benchmarks/results/datasets; each run works on a copy, so checkouts never
+change the data the next run starts from. With --database-url the run uses
+that database as it is, e.g. a Postgres one filled by synthetic_data.
+
+From the backend directory:
+    python -m benchmarks.load_test [--dataset small|medium|large] [--clients 50]
+        [--duration 30] [--workers 1] [--baseline FILE] [--no-compare]
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND, "benchmarks", "results")
+DATASETS_DIR = os.path.join(RESULTS_DIR, "datasets")
+
+# benchmarks.synthetic_data arguments for each preset
+DATASETS = {
+    "small": ["--manufacturers", "5", "--products", "500", "--resellers", "50", "--orders", "5000"],
+    "medium": ["--manufacturers", "20", "--products", "5000", "--resellers", "500", "--orders", "50000"],
+    "large": ["--manufacturers", "200", "--products", "100000", "--resellers", "10000", "--orders", "1000000"],
+}
+# Fixed so a preset generates the same rows whenever its cache is rebuilt
+DATASET_UNTIL = "2026-01-01"
+PASSWORD = "synthetic123"
+
+ADMIN_LOGIN = {"email": "admin@jewelryplatform.com", "password": "admin123"}
+CATEGORIES = ("Rings", "Necklaces", "Earrings", "Bracelets", "Pendants", "Sets")
+SEARCHES = ("ring", "gold", "diamond", "pearl", "silver")
+CHECKOUT = {
+    "customer_email": "load@example.com",
+    "customer_name": "Load Test",
+    "shipping_address_line1": "1 Benchmark Road",
+    "shipping_city": "Mumbai",
+    "shipping_state": "Maharashtra",
+    "shipping_postal_code": "400001",
+}
+
+STORES = 50
+RESELLER_LOGINS = 10
+
+# Regressions smaller than this are noise on a local run
+MIN_LATENCY_DELTA_MS = 5.0
+# p95 of a handful of requests is mostly noise
+MIN_SAMPLES = 200
+MIN_ERROR_RATE_DELTA = 0.01
+
+
+# ============== REQUEST MIX ==============
+
+def _store_page(ctx, rng, suffix: str = ""):
+    return "GET", f"/api/store/{rng.choice(ctx['stores'])['slug']}{suffix}", None
+
+
+def _product_detail(ctx, rng):
+    store = rng.choice(ctx["stores"])
+    return "GET", f"/api/store/{store['slug']}/products/{rng.choice(store['product_slugs'])}", None
+
+
+def _checkout(ctx, rng):
+    store = rng.choice(ctx["stores"])
+    product_ids = rng.sample(store["product_ids"], min(len(store["product_ids"]), rng.randint(1, 3)))
+    return "POST", f"/api/orders/storefront/{store['slug']}", {
+        **CHECKOUT, "items": [{"product_id": product_id, "quantity": 1} for product_id in product_ids]
+    }
+
+
+def _get(url: str):
+    return lambda ctx, rng: ("GET", url, None)
+
+
+def _paged(url: str, pages: int = 5):
+    return lambda ctx, rng: ("GET", f"{url}{'&' if '?' in url else '?'}page={rng.randint(1, pages)}", None)
+
+
+# (endpoint, weight, role, build(ctx, rng) -> (method, url, json body))
+MIX = [
+    ("GET /api/store/{slug}", 8, None, _store_page),
+    ("GET /api/store/{slug}/products", 14, None,
+     lambda ctx, rng: _store_page(ctx, rng, f"/products?page={rng.randint(1, 3)}")),
+    ("GET /api/store/{slug}/products?category", 6, None,
+     lambda ctx, rng: _store_page(ctx, rng, f"/products?category={rng.choice(CATEGORIES)}")),
+    ("GET /api/store/{slug}/products?sort=bestsellers", 4, None,
+     lambda ctx, rng: _store_page(ctx, rng, "/products?sort=bestsellers")),
+    ("GET /api/store/{slug}/products?search", 6, None,
+     lambda ctx, rng: _store_page(ctx, rng, f"/products?search={rng.choice(SEARCHES)}")),
+    ("GET /api/store/{slug}/products/{product_slug}", 16, None, _product_detail),
+    ("GET /api/store/{slug}/categories", 3, None, lambda ctx, rng: _store_page(ctx, rng, "/categories")),
+    ("GET /api/store/{slug}/featured", 3, None, lambda ctx, rng: _store_page(ctx, rng, "/featured")),
+    ("POST /api/orders/storefront/{slug}", 5, None, _checkout),
+    ("GET /api/resellers/dashboard/stats", 4, "reseller", _get("/api/resellers/dashboard/stats")),
+    ("GET /api/resellers/dashboard/timeseries", 3, "reseller",
+     lambda ctx, rng: ("GET", f"/api/resellers/dashboard/timeseries?granularity={rng.choice(['day', 'week'])}", None)),
+    ("GET /api/resellers/dashboard/top-products", 2, "reseller", _get("/api/resellers/dashboard/top-products")),
+    ("GET /api/orders", 3, "reseller", _paged("/api/orders")),
+    ("GET /api/products/catalog", 6, "reseller", _paged("/api/products/catalog")),
+    ("GET /api/products/catalog?category", 4, "reseller",
+     lambda ctx, rng: ("GET", f"/api/products/catalog?category={rng.choice(CATEGORIES)}", None)),
+    ("GET /api/admin/dashboard", 2, "admin", _get("/api/admin/dashboard")),
+    ("GET /api/admin/orders", 3, "admin", _paged("/api/admin/orders")),
+    ("GET /api/admin/resellers", 2, "admin", _paged("/api/admin/resellers")),
+    ("GET /api/admin/payouts", 2, "admin", _get("/api/admin/payouts?status_filter=pending")),
+]
+
+
+# ============== DATASET ==============
+
+def dataset_url(args, tmp: str) -> str:
+    """Database for this run: --database-url as is, or a fresh copy of the cached preset"""
+    if args.database_url:
+        return args.database_url
+
+    cached = os.path.join(DATASETS_DIR, f"{args.dataset}-seed{args.seed}.db")
+    if not os.path.exists(cached):
+        os.makedirs(DATASETS_DIR, exist_ok=True)
+        building = f"{cached}.building"
+        for leftover in glob.glob(f"{building}*"):
+            os.remove(leftover)
+        print(f"[OK] Generating the {args.dataset} dataset")
+        subprocess.run([
+            sys.executable, "-m", "benchmarks.synthetic_data",
+            "--database-url", f"sqlite:///{building}",
+            "--seed", str(args.seed), "--until", DATASET_UNTIL, "--password", PASSWORD,
+            *DATASETS[args.dataset],
+        ], cwd=BACKEND, check=True, stdout=subprocess.DEVNULL)
+        # Fold the WAL into the main file so a single file copy is complete
+        conn = sqlite3.connect(building)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            conn.close()
+        os.replace(building, cached)
+        for leftover in glob.glob(f"{building}*"):
+            os.remove(leftover)
+
+    path = os.path.join(tmp, "load.db")
+    shutil.copyfile(cached, path)
+    return f"sqlite:///{path}"
+
+
+def discover(database_url: str) -> dict:
+    """Stores, their listings and reseller logins to aim traffic at"""
+    from sqlalchemy import create_engine, text
+
+    bound = create_engine(database_url)
+    try:
+        with bound.begin() as conn:
+            # Checkouts must not run out of stock mid-run
+            conn.execute(text("UPDATE products SET stock_quantity = 1000000"))
+            busiest = conn.execute(text(
+                "SELECT o.reseller_id FROM orders o JOIN resellers r ON r.id = o.reseller_id "
+                "WHERE r.is_published GROUP BY o.reseller_id ORDER BY COUNT(*) DESC LIMIT :limit"
+            ), {"limit": STORES // 5}).scalars().all()
+            others = conn.execute(text(
+                "SELECT id FROM resellers WHERE is_published ORDER BY id LIMIT :limit"
+            ), {"limit": STORES}).scalars().all()
+            reseller_ids = list(dict.fromkeys(busiest + others))[:STORES]
+
+            stores = []
+            for reseller_id in reseller_ids:
+                slug = conn.execute(text("SELECT slug FROM resellers WHERE id = :id"), {"id": reseller_id}).scalar()
+                listings = conn.execute(text(
+                    "SELECT p.id, p.slug FROM reseller_products rp JOIN products p ON p.id = rp.product_id "
+                    "WHERE rp.reseller_id = :id AND rp.is_active AND p.is_active"
+                ), {"id": reseller_id}).all()
+                if listings:
+                    stores.append({
+                        "reseller_id": reseller_id,
+                        "slug": slug,
+                        "product_ids": [row.id for row in listings],
+                        "product_slugs": [row.slug for row in listings],
+                    })
+
+            emails = conn.execute(text(
+                "SELECT u.email FROM users u JOIN resellers r ON r.user_id = u.id "
+                "WHERE u.email LIKE '%@synthetic.example.com' AND r.id IN ("
+                + ", ".join(str(store["reseller_id"]) for store in stores) + ") ORDER BY r.id LIMIT :limit"
+            ), {"limit": RESELLER_LOGINS}).scalars().all()
+    finally:
+        bound.dispose()
+    return {"stores": stores, "reseller_emails": emails}
+
+
+# ============== SERVER ==============
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        # One client address sends every request; measure the handlers, not the limiter
+        RATE_LIMIT_ENABLED="0",
+        QUERY_STATS_HEADERS="1",
+        AUTO_SEED="0",
+    )
+    return subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers),
+        "--log-level", "warning", "--no-access-log",
+    ], cwd=BACKEND, env=env)
+
+
+async def wait_ready(client, server: subprocess.Popen, timeout: float = 120) -> None:
+    import httpx
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready")
+
+
+# ============== LOAD ==============
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] * 1000
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+        self.queries = 0
+
+    def add(self, seconds: float, status: int, queries) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status >= 400:
+            self.errors += 1
+        if queries is not None:
+            self.queries += int(queries)
+
+    def summary(self, elapsed: float) -> dict:
+        count = len(self.latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "rps": round(count / elapsed, 2),
+            "p50_ms": round(percentile(self.latencies, 50), 2) if count else None,
+            "p95_ms": round(percentile(self.latencies, 95), 2) if count else None,
+            "p99_ms": round(percentile(self.latencies, 99), 2) if count else None,
+            "max_ms": round(max(self.latencies) * 1000, 2) if count else None,
+            "queries": round(self.queries / count, 2) if count else None,
+            "statuses": {str(status): n for status, n in sorted(self.statuses.items())},
+        }
+
+
+async def drive(client, ctx: dict, args, seconds: float, seed: int) -> dict:
+    """Run the mix from args.clients virtual users for `seconds`; returns stats per endpoint"""
+    stats = {endpoint: EndpointStats() for endpoint, _, _, _ in MIX}
+    weights = [weight for _, weight, _, _ in MIX]
+    deadline = time.perf_counter() + seconds
+
+    async def user(index: int):
+        rng = random.Random(seed * 1000 + index)
+        while time.perf_counter() < deadline:
+            endpoint, _, role, build = rng.choices(MIX, weights)[0]
+            method, url, body = build(ctx, rng)
+            headers = {}
+            if role == "admin":
+                headers["Authorization"] = f"Bearer {ctx['admin_token']}"
+            elif role == "reseller":
+                headers["Authorization"] = f"Bearer {rng.choice(ctx['reseller_tokens'])}"
+
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, headers=headers, json=body)
+                status, queries = response.status_code, response.headers.get("x-db-queries")
+            except Exception:
+                status, queries = 599, None
+            stats[endpoint].add(time.perf_counter() - started, status, queries)
+
+    await asyncio.gather(*(user(index) for index in range(args.clients)))
+    return stats
+
+
+async def login(client, credentials: dict) -> str:
+    response = await client.post("/api/auth/login/json", json=credentials)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_load(args, database_url: str) -> dict:
+    import httpx
+
+    targets = discover(database_url)
+    if not targets["stores"] or not targets["reseller_emails"]:
+        raise RuntimeError("no published stores with listings; generate the data with benchmarks.synthetic_data")
+
+    port = free_port()
+    server = start_server(database_url, port, args.workers)
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await wait_ready(client, server)
+            ctx = {
+                "stores": targets["stores"],
+                "admin_token": await login(client, ADMIN_LOGIN),
+                "reseller_tokens": [
+                    await login(client, {"email": email, "password": PASSWORD})
+                    for email in targets["reseller_emails"]
+                ],
+            }
+            if args.warmup:
+                await drive(client, ctx, args, args.warmup, seed=args.seed + 1)
+            started = time.perf_counter()
+            stats = await drive(client, ctx, args, args.duration, seed=args.seed)
+            elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    total = EndpointStats()
+    for endpoint_stats in stats.values():
+        total.latencies.extend(endpoint_stats.latencies)
+        total.errors += endpoint_stats.errors
+        total.queries += endpoint_stats.queries
+        for status, n in endpoint_stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + n
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total": total.summary(elapsed),
+        "endpoints": {endpoint: endpoint_stats.summary(elapsed) for endpoint, endpoint_stats in stats.items()},
+    }
+
+
+# ============== RESULTS ==============
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def comparable(config: dict) -> tuple:
+    return (config["dataset"], config["backend"], config["clients"], config["workers"])
+
+
+def latest_baseline(result: dict):
+    """Most recent earlier result run with the same dataset, backend, clients and workers"""
+    for path in sorted(glob.glob(os.path.join(RESULTS_DIR, "load-*.json")), reverse=True):
+        try:
+            with open(path) as f:
+                earlier = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if comparable(earlier["config"]) == comparable(result["config"]):
+            return path, earlier
+    return None, None
+
+
+def regressions(result: dict, baseline: dict, threshold: float) -> list:
+    found = []
+    pairs = [("total", result["total"], baseline["total"])] + [
+        (endpoint, now, baseline["endpoints"].get(endpoint)) for endpoint, now in result["endpoints"].items()
+    ]
+    for endpoint, now, before in pairs:
+        if not before or not now["requests"] or not before["requests"]:
+            continue
+        if (min(now["requests"], before["requests"]) >= MIN_SAMPLES
+                and now["p95_ms"] > before["p95_ms"] * (1 + threshold)
+                and now["p95_ms"] - before["p95_ms"] > MIN_LATENCY_DELTA_MS):
+            found.append(f"{endpoint}: p95 {before['p95_ms']:.1f}ms -> {now['p95_ms']:.1f}ms")
+        if now["rps"] < before["rps"] * (1 - threshold):
+            found.append(f"{endpoint}: throughput {before['rps']:.1f} -> {now['rps']:.1f} req/s")
+        if now["error_rate"] - before["error_rate"] > MIN_ERROR_RATE_DELTA:
+            found.append(f"{endpoint}: error rate {before['error_rate']:.1%} -> {now['error_rate']:.1%}")
+        if before["queries"] is not None and now["queries"] is not None and now["queries"] > before["queries"] + 0.5:
+            found.append(f"{endpoint}: queries per request {before['queries']} -> {now['queries']}")
+    return found
+
+
+def print_report(result: dict) -> None:
+    print(f"{'endpoint':<50} {'n':>6} {'req/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'err':>5} {'sql':>5}")
+    rows = list(result["endpoints"].items()) + [("total", result["total"])]
+    for endpoint, summary in rows:
+        if not summary["requests"]:
+            print(f"{endpoint:<50} {0:>6}")
+            continue
+        print(f"{endpoint:<50} {summary['requests']:>6} {summary['rps']:>7.1f} "
+              f"{summary['p50_ms']:>7.1f} {summary['p95_ms']:>7.1f} {summary['p99_ms']:>7.1f} "
+              f"{summary['errors']:>5} {summary['queries']:>5.1f}")
+
+
+def main_load(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = dataset_url(args, tmp)
+        measured = asyncio.run(run_load(args, database_url))
+
+    started_at = datetime.now(timezone.utc)
+    result = {
+        "started_at": started_at.isoformat(),
+        "commit": git_commit(),
+        "config": {
+            "dataset": "custom" if args.database_url else args.dataset,
+            "backend": database_url.split(":", 1)[0].split("+", 1)[0],
+            "clients": args.clients,
+            "workers": args.workers,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+        },
+        **measured,
+    }
+    print(f"dataset={result['config']['dataset']} clients={args.clients} workers={args.workers} "
+          f"duration={measured['elapsed_s']}s commit={result['commit']}")
+    print_report(result)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline_path, baseline = args.baseline, json.load(f)
+    elif not args.no_compare:
+        baseline_path, baseline = latest_baseline(result)
+    else:
+        baseline_path, baseline = None, None
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{started_at:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+        f.write("\n")
+    print(f"[OK] Results written to {output}")
+
+    if baseline is None:
+        print("[OK] No earlier result with the same configuration to compare with")
+        return 0
+    found = regressions(result, baseline, args.threshold)
+    for line in found:
+        print(f"[ERROR] Regression: {line}")
+    if found:
+        print(f"[ERROR] {len(found)} regressions against {baseline_path} ({baseline.get('commit')})")
+        return 1
+    print(f"[OK] No regressions against {baseline_path} ({baseline.get('commit')})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API hot paths and flag regressions")
+    parser.add_argument("--dataset", choices=sorted(DATASETS), default="small")
+    parser.add_argument("--database-url", default=None, help="use this prepared database instead of a preset")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative change flagged as a regression")
+    parser.add_argument("--baseline", default=None, help="result file to compare with (default: latest matching)")
+    parser.add_argument("--no-compare", action="store_true")
+    parser.add_argument("--output", default=None, help="result file (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args()
+
+    sys.exit(main_load(args))
@@ -0,0 +1,124 @@
+"""
+Storefront latency during a login burst.
+
+Measures storefront product-listing latency on its own, then again while a
+burst of concurrent logins is in flight. With bcrypt on the password hashing
+pool the two distributions should be close; `--inline` hashes on the event
+loop instead (the old behaviour) for comparison.
+
+Runs in-process against the ASGI app, from the backend directory:
+    python -m benchmarks.login_burst [--logins 40] [--requests 400] [--inline]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+# Every login comes from one address; this measures hashing, not rate limits
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+from database.database import init_db
+from seed_data import seed_database
+from services import passwords
+import main
+
+STORE_URL = "/api/store/sparkle-jewels/products"
+LOGIN_URL = "/api/auth/login/json"
+LOGIN = {"email": "demo@mystore.com", "password": "demo123"}
+
+
+class InlinePool:
+    """Runs hashes directly on the event loop, like the handlers used to"""
+
+    async def run(self, fn, *args):
+        return fn(*args)
+
+    def stats(self) -> dict:
+        return {}
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index] * 1000
+
+
+def summarize(label: str, latencies) -> None:
+    print(f"{label:<14} n={len(latencies):<5} "
+          f"p50={percentile(latencies, 50):7.1f}ms  "
+          f"p95={percentile(latencies, 95):7.1f}ms  "
+          f"p99={percentile(latencies, 99):7.1f}ms  "
+          f"max={max(latencies) * 1000:7.1f}ms")
+
+
+async def storefront_load(client: httpx.AsyncClient, requests: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(STORE_URL)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def login_burst(client: httpx.AsyncClient, logins: int):
+    latencies = []
+
+    async def login():
+        started = time.perf_counter()
+        response = await client.post(LOGIN_URL, json=LOGIN)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            print(f"[ERROR] Login returned {response.status_code}: {response.text}")
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return latencies
+
+
+async def run(args) -> None:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up routes and the SQLite page cache
+        await storefront_load(client, 20, 2)
+
+        baseline = await storefront_load(client, args.requests, args.concurrency)
+
+        burst = asyncio.create_task(login_burst(client, args.logins))
+        await asyncio.sleep(0)
+        during = await storefront_load(client, args.requests, args.concurrency)
+        logins = await burst
+
+    print(f"bcrypt rounds={passwords.BCRYPT_ROUNDS} "
+          f"mode={'inline' if args.inline else f'pool({passwords.hash_pool.workers} workers)'}")
+    summarize("storefront", baseline)
+    summarize("during burst", during)
+    summarize("logins", logins)
+    print(f"p99 ratio (burst / baseline): {percentile(during, 99) / percentile(baseline, 99):.2f}x")
+    if not args.inline:
+        print(f"pool: {passwords.hash_pool.stats()}")
+    print(f"storefront mean during burst: {statistics.mean(during) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Storefront latency under a login burst")
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--inline", action="store_true", help="hash on the event loop (pre-pool behaviour)")
+    args = parser.parse_args()
+
+    init_db()
+    seed_database()
+    if args.inline:
+        passwords.hash_pool = InlinePool()
+
+    asyncio.run(run(args))
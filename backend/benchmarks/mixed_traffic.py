@@ -0,0 +1,133 @@
+"""
+Mixed read/write storefront traffic against default and tuned engines.
+
+`--clients` concurrent shoppers browse the storefront and a `--write-ratio`
+share of their requests are checkouts, for `--duration` seconds. Reports
+throughput, read and checkout latency, and failed requests (on SQLite with
+the default engine these are mostly "database is locked").
+
+    --config default   SQLAlchemy defaults (DB_ENGINE_TUNING=0)
+    --config tuned     pool sizing and SQLite WAL/pragmas from database.database
+    --config compare   runs both in subprocesses
+
+Every run seeds a fresh SQLite database in a temporary directory, never
+DATABASE_URL: it raises every product's stock and places real orders, and
+WAL mode sticks to the database file.
+
+Runs in-process against the ASGI app, from the backend directory:
+    python -m benchmarks.mixed_traffic [--config compare] [--clients 50] [--write-ratio 0.2]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+CHECKOUT = {
+    "customer_email": "bench@example.com",
+    "customer_name": "Bench Shopper",
+    "shipping_address_line1": "1 Benchmark Road",
+    "shipping_city": "Mumbai",
+    "shipping_state": "Maharashtra",
+    "shipping_postal_code": "400001",
+}
+
+
+async def run(args) -> None:
+    # Imported here so DB_ENGINE_TUNING is set before the engine is created
+    import httpx
+    from sqlalchemy import text
+
+    from database.database import engine, init_db, pool_stats
+    from seed_data import seed_database
+    from benchmarks.login_burst import summarize
+    from benchmarks.storefront_concurrency import SLUG, storefront_urls
+    import main
+
+    init_db()
+    seed_database()
+    with engine.begin() as conn:
+        # Keep checkouts from running out of stock mid-run
+        conn.execute(text("UPDATE products SET stock_quantity = 1000000"))
+
+    transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        listing = await client.get(f"/api/store/{SLUG}/products", params={"per_page": 20})
+        urls = storefront_urls(listing)
+        product_ids = [p["id"] for p in listing.json()["products"]]
+
+        reads, writes = [], []
+        failures = {}
+        rng = random.Random(42)
+        deadline = time.perf_counter() + args.duration
+
+        async def shopper():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                if rng.random() < args.write_ratio:
+                    response = await client.post(f"/api/orders/storefront/{SLUG}", json={
+                        **CHECKOUT,
+                        "items": [{"product_id": rng.choice(product_ids), "quantity": 1}]
+                    })
+                    writes.append(time.perf_counter() - started)
+                else:
+                    response = await client.get(rng.choice(urls))
+                    reads.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    reason = response.json().get("error") or response.json().get("detail")
+                    key = f"{response.status_code} {str(reason)[:60]}"
+                    failures[key] = failures.get(key, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(shopper() for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+
+    print(f"config={args.config} backend={engine.dialect.name} clients={args.clients} "
+          f"write_ratio={args.write_ratio} duration={elapsed:.1f}s")
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            print(f"journal_mode={conn.execute(text('PRAGMA journal_mode')).scalar()}")
+    summarize("reads", reads)
+    summarize("checkouts", writes)
+    total = len(reads) + len(writes)
+    print(f"throughput: {total / elapsed:.1f} req/s  checkouts: {len(writes) / elapsed:.1f}/s  "
+          f"failed: {sum(failures.values())}")
+    for reason, count in sorted(failures.items(), key=lambda item: -item[1]):
+        print(f"  {count:>6}  {reason}")
+    print(f"pool: {pool_stats()}")
+
+
+def compare(args) -> None:
+    for config in ("default", "tuned"):
+        subprocess.run([
+            sys.executable, "-m", "benchmarks.mixed_traffic",
+            "--config", config,
+            "--clients", str(args.clients),
+            "--duration", str(args.duration),
+            "--write-ratio", str(args.write_ratio),
+        ], check=True)
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mixed storefront traffic against engine configurations")
+    parser.add_argument("--config", choices=["default", "tuned", "compare"], default="compare")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # Checkout limits would dominate the write path
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+    if args.config == "compare":
+        compare(args)
+    else:
+        os.environ["DB_ENGINE_TUNING"] = "1" if args.config == "tuned" else "0"
+        with tempfile.TemporaryDirectory() as tmp:
+            # Set before the engine is created
+            os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, args.config + '.db')}"
+            asyncio.run(run(args))
@@ -0,0 +1,101 @@
+"""
+Worker startup time, cold and warm, for 1 and 8 workers.
+
+Each worker is a fresh interpreter that imports the app and prepares the
+database the way a booting uvicorn worker does:
+
+    legacy    create_all + import and run the seeder on every boot
+    stamped   services.startup.prepare_database (stamp check, lock, lazy seed)
+
+"cold" starts from an empty SQLite file and "warm" from one that is already
+prepared. All workers of a run start together. Reports the database
+preparation time inside each worker, the wall time until every worker is
+ready, and workers that failed (e.g. legacy workers racing to seed).
+
+From the backend directory:
+    python -m benchmarks.startup_time [--workers 1 8] [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ("legacy", "stamped")
+
+
+def worker(mode: str) -> None:
+    import main  # noqa: F401  (app import cost is the same for both modes)
+
+    started = time.perf_counter()
+    if mode == "legacy":
+        from database.database import init_db
+        init_db()
+        from seed_data import seed_database
+        seed_database()
+    else:
+        from services.startup import prepare_database
+        prepare_database()
+    print(f"PREPARE_MS {(time.perf_counter() - started) * 1000:.1f}")
+
+
+def launch(mode: str, workers: int, database_url: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url)
+    started = time.perf_counter()
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.startup_time", "--worker", mode],
+            env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        for _ in range(workers)
+    ]
+    prepare_ms, failed = [], 0
+    for process in processes:
+        output, _ = process.communicate()
+        lines = [line for line in output.splitlines() if line.startswith("PREPARE_MS ")]
+        if process.returncode != 0 or not lines:
+            failed += 1
+        else:
+            prepare_ms.append(float(lines[-1].split()[1]))
+    return {
+        "wall_ms": (time.perf_counter() - started) * 1000,
+        "prepare_ms": prepare_ms,
+        "failed": failed
+    }
+
+
+def run(args) -> None:
+    print(f"{'mode':<8} {'db':<5} {'workers':>7} {'wall ms':>9} {'prepare p50':>12} {'prepare max':>12} {'failed':>7}")
+    for workers in args.workers:
+        for mode in MODES:
+            for state in ("cold", "warm"):
+                walls, prepares, failed = [], [], 0
+                for _ in range(args.repeat):
+                    with tempfile.TemporaryDirectory() as tmp:
+                        url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+                        if state == "warm":
+                            launch(mode, 1, url)
+                        result = launch(mode, workers, url)
+                    walls.append(result["wall_ms"])
+                    prepares.extend(result["prepare_ms"])
+                    failed += result["failed"]
+                p50 = statistics.median(prepares) if prepares else float("nan")
+                worst = max(prepares) if prepares else float("nan")
+                print(f"{mode:<8} {state:<5} {workers:>7} {statistics.median(walls):>9.0f} "
+                      f"{p50:>12.1f} {worst:>12.1f} {failed:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker startup time")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker)
+    else:
+        run(args)
@@ -0,0 +1,99 @@
+"""
+Storefront throughput with many concurrent clients.
+
+Drives a mix of storefront reads (store page, product listing pages and
+sorts, product detail, categories, featured) from `--clients` concurrent
+clients for `--duration` seconds and reports requests/second and latency.
+
+Handlers that query the database run on FastAPI's threadpool, so a slow
+query only holds up its own request. `--db-latency-ms` adds a blocking
+sleep to every SQL statement to stand in for the network round trip to
+Postgres; on local SQLite queries are too fast for blocking to show.
+
+Runs in-process against the ASGI app, from the backend directory:
+    python -m benchmarks.storefront_concurrency [--clients 100] [--duration 10] [--db-latency-ms 2]
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+
+import httpx
+from sqlalchemy import event
+
+from database.database import engine, init_db
+from seed_data import seed_database
+from benchmarks.login_burst import percentile, summarize
+import main
+
+SLUG = "sparkle-jewels"
+
+
+def add_db_latency(seconds: float) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sleep(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(seconds)
+
+
+def storefront_urls(listing: httpx.Response) -> list:
+    listing.raise_for_status()
+    urls = [
+        f"/api/store/{SLUG}",
+        f"/api/store/{SLUG}/categories",
+        f"/api/store/{SLUG}/featured",
+        f"/api/store/{SLUG}/products",
+        f"/api/store/{SLUG}/products?page=2",
+        f"/api/store/{SLUG}/products?sort=bestsellers",
+        f"/api/store/{SLUG}/products?category=Rings",
+    ]
+    for product in listing.json()["products"][:5]:
+        urls.append(f"/api/store/{SLUG}/products/{product['slug']}")
+    return urls
+
+
+async def run(args) -> None:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        urls = storefront_urls(await client.get(f"/api/store/{SLUG}/products", params={"per_page": 20}))
+        for url in urls:
+            (await client.get(url)).raise_for_status()
+
+        if args.db_latency_ms:
+            add_db_latency(args.db_latency_ms / 1000)
+
+        latencies = []
+        errors = 0
+        next_url = itertools.cycle(urls).__next__
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(next_url())
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+
+    print(f"clients={args.clients} duration={elapsed:.1f}s db_latency={args.db_latency_ms}ms urls={len(urls)}")
+    summarize("storefront", latencies)
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s  errors={errors}  "
+          f"p99/p50={percentile(latencies, 99) / percentile(latencies, 50):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Storefront throughput at high concurrency")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--db-latency-ms", type=float, default=2,
+                        help="blocking delay added to every SQL statement (0 for raw SQLite)")
+    args = parser.parse_args()
+
+    init_db()
+    seed_database()
+    asyncio.run(run(args))
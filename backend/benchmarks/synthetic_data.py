@@ -0,0 +1,466 @@
+"""
+Synthetic dataset generator for scaling tests.
+
+Starts from the regular seed (seed_data.py: the admin, demo manufacturer and
+demo reseller keep their logins) and adds manufacturers, products built from
+its SAMPLE_PRODUCTS templates, resellers with storefronts and listings, and
+orders with items spread over the last N months. Afterwards the rollups,
+leaderboard counters and balances are rebuilt from the generated orders, so
+dashboards read the same numbers they would after real traffic.
+
+Rows are generated in batches and written with Core executemany inserts,
+with ids assigned here so items can point at their orders without a round
+trip. Every generated user shares one password hash, computed once. The
+same --seed and --until produce the same generated rows.
+
+Store traffic is skewed: a few resellers get most of the orders, as on a
+real platform, so per-store queries see both small and very large stores.
+
+From the backend directory:
+    python -m benchmarks.synthetic_data --database-url sqlite:///./large.db \\
+        --manufacturers 200 --products 100000 --resellers 10000 \\
+        --products-per-store 50 --orders 1000000 --months 12
+
+Generated users log in as reseller<reseller id>@synthetic.example.com or
+manufacturer<manufacturer id>@synthetic.example.com with --password (default
+synthetic123). --database-url is required: the generator never falls back
+to DATABASE_URL, the development database by default.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, time as day_time, timedelta, timezone
+
+EMAIL_DOMAIN = "synthetic.example.com"
+
+STORE_WORDS = (
+    "Golden", "Silver", "Royal", "Lotus", "Pearl", "Ruby", "Emerald", "Heritage",
+    "Moonlight", "Aura", "Kiran", "Tara", "Nakshatra", "Saffron", "Velvet", "Opal"
+)
+STORE_NOUNS = ("Jewels", "Gems", "Ornaments", "Boutique", "Collection", "Studio", "Treasures", "Adornments")
+CITIES = (
+    ("Mumbai", "Maharashtra", "400001"), ("Delhi", "Delhi", "110001"), ("Bengaluru", "Karnataka", "560001"),
+    ("Chennai", "Tamil Nadu", "600001"), ("Kolkata", "West Bengal", "700001"), ("Jaipur", "Rajasthan", "302001"),
+    ("Hyderabad", "Telangana", "500001"), ("Ahmedabad", "Gujarat", "380001"), ("Pune", "Maharashtra", "411001"),
+)
+THEMES = ("elegant", "modern", "minimal", "luxury")
+
+# Share of orders in each status by age: recent orders are still moving
+RECENT_STATUSES = (("pending", 30), ("confirmed", 25), ("processing", 15), ("shipped", 20), ("cancelled", 5), ("delivered", 5))
+SETTLED_STATUSES = (("delivered", 91), ("cancelled", 7), ("shipped", 2))
+RECENT_DAYS = 14
+
+TAX_RATE = 0.18
+
+
+class Ids:
+    """Next id per table, continuing after the rows already there"""
+
+    def __init__(self, conn, tables):
+        from sqlalchemy import func, select
+
+        self.next = {
+            table.name: (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+            for table in tables
+        }
+
+    def take(self, table, count: int = 1) -> int:
+        first = self.next[table.name]
+        self.next[table.name] = first + count
+        return first
+
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        until = args.until or date.today()
+        self.end = datetime.combine(until, day_time(), tzinfo=timezone.utc)
+        self.start = self.end - timedelta(days=30 * args.months)
+        self.started = time.perf_counter()
+
+    def log(self, message: str) -> None:
+        print(f"[OK] {message} ({time.perf_counter() - self.started:.1f}s)")
+
+    def insert(self, table, rows) -> None:
+        from database.database import engine
+
+        batch_size = self.args.batch_size
+        for offset in range(0, len(rows), batch_size):
+            with engine.begin() as conn:
+                conn.execute(table.insert(), rows[offset:offset + batch_size])
+
+    # ============== CATALOG ==============
+
+    def users(self, role: str, profile_ids: range, password_hash: str) -> list:
+        """Insert one user per profile, emailed <role><profile id>@synthetic.example.com"""
+        from database.models import User
+
+        table = User.__table__
+        first = self.ids.take(table, len(profile_ids))
+        rows = [
+            {
+                "id": first + n,
+                "email": f"{role}{profile_id}@{EMAIL_DOMAIN}",
+                "hashed_password": password_hash,
+                "role": role,
+                "is_active": True,
+                "is_verified": True,
+                "created_at": self.start
+            }
+            for n, profile_id in enumerate(profile_ids)
+        ]
+        self.insert(table, rows)
+        return [row["id"] for row in rows]
+
+    def manufacturers(self, password_hash: str) -> list:
+        from database.models import Manufacturer
+
+        table = Manufacturer.__table__
+        first = self.ids.take(table, self.args.manufacturers)
+        user_ids = self.users("manufacturer", range(first, first + self.args.manufacturers), password_hash)
+        rows = []
+        for n, user_id in enumerate(user_ids):
+            name = f"{self.rng.choice(STORE_WORDS)} Crafts {first + n}"
+            rows.append({
+                "id": first + n,
+                "user_id": user_id,
+                "company_name": name,
+                "slug": f"crafts-{first + n}",
+                "contact_email": f"orders{first + n}@{EMAIL_DOMAIN}",
+                "minimum_markup_percent": 20.0,
+                "auto_fulfill": True,
+                "is_active": True,
+                "created_at": self.start
+            })
+        self.insert(table, rows)
+        self.log(f"{len(rows)} manufacturers")
+        return [row["id"] for row in rows]
+
+    def products(self, manufacturer_ids: list) -> dict:
+        """Insert products; returns id -> (base_price, name, sku, image, manufacturer_id) for active ones"""
+        from database.models import Product
+        from seed_data import SAMPLE_PRODUCTS
+        from slugify import slugify
+
+        table = Product.__table__
+        templates = [(template, slugify(template["name"])) for template in SAMPLE_PRODUCTS]
+        first = self.ids.take(table, self.args.products)
+        rows, catalog = [], {}
+        for n in range(self.args.products):
+            product_id = first + n
+            template, slug = self.rng.choice(templates)
+            base_price = round(template["base_price"] * self.rng.uniform(0.4, 2.5), -1)
+            manufacturer_id = self.rng.choice(manufacturer_ids)
+            row = {
+                "id": product_id,
+                "manufacturer_id": manufacturer_id,
+                "name": f"{template['name']} {product_id}",
+                "slug": f"{slug}-{product_id}",
+                "description": template["description"],
+                "short_description": template["short_description"],
+                "base_price": base_price,
+                "msrp": round(base_price * 1.4, -1),
+                "sku": f"SYN-{product_id:07d}",
+                "category": template["category"],
+                "subcategory": template.get("subcategory"),
+                "material": template["material"],
+                "weight": template["weight"],
+                "primary_image": template["primary_image"],
+                "images": [template["primary_image"]],
+                "stock_quantity": self.rng.randint(0, 500),
+                "low_stock_threshold": 5,
+                "track_inventory": True,
+                "is_active": self.rng.random() < 0.95,
+                "is_featured": self.rng.random() < 0.1,
+                "tags": template["tags"],
+                "specifications": {},
+                "created_at": self.start
+            }
+            rows.append(row)
+            if row["is_active"]:
+                catalog[product_id] = (base_price, row["name"], row["sku"], row["primary_image"], manufacturer_id)
+        self.insert(table, rows)
+        self.log(f"{len(rows)} products")
+        return catalog
+
+    def resellers(self, password_hash: str, catalog: dict) -> dict:
+        """Insert resellers, storefront configs and listings; returns reseller id -> [(product_id, retail_price)]"""
+        from database.models import Reseller, ResellerProduct, StorefrontConfig
+
+        table = Reseller.__table__
+        first = self.ids.take(table, self.args.resellers)
+        user_ids = self.users("reseller", range(first, first + self.args.resellers), password_hash)
+        resellers, configs = [], []
+        for n, user_id in enumerate(user_ids):
+            reseller_id = first + n
+            name = f"{self.rng.choice(STORE_WORDS)} {self.rng.choice(STORE_NOUNS)} {reseller_id}"
+            slug = f"{name.lower().replace(' ', '-')}"
+            banked = self.rng.random() < 0.7
+            resellers.append({
+                "id": reseller_id,
+                "user_id": user_id,
+                "business_name": name,
+                "slug": slug,
+                "subdomain": slug,
+                "description": f"{name}: handpicked fine jewelry.",
+                "phone": f"+91 98{reseller_id:08d}",
+                "bank_account_name": name if banked else None,
+                "bank_account_number": f"{reseller_id:012d}" if banked else None,
+                "bank_ifsc": "HDFC0000001" if banked else None,
+                "homepage_title": f"Welcome to {name}",
+                "is_onboarded": True,
+                "is_published": self.rng.random() < 0.9,
+                "created_at": self.start
+            })
+            configs.append({
+                "reseller_id": reseller_id,
+                "theme": self.rng.choice(THEMES),
+                "hero_title": f"Shine with {name}",
+                "hero_cta_text": "Shop Collection"
+            })
+        self.insert(table, resellers)
+        self.insert(StorefrontConfig.__table__, configs)
+
+        product_ids = list(catalog)
+        per_store = min(self.args.products_per_store, len(product_ids))
+        listing_table = ResellerProduct.__table__
+        listings, stores = [], {}
+        next_id = self.ids.take(listing_table, per_store * len(resellers))
+        for reseller in resellers:
+            store = stores[reseller["id"]] = []
+            for position, product_id in enumerate(self.rng.sample(product_ids, per_store)):
+                base_price = catalog[product_id][0]
+                retail_price = round(base_price * self.rng.uniform(1.25, 1.6), -1)
+                listings.append({
+                    "id": next_id,
+                    "reseller_id": reseller["id"],
+                    "product_id": product_id,
+                    "retail_price": retail_price,
+                    "compare_at_price": round(base_price * 1.4, -1),
+                    "is_active": True,
+                    "is_featured": self.rng.random() < 0.1,
+                    "display_order": position,
+                    "created_at": self.start
+                })
+                store.append((product_id, retail_price))
+                next_id += 1
+            if len(listings) >= self.args.batch_size:
+                self.insert(listing_table, listings)
+                listings = []
+        self.insert(listing_table, listings)
+        self.log(f"{len(resellers)} resellers with {per_store} listings each")
+        return stores
+
+    # ============== ORDERS ==============
+
+    def status_for(self, created_at: datetime) -> str:
+        weights = RECENT_STATUSES if self.end - created_at < timedelta(days=RECENT_DAYS) else SETTLED_STATUSES
+        return self.rng.choices([status for status, _ in weights], [weight for _, weight in weights])[0]
+
+    def orders(self, stores: dict, catalog: dict) -> dict:
+        """Insert orders and items; returns reseller id -> commission on delivered orders"""
+        from database.models import Order, OrderItem
+
+        order_table, item_table = Order.__table__, OrderItem.__table__
+        reseller_ids = sorted(stores)
+        # Zipf-like weights: the busiest stores get most of the orders
+        cum_weights, total = [], 0.0
+        for rank in range(1, len(reseller_ids) + 1):
+            total += 1 / rank ** 0.9
+            cum_weights.append(total)
+        self.rng.shuffle(reseller_ids)
+
+        customers = max(1, self.args.orders // 3)
+        span = (self.end - self.start).total_seconds()
+        earned: dict = {}
+        written = 0
+        while written < self.args.orders:
+            count = min(self.args.batch_size, self.args.orders - written)
+            first = self.ids.take(order_table, count)
+            chosen = self.rng.choices(reseller_ids, cum_weights=cum_weights, k=count)
+            orders, items = [], []
+            for n in range(count):
+                order_id = first + n
+                # Ids increase with time, like real orders
+                created_at = self.start + timedelta(seconds=span * (written + n + self.rng.random()) / self.args.orders)
+                status = self.status_for(created_at)
+                reseller_id = chosen[n]
+
+                subtotal = commission = 0.0
+                store = stores[reseller_id]
+                for product_id, retail_price in self.rng.sample(store, min(len(store), self.rng.randint(1, self.args.max_items))):
+                    base_price, name, sku, image, _ = catalog[product_id]
+                    quantity = self.rng.choice((1, 1, 1, 2, 3))
+                    item_total = retail_price * quantity
+                    item_commission = (retail_price - base_price) * quantity
+                    subtotal += item_total
+                    commission += item_commission
+                    items.append({
+                        "order_id": order_id,
+                        "product_id": product_id,
+                        "product_name": name,
+                        "product_sku": sku,
+                        "product_image": image,
+                        "unit_price": retail_price,
+                        "base_price": base_price,
+                        "quantity": quantity,
+                        "total_price": item_total,
+                        "commission_amount": item_commission,
+                        "created_at": created_at
+                    })
+
+                customer = self.rng.randrange(customers)
+                city, state, postal_code = CITIES[customer % len(CITIES)]
+                email = f"customer{customer}@example.com"
+                phone = f"9{customer:09d}"
+                tax_amount = subtotal * TAX_RATE
+                total_amount = subtotal + tax_amount
+                shipped = status in ("shipped", "delivered")
+                orders.append({
+                    "id": order_id,
+                    "reseller_id": reseller_id,
+                    "order_number": f"ORD-{created_at:%Y%m%d}-{order_id:07X}",
+                    "customer_email": email,
+                    "customer_name": f"Customer {customer}",
+                    "customer_phone": f"+91 {phone}",
+                    "customer_email_lower": email,
+                    "customer_phone_normalized": phone,
+                    "shipping_address_line1": f"{customer % 900 + 1} Market Road",
+                    "shipping_city": city,
+                    "shipping_state": state,
+                    "shipping_postal_code": postal_code,
+                    "shipping_country": "India",
+                    "subtotal": subtotal,
+                    "shipping_cost": 0,
+                    "tax_amount": tax_amount,
+                    "total_amount": total_amount,
+                    "reseller_commission": commission,
+                    "manufacturer_amount": total_amount - commission,
+                    "status": status,
+                    "payment_status": "pending" if status == "pending" else "paid",
+                    "shipped_at": created_at + timedelta(days=2) if shipped else None,
+                    "delivered_at": created_at + timedelta(days=5) if status == "delivered" else None,
+                    "created_at": created_at
+                })
+                if status == "delivered":
+                    earned[reseller_id] = earned.get(reseller_id, 0.0) + commission
+
+            first_item = self.ids.take(item_table, len(items))
+            for offset, item in enumerate(items):
+                item["id"] = first_item + offset
+            self.insert(order_table, orders)
+            self.insert(item_table, items)
+            written += count
+            if written % (self.args.batch_size * 10) == 0 or written == self.args.orders:
+                self.log(f"{written} orders")
+        return earned
+
+    def payouts(self, earned: dict) -> None:
+        """Completed payouts for most of each reseller's earnings, and some pending requests"""
+        from database.models import Payout
+
+        table = Payout.__table__
+        rows = []
+        for reseller_id, amount in sorted(earned.items()):
+            paid = round(amount * self.rng.uniform(0.3, 0.7), 2)
+            if paid >= 100:
+                rows.append({
+                    "reseller_id": reseller_id,
+                    "amount": paid,
+                    "status": "completed",
+                    "payment_method": "bank_transfer",
+                    "requested_at": self.end - timedelta(days=30),
+                    "completed_at": self.end - timedelta(days=25)
+                })
+            pending = round(amount * 0.1, 2)
+            if pending >= 100 and self.rng.random() < 0.2:
+                rows.append({
+                    "reseller_id": reseller_id,
+                    "amount": pending,
+                    "status": "pending",
+                    "payment_method": None,
+                    "requested_at": self.end - timedelta(days=self.rng.randint(0, 6)),
+                    "completed_at": None
+                })
+        first = self.ids.take(table, len(rows))
+        for offset, row in enumerate(rows):
+            row["id"] = first + offset
+        self.insert(table, rows)
+        self.log(f"{len(rows)} payouts")
+
+    # ============== RUN ==============
+
+    def run(self) -> int:
+        from sqlalchemy import select
+
+        from database.database import engine, SessionLocal
+        from database.models import Manufacturer, Order, OrderItem, Payout, Product, Reseller, ResellerProduct, User
+        from routers.auth import get_password_hash
+        from services.leaderboards import rebuild_leaderboards
+        from services.ledger import rebuild_balances
+        from services.rollups import rebuild_rollups
+        from services.startup import prepare_database
+
+        # Migrated schema plus the regular seed, so the demo logins keep working
+        prepare_database()
+        users = User.__table__
+        with engine.connect() as conn:
+            if conn.execute(select(users.c.id).where(users.c.email.like(f"%@{EMAIL_DOMAIN}")).limit(1)).first():
+                print("[ERROR] The database already has generated data; start from an empty one")
+                return 1
+            self.ids = Ids(conn, [
+                users, Manufacturer.__table__, Product.__table__, Reseller.__table__,
+                ResellerProduct.__table__, Order.__table__, OrderItem.__table__, Payout.__table__
+            ])
+
+        # bcrypt is slow on purpose; every generated user shares one hash
+        password_hash = get_password_hash(self.args.password)
+        manufacturer_ids = self.manufacturers(password_hash)
+        catalog = self.products(manufacturer_ids)
+        stores = self.resellers(password_hash, catalog)
+        earned = self.orders(stores, catalog)
+        self.payouts(earned)
+
+        if engine.dialect.name == "postgresql":
+            # Explicit ids leave the sequences behind
+            with engine.begin() as conn:
+                for name in self.ids.next:
+                    conn.exec_driver_sql(
+                        f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT MAX(id) FROM {name}))"
+                    )
+
+        db = SessionLocal()
+        try:
+            rebuild_rollups(db)
+            rebuild_leaderboards(db)
+            rebuild_balances(db)
+        finally:
+            db.close()
+        self.log("Rebuilt rollups, leaderboards and balances")
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a large synthetic dataset on top of the seed data")
+    parser.add_argument("--database-url", required=True,
+                        help="database to fill; never taken from DATABASE_URL, so a run cannot land in the app's own")
+    parser.add_argument("--manufacturers", type=int, default=20)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--resellers", type=int, default=500)
+    parser.add_argument("--products-per-store", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--max-items", type=int, default=4, help="most items in one order")
+    parser.add_argument("--months", type=int, default=12, help="order history length")
+    parser.add_argument("--until", type=date.fromisoformat, default=None, help="last order day (default today)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--password", default="synthetic123", help="password for every generated user")
+    args = parser.parse_args()
+
+    # Set before the engine is created
+    os.environ["DATABASE_URL"] = args.database_url
+    sys.exit(Generator(args).run())
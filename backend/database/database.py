@@ -1,20 +1,100 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 import os
 
 # Database URL - SQLite for development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./jewelry_reseller.db")
 
+# Engine tuning (DB_ENGINE_TUNING=0 falls back to SQLAlchemy defaults)
+DB_ENGINE_TUNING = os.getenv("DB_ENGINE_TUNING", "1") == "1"
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+# SQLite pragmas applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers run alongside the single writer; NORMAL is durable in WAL mode
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        # Wait for the write lock instead of failing with "database is locked"
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        # Negative cache_size is in KiB
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _pool_settings(sqlite: bool) -> dict:
+    # Server databases get enough connections for FastAPI's 40 threadpool workers;
+    # SQLite has a single writer, so extra connections would only queue on its lock
+    size, overflow = ("10", "5") if sqlite else ("20", "20")
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", size)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", overflow)),
+        "pool_timeout": DB_POOL_TIMEOUT
+    }
+
+
+def make_engine(url: str = DATABASE_URL, tuned: bool = DB_ENGINE_TUNING) -> Engine:
+    """Create an engine with pool and connection settings for the backend in `url`"""
+    if url.startswith("sqlite"):
+        connect_args = {"check_same_thread": False}
+        if not tuned:
+            return create_engine(url, connect_args=connect_args)
+
+        if ":memory:" in url or url in ("sqlite://", "sqlite:///"):
+            # In-memory databases are per connection; no pool or journal tuning applies
+            return create_engine(url, connect_args=connect_args)
+
+        engine = create_engine(
+            url,
+            connect_args=connect_args,
+            poolclass=QueuePool,
+            **_pool_settings(sqlite=True)
+        )
+        event.listen(engine, "connect", _sqlite_pragmas)
+        return engine
+
+    if not tuned:
+        return create_engine(url)
+
+    return create_engine(
+        url,
+        **_pool_settings(sqlite=False),
+        # Drop connections before the server or a proxy times them out
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+
+
 # Create engine
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+engine = make_engine()
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas (comma-separated URLs); reads are routed by services.replicas
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+replica_engines = [make_engine(url) for url in DATABASE_REPLICA_URLS]
+ReplicaSessions = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    for replica_engine in replica_engines
+]
+
 # Base class for models
 Base = declarative_base()
 
@@ -30,3 +110,22 @@ def init_db():
     """Initialize database tables"""
     from . import models
     Base.metadata.create_all(bind=engine)
+
+def pool_stats() -> dict:
+    """Connection pool usage for the admin system stats"""
+    pool = engine.pool
+    stats = {
+        "backend": engine.dialect.name,
+        "pool": type(pool).__name__,
+        "tuned": DB_ENGINE_TUNING
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout()
+        })
+    return stats
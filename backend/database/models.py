@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum, JSON
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, Text, ForeignKey, Enum, JSON, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, validates
+from sqlalchemy.sql import func, text
 from .database import Base
 import enum
 
@@ -62,11 +62,18 @@ class Reseller(Base):
     
     # Branding
     logo_url = Column(String(500), nullable=True)
+    image_variants = Column(JSON, default=dict)  # {image url: resized variants} (services.images)
     primary_color = Column(String(7), default="#8B5CF6")  # Purple
     secondary_color = Column(String(7), default="#EC4899")  # Pink
     accent_color = Column(String(7), default="#F59E0B")  # Amber
     font_family = Column(String(100), default="Inter")
     
+    # Payout Details
+    bank_account_name = Column(String(255), nullable=True)
+    bank_account_number = Column(String(50), nullable=True)
+    bank_ifsc = Column(String(20), nullable=True)
+    upi_id = Column(String(100), nullable=True)
+    
     # Domain
     subdomain = Column(String(100), unique=True, nullable=True)
     custom_domain = Column(String(255), unique=True, nullable=True)
@@ -119,6 +126,28 @@ class Manufacturer(Base):
     user = relationship("User", back_populates="manufacturer")
     products = relationship("Product", back_populates="manufacturer")
 
+class RefreshToken(Base):
+    """Rotating refresh tokens; only a SHA-256 of the token is stored"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    family_id = Column(String(32), nullable=False, index=True)  # Shared by every rotation of one login
+    
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class TokenRevocation(Base):
+    """Access tokens issued to user_id before created_at are rejected"""
+    __tablename__ = "token_revocations"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    reason = Column(String(50), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
 # ============== PRODUCT MODELS ==============
 
 class Product(Base):
@@ -148,6 +177,7 @@ class Product(Base):
     # Images
     primary_image = Column(String(500), nullable=True)
     images = Column(JSON, default=list)  # List of image URLs
+    image_variants = Column(JSON, default=dict)  # {image url: resized variants} (services.images)
     
     # Inventory
     stock_quantity = Column(Integer, default=0)
@@ -168,6 +198,37 @@ class Product(Base):
     # Relationships
     manufacturer = relationship("Manufacturer", back_populates="products")
     reseller_products = relationship("ResellerProduct", back_populates="product")
+    
+    __table_args__ = (
+        Index("ix_products_active_category", "is_active", "category"),
+        Index("ix_products_manufacturer_active", "manufacturer_id", "is_active"),
+    )
+
+class LowStockAlert(Base):
+    """Raised when a product's stock crosses its low-stock threshold or hits zero"""
+    __tablename__ = "low_stock_alerts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    manufacturer_id = Column(Integer, ForeignKey("manufacturers.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    
+    kind = Column(String(20), nullable=False)  # low_stock, out_of_stock
+    stock_quantity = Column(Integer, nullable=False)
+    threshold = Column(Integer, nullable=False)
+    
+    is_acknowledged = Column(Boolean, default=False)
+    resolved_at = Column(DateTime(timezone=True), nullable=True)  # Set when restocked above threshold
+    notified_at = Column(DateTime(timezone=True), nullable=True)  # Null while queued for notification
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    product = relationship("Product")
+    
+    __table_args__ = (
+        Index("ix_low_stock_alerts_mfr_open", "manufacturer_id", "resolved_at", "created_at"),
+        Index("ix_low_stock_alerts_unnotified", "notified_at", "id"),
+    )
 
 class ResellerProduct(Base):
     __tablename__ = "reseller_products"
@@ -196,6 +257,11 @@ class ResellerProduct(Base):
     reseller = relationship("Reseller", back_populates="products")
     product = relationship("Product", back_populates="reseller_products")
     
+    __table_args__ = (
+        # Storefront listings: active (and featured) products in display order
+        Index("ix_reseller_products_listing", "reseller_id", "is_active", "is_featured", "display_order"),
+    )
+    
     @property
     def margin(self):
         """Calculate profit margin"""
@@ -224,6 +290,10 @@ class Order(Base):
     customer_name = Column(String(255), nullable=False)
     customer_phone = Column(String(50), nullable=True)
     
+    # Normalized lookup keys (kept in sync by the validators below)
+    customer_email_lower = Column(String(255), nullable=True)
+    customer_phone_normalized = Column(String(20), nullable=True)
+    
     # Shipping Address
     shipping_address_line1 = Column(String(255), nullable=False)
     shipping_address_line2 = Column(String(255), nullable=True)
@@ -262,6 +332,35 @@ class Order(Base):
     # Relationships
     reseller = relationship("Reseller", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
+    
+    __table_args__ = (
+        Index("ix_orders_email_lower_created", "customer_email_lower", "created_at"),
+        Index("ix_orders_phone_norm_created", "customer_phone_normalized", "created_at"),
+        Index("ix_orders_reseller_email_lower", "reseller_id", "customer_email_lower"),
+        Index("ix_orders_reseller_phone_norm", "reseller_id", "customer_phone_normalized"),
+        Index("ix_orders_reseller_created", "reseller_id", "created_at"),
+        Index("ix_orders_reseller_status", "reseller_id", "status", "created_at"),
+        # Admin order list, newest first across every store
+        Index("ix_orders_created", "created_at"),
+        # Fulfilment queue: only pending orders are in it
+        Index(
+            "ix_orders_pending", "created_at",
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
+    
+    @validates("customer_email")
+    def _sync_email_lower(self, key, value):
+        from services.order_search import normalize_email
+        self.customer_email_lower = normalize_email(value)
+        return value
+    
+    @validates("customer_phone")
+    def _sync_phone_normalized(self, key, value):
+        from services.order_search import normalize_phone
+        self.customer_phone_normalized = normalize_phone(value)
+        return value
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -289,6 +388,10 @@ class OrderItem(Base):
     # Relationships
     order = relationship("Order", back_populates="items")
     product = relationship("Product")
+    
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
 
 # ============== PAYOUT MODELS ==============
 
@@ -297,6 +400,7 @@ class Payout(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     reseller_id = Column(Integer, ForeignKey("resellers.id"))
+    batch_id = Column(Integer, ForeignKey("payout_batches.id"), nullable=True, index=True)
     
     # Payout Details
     amount = Column(Float, nullable=False)
@@ -319,6 +423,159 @@ class Payout(Base):
     
     # Relationships
     reseller = relationship("Reseller", back_populates="payouts")
+    batch = relationship("PayoutBatch", back_populates="payouts")
+    
+    __table_args__ = (
+        Index("ix_payouts_reseller_status", "reseller_id", "status", "requested_at"),
+        # Admin review queue and batch runs only read pending payouts
+        Index(
+            "ix_payouts_pending", "requested_at",
+            sqlite_where=text("status = 'pending'"),
+            postgresql_where=text("status = 'pending'")
+        ),
+    )
+
+class PayoutBatch(Base):
+    """A bulk payout run and its bank transfer file"""
+    __tablename__ = "payout_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(50), default="processing")  # processing, reconciled
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    
+    # Totals
+    payout_count = Column(Integer, default=0)
+    total_amount = Column(Float, default=0)
+    skipped_count = Column(Integer, default=0)  # Pending payouts without bank details
+    completed_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    
+    # Bank file
+    file_path = Column(String(500), nullable=True)
+    
+    # Throughput
+    build_seconds = Column(Float, nullable=True)
+    reconcile_seconds = Column(Float, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relationships
+    payouts = relationship("Payout", back_populates="batch")
+
+# ============== COMMISSION LEDGER ==============
+
+class LedgerEntryType(str, enum.Enum):
+    CREDIT = "credit"
+    DEBIT = "debit"
+
+class CommissionLedgerEntry(Base):
+    """Append-only record of every change to a reseller's available balance"""
+    __tablename__ = "commission_ledger"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    reseller_id = Column(Integer, ForeignKey("resellers.id"), nullable=False)
+    
+    entry_type = Column(String(20), nullable=False)  # credit, debit
+    reason = Column(String(50), nullable=False)  # order_delivered, order_reversed, payout_requested, payout_reversed, opening_balance
+    amount = Column(Float, nullable=False)  # Always positive; direction comes from entry_type
+    balance_after = Column(Float, nullable=False)
+    
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)
+    payout_id = Column(Integer, ForeignKey("payouts.id"), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_commission_ledger_reseller_id", "reseller_id", "id"),
+    )
+
+class ResellerBalance(Base):
+    """Materialized running balance, updated under a row lock with each ledger entry"""
+    __tablename__ = "reseller_balances"
+    
+    reseller_id = Column(Integer, ForeignKey("resellers.id"), primary_key=True)
+    
+    available = Column(Float, default=0, nullable=False)  # Earned, not yet requested
+    pending = Column(Float, default=0, nullable=False)  # Requested payouts not completed
+    total_earned = Column(Float, default=0, nullable=False)  # Commission on delivered orders
+    total_paid = Column(Float, default=0, nullable=False)  # Completed payouts
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# ============== SALES ROLLUPS ==============
+
+class ResellerDailyStats(Base):
+    """Per reseller, per local day, per order status sales totals"""
+    __tablename__ = "reseller_daily_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    reseller_id = Column(Integer, ForeignKey("resellers.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    status = Column(String(50), nullable=False)
+    
+    orders = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0, nullable=False)
+    commission = Column(Float, default=0, nullable=False)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("reseller_id", "day", "status", name="uq_reseller_daily_stats"),
+    )
+
+class ProductSalesStats(Base):
+    """Lifetime sales of one product through one reseller, excluding cancelled orders"""
+    __tablename__ = "product_sales_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    reseller_id = Column(Integer, ForeignKey("resellers.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    manufacturer_id = Column(Integer, ForeignKey("manufacturers.id"), nullable=False)
+
+    units_sold = Column(Integer, default=0, nullable=False)
+    orders = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0, nullable=False)
+    commission = Column(Float, default=0, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("reseller_id", "product_id", name="uq_product_sales_stats"),
+        Index("ix_product_sales_stats_reseller_units", "reseller_id", "units_sold"),
+        Index("ix_product_sales_stats_manufacturer", "manufacturer_id", "product_id"),
+    )
+
+# ============== STOREFRONT ANALYTICS ==============
+
+class StorefrontEvent(Base):
+    """Raw storefront analytics events, append-only until compacted"""
+    __tablename__ = "storefront_events"
+    
+    id = Column(Integer, primary_key=True)
+    store_slug = Column(String(255), nullable=False)
+    event_type = Column(String(20), nullable=False)  # page_view, product_view, add_to_cart
+    product_id = Column(Integer, nullable=True)
+    session_id = Column(String(64), nullable=True)
+    day = Column(Date, nullable=False)  # Business-local day, for compaction
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+class ProductDailyStats(Base):
+    """Compacted per-store, per-product daily analytics counters"""
+    __tablename__ = "product_daily_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    reseller_id = Column(Integer, ForeignKey("resellers.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)  # Null for store-level page views
+    day = Column(Date, nullable=False)
+    
+    page_views = Column(Integer, default=0, nullable=False)
+    product_views = Column(Integer, default=0, nullable=False)
+    add_to_carts = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_product_daily_stats_key", "reseller_id", "day", "product_id"),
+    )
 
 # ============== STOREFRONT CONFIG ==============
 
@@ -345,6 +602,7 @@ class StorefrontConfig(Base):
     hero_title = Column(String(255), nullable=True)
     hero_subtitle = Column(Text, nullable=True)
     hero_image = Column(String(500), nullable=True)
+    image_variants = Column(JSON, default=dict)  # {image url: resized variants} (services.images)
     hero_cta_text = Column(String(100), default="Shop Now")
     
     # Footer
@@ -381,3 +639,28 @@ class SupportTicket(Base):
     
     # Relationships
     user = relationship("User")
+    
+    __table_args__ = (
+        Index("ix_support_tickets_user_created", "user_id", "created_at"),
+        Index("ix_support_tickets_status_created", "status", "created_at"),
+    )
+
+# ============== REPLICATION ==============
+
+class ReplicaHeartbeat(Base):
+    """Single row the primary stamps periodically; replicas' copy shows their lag"""
+    __tablename__ = "replica_heartbeats"
+    
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime(timezone=True), nullable=False)
+
+# ============== STARTUP ==============
+
+class SchemaStamp(Base):
+    """Single row recording the schema version and seed state the database was prepared for"""
+    __tablename__ = "schema_stamps"
+    
+    id = Column(Integer, primary_key=True)
+    schema_version = Column(String(64), nullable=False)
+    seeded = Column(Boolean, default=False, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
@@ -50,6 +50,11 @@ class UserResponse(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: Optional[int] = None
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     user_id: Optional[int] = None
@@ -71,6 +76,15 @@ class ResellerUpdate(BaseModel):
     secondary_color: Optional[str] = Field(None, pattern=r'^#[0-9A-Fa-f]{6}$')
     accent_color: Optional[str] = Field(None, pattern=r'^#[0-9A-Fa-f]{6}$')
 
+class ResellerPayoutDetails(BaseModel):
+    bank_account_name: Optional[str] = Field(None, max_length=255)
+    bank_account_number: Optional[str] = Field(None, pattern=r'^[0-9]{6,20}$')
+    bank_ifsc: Optional[str] = Field(None, pattern=r'^[A-Z]{4}0[A-Z0-9]{6}$')
+    upi_id: Optional[str] = Field(None, pattern=r'^[\w.\-]+@[\w]+$')
+    
+    class Config:
+        from_attributes = True
+
 class ResellerBranding(BaseModel):
     logo_url: Optional[str] = None
     hero_image: Optional[str] = None
@@ -200,6 +214,19 @@ class ProductResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class LowStockAlertResponse(BaseModel):
+    id: int
+    product_id: int
+    kind: str
+    stock_quantity: int
+    threshold: int
+    is_acknowledged: bool
+    resolved_at: Optional[datetime]
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
 # ============== RESELLER PRODUCT SCHEMAS ==============
 
 class ResellerProductCreate(BaseModel):
@@ -309,6 +336,24 @@ class OrderResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class OrderTrackingItem(BaseModel):
+    product_name: str
+    product_image: Optional[str]
+    quantity: int
+    total_price: float
+
+class OrderTrackingResponse(BaseModel):
+    order_number: str
+    status: str
+    payment_status: str
+    total_amount: float
+    tracking_number: Optional[str]
+    tracking_url: Optional[str]
+    created_at: datetime
+    shipped_at: Optional[datetime]
+    delivered_at: Optional[datetime]
+    items: List[OrderTrackingItem]
+
 # ============== PAYOUT SCHEMAS ==============
 
 class PayoutRequest(BaseModel):
@@ -331,6 +376,22 @@ class PayoutResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PayoutBatchResponse(BaseModel):
+    id: int
+    status: str
+    payout_count: int
+    total_amount: float
+    skipped_count: int
+    completed_count: int
+    failed_count: int
+    build_seconds: Optional[float]
+    reconcile_seconds: Optional[float]
+    created_at: datetime
+    reconciled_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
 # ============== STOREFRONT CONFIG SCHEMAS ==============
 
 class StorefrontConfigUpdate(BaseModel):
@@ -388,6 +449,56 @@ class RevenueByPeriod(BaseModel):
     orders: int
     commission: float
 
+class RevenueTimeSeriesPoint(BaseModel):
+    period: str
+    orders: int
+    revenue: float
+    commission: float
+    previous_period: str
+    previous_orders: int
+    previous_revenue: float
+    previous_commission: float
+
+class RevenueTotals(BaseModel):
+    orders: int
+    revenue: float
+    commission: float
+
+class RevenueTimeSeries(BaseModel):
+    granularity: str
+    start: str
+    end: str
+    utc_offset_minutes: int
+    points: List[RevenueTimeSeriesPoint]
+    totals: RevenueTotals
+    previous_totals: RevenueTotals
+    change_percent: Dict[str, Optional[float]]
+
+class TopProduct(BaseModel):
+    product_id: int
+    name: str
+    units_sold: int
+    orders: int
+    revenue: float
+    commission: float
+
+class TopReseller(BaseModel):
+    reseller_id: int
+    business_name: str
+    units_sold: int
+    orders: int
+    revenue: float
+
+# ============== STOREFRONT ANALYTICS SCHEMAS ==============
+
+class StorefrontEventCreate(BaseModel):
+    type: str = Field(..., pattern=r'^(page_view|product_view|add_to_cart)$')
+    product_id: Optional[int] = None
+    session_id: Optional[str] = Field(None, max_length=64)
+
+class StorefrontEventBatch(BaseModel):
+    events: List[StorefrontEventCreate] = Field(..., min_length=1, max_length=50)
+
 # ============== SUPPORT TICKET SCHEMAS ==============
 
 class SupportTicketCreate(BaseModel):
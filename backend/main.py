@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
+import asyncio
 import os
 
 # Monkeypatch for passlib compatibility with bcrypt 4.x
@@ -13,7 +14,11 @@ try:
 except ImportError:
     pass
 
-from database.database import init_db
+from services.replicas import ReadYourWritesMiddleware, read_router
+from services.query_stats import QueryStatsMiddleware
+from services.metrics import MetricsMiddleware, metrics_response, run_snapshot_writer, METRICS_DIR
+from services.profiling import ProfilingMiddleware
+from services.uploads import UploadSizeLimitMiddleware, UPLOADS_DIR, UPLOAD_GC_INTERVAL_SECONDS
 
 # Import routers
 from routers import auth, resellers, products, orders, payouts, storefronts, manufacturers, admin
@@ -27,6 +32,9 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# Admin-requested request profiles; innermost, so only the app itself runs on the profiled loop
+app.add_middleware(ProfilingMiddleware)
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
@@ -43,13 +51,25 @@ app.add_middleware(
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# Send a client's reads to the primary right after it writes (no-op without replicas)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Count each request's SQL statements (Server-Timing header, N+1 and slow query logs)
+app.add_middleware(QueryStatsMiddleware)
+
+# Per-route request counts and latency for /api/metrics
+app.add_middleware(MetricsMiddleware)
+
+# Turn away oversized uploads before the multipart body is read
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Create uploads directories
-os.makedirs("uploads/logos", exist_ok=True)
-os.makedirs("uploads/banners", exist_ok=True)
-os.makedirs("uploads/products", exist_ok=True)
+os.makedirs(os.path.join(UPLOADS_DIR, "logos"), exist_ok=True)
+os.makedirs(os.path.join(UPLOADS_DIR, "banners"), exist_ok=True)
+os.makedirs(os.path.join(UPLOADS_DIR, "products"), exist_ok=True)
 
 # Mount static files
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
 
 # Include routers
 app.include_router(auth.router, prefix="/api")
@@ -74,6 +94,11 @@ async def global_exception_handler(request: Request, exc: Exception):
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+# Prometheus scrape endpoint
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    return await metrics_response(request)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -83,26 +108,58 @@ async def root():
         "docs": "/api/docs"
     }
 
+# Background tasks started with the app
+background_tasks = []
+
 # Startup event
 @app.on_event("startup")
 async def startup():
-    # Initialize database
-    init_db()
-    print("[OK] Database initialized")
-
-    # Auto-seed database if empty
-    try:
-        from seed_data import seed_database
-        seed_database()
-        print("[OK] Auto-seeding check complete")
-    except Exception as e:
-        print(f"[ERROR] Auto-seeding failed: {e}")
+    # Create tables and seed only when the schema stamp is out of date
+    from services.startup import prepare_database
+    print(f"[OK] Database {prepare_database()}")
+
+    # Keep the admin dashboard snapshot warm
+    from services.admin_snapshot import run_refresher
+    background_tasks.append(asyncio.create_task(run_refresher()))
+
+    # Post queued low-stock alerts to the webhook (they stay queued without one)
+    from services.inventory import ALERT_WEBHOOK_URL, run_notifier
+    if ALERT_WEBHOOK_URL:
+        background_tasks.append(asyncio.create_task(run_notifier()))
+
+    # Flush buffered storefront analytics events
+    from services.analytics import run_flusher
+    background_tasks.append(asyncio.create_task(run_flusher()))
+
+    # Keep the in-memory access token revocation set in sync
+    from services.tokens import run_revocation_sync
+    background_tasks.append(asyncio.create_task(run_revocation_sync()))
+
+    # Share this worker's metrics with the other workers
+    if METRICS_DIR:
+        background_tasks.append(asyncio.create_task(run_snapshot_writer()))
+
+    # Delete uploaded files no row references any more
+    if UPLOAD_GC_INTERVAL_SECONDS:
+        from services.uploads import run_collector
+        background_tasks.append(asyncio.create_task(run_collector()))
+
+    # Measure replica lag so reads fall back to the primary when replicas trail
+    if read_router.replicas:
+        from services.replicas import run_replica_monitor
+        background_tasks.append(asyncio.create_task(run_replica_monitor()))
 
     print("Jewelry Reseller Platform API is running!")
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    from services.images import shutdown_pool
+    shutdown_pool()
     print("Shutting down...")
 
 if __name__ == "__main__":
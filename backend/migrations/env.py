@@ -0,0 +1,54 @@
+"""
+Alembic environment.
+
+Migrations run against the application's own engine, so DATABASE_URL, the
+pool settings and the SQLite pragmas from database.database apply here too.
+SQLite cannot ALTER most things in place, so migrations are rendered in
+batch mode, which rebuilds the table when it has to.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from database.database import engine, Base
+import database.models  # noqa: F401  (registers every table on Base.metadata)
+
+config = context.config
+
+# The app calls migrations at startup with its own logging already set up
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL instead of running it (alembic upgrade --sql)"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=True,
+            compare_type=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,59 @@
+"""composite and partial indexes
+
+Indexes matching the filters and sort orders of the hottest router queries
+(checked by benchmarks/explain_plans.py). On Postgres they are built
+CONCURRENTLY so live tables are not locked against writes while they build.
+
+Revision ID: 0002
+Revises: 0001j
+Create Date: 2026-10-19 06:10:03.317489
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001j'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PENDING = sa.text("status = 'pending'")
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_order_items_order_id', 'order_items', ['order_id'], None),
+    ('ix_orders_reseller_created', 'orders', ['reseller_id', 'created_at'], None),
+    ('ix_orders_reseller_status', 'orders', ['reseller_id', 'status', 'created_at'], None),
+    ('ix_orders_created', 'orders', ['created_at'], None),
+    ('ix_orders_pending', 'orders', ['created_at'], PENDING),
+    ('ix_payouts_reseller_status', 'payouts', ['reseller_id', 'status', 'requested_at'], None),
+    ('ix_payouts_pending', 'payouts', ['requested_at'], PENDING),
+    ('ix_products_active_category', 'products', ['is_active', 'category'], None),
+    ('ix_products_manufacturer_active', 'products', ['manufacturer_id', 'is_active'], None),
+    ('ix_reseller_products_listing', 'reseller_products', ['reseller_id', 'is_active', 'is_featured', 'display_order'], None),
+    ('ix_support_tickets_user_created', 'support_tickets', ['user_id', 'created_at'], None),
+    ('ix_support_tickets_status_created', 'support_tickets', ['status', 'created_at'], None),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                sqlite_where=where,
+                postgresql_where=where,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""image variants
+
+Resized WebP/AVIF variants of uploaded logos, banners and product images,
+stored per row and keyed by image URL (services.images).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 07:02:41.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['resellers', 'products', 'storefront_configs']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('image_variants')
@@ -1,100 +1,92 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi.responses import FileResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, update
 from typing import Optional, List
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import os
 
-from database.database import get_db
+from database.database import get_db, pool_stats
 from database.models import (
-    User, Reseller, Manufacturer, Product, Order, Payout, SupportTicket
+    User, Reseller, Order, Payout, PayoutBatch, SupportTicket
+)
+from database.schemas import (
+    SupportTicketCreate, SupportTicketResponse, OrderResponse, PayoutBatchResponse
 )
-from database.schemas import SupportTicketCreate, SupportTicketResponse
 from routers.auth import get_current_active_user, require_admin
+from services.principals import Principal
+from services.replicas import get_read_db
+from services.order_search import search_orders
+from services import admin_snapshot, ledger, payout_batches, passwords, principals, profiling, query_stats, ratelimit, replicas, tokens
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 # ============== DASHBOARD ==============
 
 @router.get("/dashboard")
-async def get_admin_dashboard(
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+def get_admin_dashboard(
+    fresh: bool = False,
+    current_user: Principal = Depends(require_admin),
+    db: Session = Depends(get_read_db)
 ):
-    """Get admin dashboard statistics"""
-    
-    # Users
-    total_resellers = db.query(Reseller).count()
-    active_resellers = db.query(Reseller).filter(Reseller.is_published == True).count()
-    
-    total_manufacturers = db.query(Manufacturer).count()
-    
-    # Products
-    total_products = db.query(Product).filter(Product.is_active == True).count()
-    
-    # Orders
-    total_orders = db.query(Order).count()
-    pending_orders = db.query(Order).filter(Order.status == "pending").count()
-    
-    # Revenue
-    total_revenue = db.query(func.sum(Order.total_amount)).scalar() or 0
-    total_commission = db.query(func.sum(Order.reseller_commission)).scalar() or 0
-    
-    # Payouts
-    pending_payouts = db.query(func.sum(Payout.amount)).filter(
-        Payout.status == "pending"
-    ).scalar() or 0
-    
-    # This month
-    first_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    orders_this_month = db.query(Order).filter(
-        Order.created_at >= first_of_month
-    ).count()
-    
-    revenue_this_month = db.query(func.sum(Order.total_amount)).filter(
-        Order.created_at >= first_of_month
-    ).scalar() or 0
-    
-    new_resellers_this_month = db.query(Reseller).filter(
-        Reseller.created_at >= first_of_month
-    ).count()
+    """Get admin dashboard statistics (served from a periodically refreshed snapshot)"""
+    snapshot = admin_snapshot.get_snapshot(db, fresh=fresh)
+    generated_at = snapshot["generated_at"]
     
     return {
-        "resellers": {
-            "total": total_resellers,
-            "active": active_resellers,
-            "new_this_month": new_resellers_this_month
-        },
-        "manufacturers": {
-            "total": total_manufacturers
-        },
-        "products": {
-            "total": total_products
-        },
-        "orders": {
-            "total": total_orders,
-            "pending": pending_orders,
-            "this_month": orders_this_month
-        },
-        "revenue": {
-            "total": float(total_revenue),
-            "this_month": float(revenue_this_month),
-            "total_commission": float(total_commission)
-        },
-        "payouts": {
-            "pending": float(pending_payouts)
-        }
+        **snapshot["metrics"],
+        "generated_at": generated_at.isoformat(),
+        "stale_seconds": round((datetime.now(timezone.utc) - generated_at).total_seconds(), 1)
     }
 
+@router.get("/system/stats")
+async def get_system_stats(current_user: Principal = Depends(require_admin)):
+    """Get in-process pool, limiter and slow query statistics"""
+    return {
+        "database": pool_stats(),
+        "replicas": replicas.read_router.stats(),
+        "password_hashing": passwords.hash_pool.stats(),
+        "rate_limits": ratelimit.limiter.stats(),
+        "slow_queries": query_stats.slow_log.stats()
+    }
+
+# ============== PROFILING ==============
+
+@router.post("/profiling/token")
+async def create_profiling_token(current_user: Principal = Depends(require_admin)):
+    """Short-lived token that runs a request under the profiler when sent with it"""
+    token, expires_at = profiling.issue_token(current_user.id)
+    return {
+        "token": token,
+        "expires_at": expires_at.isoformat(),
+        "header": "X-Profile",
+        "query_param": profiling.PROFILE_PARAM
+    }
+
+@router.get("/profiles")
+def get_profiles(current_user: Principal = Depends(require_admin)):
+    """Saved request profiles, newest first"""
+    return profiling.list_profiles()
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, current_user: Principal = Depends(require_admin)):
+    """A saved profile with its top functions, SQL statements and collapsed stacks"""
+    return profiling.load_profile(profile_id)
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+def get_profile_folded(profile_id: str, current_user: Principal = Depends(require_admin)):
+    """Collapsed stacks for flamegraph.pl or speedscope"""
+    return profiling.load_profile(profile_id)["folded"]
+
 # ============== RESELLER MANAGEMENT ==============
 
 @router.get("/resellers")
-async def get_all_resellers(
+def get_all_resellers(
     is_published: Optional[bool] = None,
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all resellers"""
@@ -118,9 +110,9 @@ async def get_all_resellers(
     }
 
 @router.get("/resellers/{reseller_id}")
-async def get_reseller(
+def get_reseller(
     reseller_id: int,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get reseller details"""
@@ -152,10 +144,10 @@ async def get_reseller(
     }
 
 @router.patch("/resellers/{reseller_id}/status")
-async def update_reseller_status(
+def update_reseller_status(
     reseller_id: int,
     is_active: bool,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Enable/disable reseller"""
@@ -166,23 +158,26 @@ async def update_reseller_status(
     user = db.query(User).filter(User.id == reseller.user_id).first()
     if user:
         user.is_active = is_active
+        if not is_active:
+            tokens.revoke_user(db, user.id, "disabled")
     
     if not is_active:
         reseller.is_published = False
     
     db.commit()
+    principals.invalidate(reseller.user_id)
     
     return {"message": f"Reseller {'enabled' if is_active else 'disabled'}"}
 
 # ============== ORDER MANAGEMENT ==============
 
 @router.get("/orders")
-async def get_all_orders(
+def get_all_orders(
     status_filter: Optional[str] = None,
     reseller_id: Optional[int] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all orders"""
@@ -205,14 +200,45 @@ async def get_all_orders(
         "per_page": per_page
     }
 
+@router.get("/orders/search")
+def search_all_orders(
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    order_number: Optional[str] = None,
+    reseller_id: Optional[int] = None,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Search orders by customer email, phone or order number"""
+    if not (email or phone or order_number):
+        raise HTTPException(status_code=400, detail="Provide email, phone or order_number")
+    
+    orders = search_orders(
+        db,
+        email=email,
+        phone=phone,
+        order_number=order_number,
+        reseller_id=reseller_id,
+        offset=(page - 1) * per_page,
+        limit=per_page
+    )
+    
+    return {
+        "items": [OrderResponse.model_validate(o) for o in orders],
+        "page": page,
+        "per_page": per_page
+    }
+
 # ============== PAYOUT MANAGEMENT ==============
 
 @router.get("/payouts")
-async def get_all_payouts(
+def get_all_payouts(
     status_filter: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all payout requests"""
@@ -233,57 +259,141 @@ async def get_all_payouts(
         "per_page": per_page
     }
 
+# action -> (statuses it applies to, new status, message)
+PAYOUT_TRANSITIONS = {
+    "approve": (("pending",), "processing", "Payout approved and processing"),
+    "complete": (("processing",), "completed", "Payout completed"),
+    "reject": (("pending", "processing"), "failed", "Payout rejected"),
+}
+
 @router.patch("/payouts/{payout_id}/process")
-async def process_payout(
+def process_payout(
     payout_id: int,
     action: str,  # approve, reject
     payment_reference: Optional[str] = None,
     notes: Optional[str] = None,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Process a payout request"""
+    if action not in PAYOUT_TRANSITIONS:
+        raise HTTPException(status_code=400, detail="Invalid action")
+    from_statuses, new_status, message = PAYOUT_TRANSITIONS[action]
+    
     payout = db.query(Payout).filter(Payout.id == payout_id).first()
     if not payout:
         raise HTTPException(status_code=404, detail="Payout not found")
     
-    if payout.status != "pending":
+    if payout.status not in ("pending", "processing"):
         raise HTTPException(status_code=400, detail="Payout already processed")
+    if payout.status not in from_statuses:
+        detail = "Payout already approved" if action == "approve" else "Payout must be approved before it is completed"
+        raise HTTPException(status_code=400, detail=detail)
     
+    values = {"status": new_status}
     if action == "approve":
-        payout.status = "processing"
-        payout.processed_at = datetime.utcnow()
-        if payment_reference:
-            payout.payment_reference = payment_reference
-        message = "Payout approved and processing"
+        values["processed_at"] = datetime.utcnow()
     elif action == "complete":
-        payout.status = "completed"
-        payout.completed_at = datetime.utcnow()
-        if payment_reference:
-            payout.payment_reference = payment_reference
-        message = "Payout completed"
-    elif action == "reject":
-        payout.status = "failed"
-        message = "Payout rejected"
-    else:
-        raise HTTPException(status_code=400, detail="Invalid action")
-    
+        values["completed_at"] = datetime.utcnow()
+    if payment_reference and action != "reject":
+        values["payment_reference"] = payment_reference
     if notes:
-        payout.notes = notes
+        values["notes"] = notes
+    
+    # Conditional on the status just checked: of two concurrent calls only one
+    # moves the payout, so its funds are released or paid out exactly once
+    result = db.execute(
+        update(Payout)
+        .where(Payout.id == payout_id, Payout.status.in_(from_statuses))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Payout was processed concurrently, please retry")
+    
+    if action == "complete":
+        ledger.complete_payout(db, payout)
+    elif action == "reject":
+        ledger.release_payout(db, payout)
     
     db.commit()
     
-    return {"message": message, "status": payout.status}
+    return {"message": message, "status": new_status}
+
+# ============== BATCH PAYOUTS ==============
+
+def _batch_summary(batch: PayoutBatch) -> dict:
+    return {
+        **PayoutBatchResponse.model_validate(batch).model_dump(),
+        "build_payouts_per_second": payout_batches.throughput(batch.payout_count, batch.build_seconds),
+        "reconcile_payouts_per_second": payout_batches.throughput(
+            batch.completed_count + batch.failed_count, batch.reconcile_seconds
+        )
+    }
+
+@router.post("/payouts/batches")
+def create_payout_batch(
+    limit: Optional[int] = Query(None, ge=1),
+    current_user: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Move all eligible pending payouts to processing and generate the bank file"""
+    batch = payout_batches.create_batch(db, created_by=current_user.id, limit=limit)
+    if not batch:
+        raise HTTPException(status_code=400, detail="No eligible pending payouts")
+    return _batch_summary(batch)
+
+@router.get("/payouts/batches")
+def get_payout_batches(
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Get batch payout runs"""
+    offset = (page - 1) * per_page
+    batches = db.query(PayoutBatch).order_by(PayoutBatch.id.desc()).offset(offset).limit(per_page).all()
+    return [_batch_summary(b) for b in batches]
+
+@router.get("/payouts/batches/{batch_id}/file")
+def download_payout_batch_file(
+    batch_id: int,
+    current_user: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Download the bank bulk-transfer CSV for a batch"""
+    batch = db.query(PayoutBatch).filter(PayoutBatch.id == batch_id).first()
+    if not batch or not batch.file_path or not os.path.exists(batch.file_path):
+        raise HTTPException(status_code=404, detail="Batch file not found")
+    
+    return FileResponse(batch.file_path, media_type="text/csv", filename=os.path.basename(batch.file_path))
+
+@router.post("/payouts/batches/{batch_id}/reconcile")
+def reconcile_payout_batch(
+    batch_id: int,
+    file: UploadFile = File(...),
+    current_user: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Apply the bank's returned status file (reference, status, utr) to a batch"""
+    batch = db.query(PayoutBatch).filter(PayoutBatch.id == batch_id).first()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    result = payout_batches.reconcile_batch(db, batch, file.file)
+    
+    return {**result, "batch": _batch_summary(batch)}
 
 # ============== SUPPORT TICKETS ==============
 
 @router.get("/tickets")
-async def get_all_tickets(
+def get_all_tickets(
     status_filter: Optional[str] = None,
     priority_filter: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Get all support tickets"""
@@ -307,11 +417,11 @@ async def get_all_tickets(
     }
 
 @router.patch("/tickets/{ticket_id}/respond")
-async def respond_to_ticket(
+def respond_to_ticket(
     ticket_id: int,
     response: str,
     new_status: str = "resolved",
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Respond to a support ticket"""
@@ -331,9 +441,9 @@ async def respond_to_ticket(
 # ============== USER SUPPORT TICKET CREATION ==============
 
 @router.post("/tickets", response_model=SupportTicketResponse)
-async def create_ticket(
+def create_ticket(
     data: SupportTicketCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a support ticket"""
@@ -350,8 +460,8 @@ async def create_ticket(
     return ticket
 
 @router.get("/my-tickets", response_model=List[SupportTicketResponse])
-async def get_my_tickets(
-    current_user: User = Depends(get_current_active_user),
+def get_my_tickets(
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get user's support tickets"""
@@ -3,24 +3,21 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-# Monkeypatch for passlib compatibility with bcrypt 4.x
-try:
-    import bcrypt
-    if not hasattr(bcrypt, "__about__"):
-        bcrypt.__about__ = bcrypt
-except ImportError:
-    pass
-from passlib.context import CryptContext
 from typing import Optional
+import asyncio
 import secrets
+import time
 import os
 
 from database.database import get_db
 from database.models import User, Reseller, Manufacturer, StorefrontConfig
 from database.schemas import (
-    UserCreate, UserLogin, UserResponse, Token, TokenData,
+    UserCreate, UserLogin, UserResponse, Token, TokenData, RefreshRequest,
     ResellerCreate, ManufacturerCreate, ResellerRegistration
 )
+from services import passwords, principals, tokens
+from services.ratelimit import limiter, per_ip
+from services.principals import Principal
 from slugify import slugify
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -28,18 +25,18 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 # Security Config
 SECRET_KEY = os.getenv("SECRET_KEY", "your-super-secret-key-change-in-production")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
+ACCESS_TOKEN_EXPIRE_MINUTES = tokens.ACCESS_TOKEN_EXPIRE_MINUTES  # Short-lived; clients renew via /auth/refresh
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 # ============== UTILITY FUNCTIONS ==============
 
+# Blocking versions for scripts; request handlers use services.passwords
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return passwords.pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return passwords.pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -47,19 +44,30 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # Sub-second iat so a token issued right after a revocation stays valid
+    to_encode.update({"exp": expire, "iat": round(time.time(), 3)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def generate_verification_token() -> str:
     return secrets.token_urlsafe(32)
 
+def issue_tokens(db: Session, user: User) -> Token:
+    """Access token plus a new refresh token session"""
+    refresh_token = tokens.issue_refresh_token(db, user.id)
+    db.commit()
+    return Token(
+        access_token=create_access_token(data={"sub": str(user.id), "role": user.role}),
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_token=refresh_token
+    )
+
 # ============== DEPENDENCIES ==============
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -67,45 +75,95 @@ async def get_current_user(
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: int = payload.get("sub")
+        user_id = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    # In-memory check; synced from token_revocations in the background
+    if tokens.revocations.is_revoked(user_id, payload.get("iat")):
         raise credentials_exception
-    return user
+    
+    # Cached; see services.principals for invalidation. A miss queries the
+    # database, which must not block the event loop
+    principal = principals.principal_cache.get(user_id)
+    if principal is None:
+        principal = await asyncio.to_thread(principals.get_principal, db, user_id)
+    if principal is None:
+        raise credentials_exception
+    
+    # Tokens issued before a role change are no longer valid
+    role = payload.get("role")
+    if role is not None and role != principal.role:
+        raise credentials_exception
+    return principal
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-async def get_current_verified_user(current_user: User = Depends(get_current_active_user)) -> User:
+async def get_current_verified_user(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     if not current_user.is_verified:
         raise HTTPException(status_code=400, detail="Email not verified")
     return current_user
 
-async def require_reseller(current_user: User = Depends(get_current_verified_user)) -> User:
+async def require_reseller(current_user: Principal = Depends(get_current_verified_user)) -> Principal:
     if current_user.role != "reseller":
         raise HTTPException(status_code=403, detail="Reseller access required")
     return current_user
 
-async def require_manufacturer(current_user: User = Depends(get_current_verified_user)) -> User:
+async def require_manufacturer(current_user: Principal = Depends(get_current_verified_user)) -> Principal:
     if current_user.role != "manufacturer":
         raise HTTPException(status_code=403, detail="Manufacturer access required")
     return current_user
 
-async def require_admin(current_user: User = Depends(get_current_verified_user)) -> User:
+async def require_admin(current_user: Principal = Depends(get_current_verified_user)) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
 
+# ============== PROFILE HELPERS ==============
+
+def get_reseller_id(user: Principal) -> int:
+    if user.reseller_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reseller profile not found"
+        )
+    return user.reseller_id
+
+def get_reseller_for_user(user: Principal, db: Session) -> Reseller:
+    """Get reseller profile for current user (only when more than the id is needed)"""
+    reseller = db.get(Reseller, get_reseller_id(user))
+    if not reseller:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reseller profile not found"
+        )
+    return reseller
+
+def get_manufacturer_id(user: Principal) -> int:
+    if user.manufacturer_id is None:
+        raise HTTPException(status_code=404, detail="Manufacturer profile not found")
+    return user.manufacturer_id
+
+def get_manufacturer_for_user(user: Principal, db: Session) -> Manufacturer:
+    manufacturer = db.get(Manufacturer, get_manufacturer_id(user))
+    if not manufacturer:
+        raise HTTPException(status_code=404, detail="Manufacturer profile not found")
+    return manufacturer
+
 # ============== AUTH ROUTES ==============
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(per_ip("register_ip"))]
+)
 async def register(
     user_data: UserCreate,
     background_tasks: BackgroundTasks,
@@ -120,11 +178,15 @@ async def register(
             detail="Email already registered"
         )
     
+    # Don't hold a pooled connection while waiting for bcrypt
+    db.close()
+    hashed_password = await passwords.hash_password(user_data.password)
+    
     # Create user
     verification_token = generate_verification_token()
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         role=user_data.role,
         verification_token=verification_token,
         is_verified=True  # Auto-verify for now (remove in production)
@@ -138,7 +200,7 @@ async def register(
     
     return user
 
-@router.post("/register/reseller", response_model=Token)
+@router.post("/register/reseller", response_model=Token, dependencies=[Depends(per_ip("register_ip"))])
 async def register_reseller(
     data: ResellerRegistration,
     db: Session = Depends(get_db)
@@ -160,10 +222,14 @@ async def register_reseller(
         slug = f"{base_slug}-{counter}"
         counter += 1
     
+    # Don't hold a pooled connection while waiting for bcrypt
+    db.close()
+    hashed_password = await passwords.hash_password(data.password)
+    
     # Create user
     user = User(
         email=data.email,
-        hashed_password=get_password_hash(data.password),
+        hashed_password=hashed_password,
         role="reseller",
         is_verified=True  # Auto-verify for now
     )
@@ -188,18 +254,20 @@ async def register_reseller(
     
     db.commit()
     
-    # Create access token
-    access_token = create_access_token(data={"sub": str(user.id)})
-    return Token(access_token=access_token)
+    return issue_tokens(db, user)
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(per_ip("login_ip"))])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Login and get access token"""
+    await limiter.hit("login_email", form_data.username.lower())
     user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Don't hold a pooled connection while waiting for bcrypt
+    db.close()
+    valid, new_hash = await passwords.verify_password(form_data.password, user.hashed_password) if user else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -212,17 +280,26 @@ async def login(
             detail="Account is disabled"
         )
     
-    access_token = create_access_token(data={"sub": str(user.id)})
-    return Token(access_token=access_token)
+    # Upgrade hashes made with an older bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+        db.add(user)
+        db.commit()
+    
+    return issue_tokens(db, user)
 
-@router.post("/login/json", response_model=Token)
+@router.post("/login/json", response_model=Token, dependencies=[Depends(per_ip("login_ip"))])
 async def login_json(
     credentials: UserLogin,
     db: Session = Depends(get_db)
 ):
     """Login with JSON body"""
+    await limiter.hit("login_email", credentials.email.lower())
     user = db.query(User).filter(User.email == credentials.email).first()
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    # Don't hold a pooled connection while waiting for bcrypt
+    db.close()
+    valid, new_hash = await passwords.verify_password(credentials.password, user.hashed_password) if user else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -234,16 +311,46 @@ async def login_json(
             detail="Account is disabled"
         )
     
-    access_token = create_access_token(data={"sub": str(user.id)})
-    return Token(access_token=access_token)
+    # Upgrade hashes made with an older bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+        db.add(user)
+        db.commit()
+    
+    return issue_tokens(db, user)
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(
+    data: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """Exchange a refresh token for a new access token (the refresh token rotates)"""
+    user, refresh_token = tokens.rotate_refresh_token(db, data.refresh_token)
+    return Token(
+        access_token=create_access_token(data={"sub": str(user.id), "role": user.role}),
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_token=refresh_token
+    )
+
+@router.post("/logout")
+def logout(
+    data: RefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """End the session a refresh token belongs to"""
+    tokens.revoke_refresh_token(db, data.refresh_token)
+    return {"message": "Logged out"}
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+def get_current_user_info(
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
     """Get current user info"""
-    return current_user
+    return db.get(User, current_user.id)
 
 @router.post("/verify-email/{token}")
-async def verify_email(token: str, db: Session = Depends(get_db)):
+def verify_email(token: str, db: Session = Depends(get_db)):
     """Verify email with token"""
     user = db.query(User).filter(User.verification_token == token).first()
     if not user:
@@ -255,11 +362,12 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
     user.is_verified = True
     user.verification_token = None
     db.commit()
+    principals.invalidate(user.id)
     
     return {"message": "Email verified successfully"}
 
 @router.post("/forgot-password")
-async def forgot_password(
+def forgot_password(
     email: str,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
@@ -290,8 +398,12 @@ async def reset_password(
             detail="Invalid reset token"
         )
     
-    user.hashed_password = get_password_hash(new_password)
+    # Don't hold a pooled connection while waiting for bcrypt
+    db.close()
+    user.hashed_password = await passwords.hash_password(new_password)
     user.reset_token = None
+    db.add(user)
+    tokens.revoke_user(db, user.id, "password_reset")
     db.commit()
     
     return {"message": "Password reset successfully"}
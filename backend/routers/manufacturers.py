@@ -1,34 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, and_
 from typing import Optional, List
-import os
-import uuid
+import asyncio
 
 from database.database import get_db
-from database.models import User, Manufacturer, Product
+from database.models import Product, LowStockAlert
 from database.schemas import (
     ManufacturerCreate, ManufacturerResponse,
-    ProductCreate, ProductUpdate, ProductResponse
+    ProductCreate, ProductUpdate, ProductResponse, LowStockAlertResponse,
+    TopProduct, TopReseller
 )
-from routers.auth import get_current_active_user, require_manufacturer, require_admin
+from routers.auth import get_current_active_user, require_manufacturer, require_admin, get_manufacturer_id, get_manufacturer_for_user
+from services.principals import Principal
+from services import inventory, leaderboards, uploads
+from services.replicas import get_read_db
 from slugify import slugify
 
 router = APIRouter(prefix="/manufacturers", tags=["Manufacturers"])
 
-# ============== HELPER FUNCTIONS ==============
-
-def get_manufacturer_for_user(user: User, db: Session) -> Manufacturer:
-    manufacturer = db.query(Manufacturer).filter(Manufacturer.user_id == user.id).first()
-    if not manufacturer:
-        raise HTTPException(status_code=404, detail="Manufacturer profile not found")
-    return manufacturer
-
 # ============== MANUFACTURER PROFILE ==============
 
 @router.get("/profile", response_model=ManufacturerResponse)
-async def get_profile(
-    current_user: User = Depends(require_manufacturer),
+def get_profile(
+    current_user: Principal = Depends(require_manufacturer),
     db: Session = Depends(get_db)
 ):
     """Get manufacturer profile"""
@@ -37,19 +32,19 @@ async def get_profile(
 # ============== PRODUCT MANAGEMENT ==============
 
 @router.get("/products", response_model=List[ProductResponse])
-async def get_products(
+def get_products(
     category: Optional[str] = None,
     is_active: Optional[bool] = None,
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(require_manufacturer),
+    current_user: Principal = Depends(require_manufacturer),
     db: Session = Depends(get_db)
 ):
     """Get manufacturer's products"""
-    manufacturer = get_manufacturer_for_user(current_user, db)
+    manufacturer_id = get_manufacturer_id(current_user)
     
-    query = db.query(Product).filter(Product.manufacturer_id == manufacturer.id)
+    query = db.query(Product).filter(Product.manufacturer_id == manufacturer_id)
     
     if category:
         query = query.filter(Product.category == category)
@@ -64,13 +59,13 @@ async def get_products(
     return products
 
 @router.post("/products", response_model=ProductResponse, status_code=201)
-async def create_product(
+def create_product(
     data: ProductCreate,
-    current_user: User = Depends(require_manufacturer),
+    current_user: Principal = Depends(require_manufacturer),
     db: Session = Depends(get_db)
 ):
     """Create a new product"""
-    manufacturer = get_manufacturer_for_user(current_user, db)
+    manufacturer_id = get_manufacturer_id(current_user)
     
     # Check SKU uniqueness
     existing = db.query(Product).filter(Product.sku == data.sku).first()
@@ -86,7 +81,7 @@ async def create_product(
         counter += 1
     
     product = Product(
-        manufacturer_id=manufacturer.id,
+        manufacturer_id=manufacturer_id,
         name=data.name,
         slug=slug,
         description=data.description,
@@ -112,43 +107,49 @@ async def create_product(
     return product
 
 @router.put("/products/{product_id}", response_model=ProductResponse)
-async def update_product(
+def update_product(
     product_id: int,
     data: ProductUpdate,
-    current_user: User = Depends(require_manufacturer),
+    current_user: Principal = Depends(require_manufacturer),
     db: Session = Depends(get_db)
 ):
     """Update a product"""
-    manufacturer = get_manufacturer_for_user(current_user, db)
+    manufacturer_id = get_manufacturer_id(current_user)
     
     product = db.query(Product).filter(
         Product.id == product_id,
-        Product.manufacturer_id == manufacturer.id
+        Product.manufacturer_id == manufacturer_id
     ).first()
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    for field, value in data.model_dump(exclude_unset=True).items():
+    updates = data.model_dump(exclude_unset=True)
+    new_stock = updates.pop("stock_quantity", None)
+    
+    for field, value in updates.items():
         setattr(product, field, value)
     
+    if new_stock is not None:
+        inventory.set_stock(db, product, new_stock)
+    
     db.commit()
     db.refresh(product)
     
     return product
 
 @router.delete("/products/{product_id}")
-async def delete_product(
+def delete_product(
     product_id: int,
-    current_user: User = Depends(require_manufacturer),
+    current_user: Principal = Depends(require_manufacturer),
     db: Session = Depends(get_db)
 ):
     """Soft delete a product"""
-    manufacturer = get_manufacturer_for_user(current_user, db)
+    manufacturer_id = get_manufacturer_id(current_user)
     
     product = db.query(Product).filter(
         Product.id == product_id,
-        Product.manufacturer_id == manufacturer.id
+        Product.manufacturer_id == manufacturer_id
     ).first()
     
     if not product:
@@ -163,16 +164,18 @@ async def delete_product(
 async def upload_product_image(
     product_id: int,
     file: UploadFile = File(...),
-    current_user: User = Depends(require_manufacturer),
+    current_user: Principal = Depends(require_manufacturer),
     db: Session = Depends(get_db)
 ):
     """Upload product image"""
-    manufacturer = get_manufacturer_for_user(current_user, db)
+    manufacturer_id = get_manufacturer_id(current_user)
     
-    product = db.query(Product).filter(
-        Product.id == product_id,
-        Product.manufacturer_id == manufacturer.id
-    ).first()
+    product = await asyncio.to_thread(
+        lambda: db.query(Product).filter(
+            Product.id == product_id,
+            Product.manufacturer_id == manufacturer_id
+        ).first()
+    )
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -182,52 +185,48 @@ async def upload_product_image(
     if file.content_type not in allowed_types:
         raise HTTPException(status_code=400, detail="Invalid file type")
     
-    # Save file
-    upload_dir = "uploads/products"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    filename = f"{product.sku}-{uuid.uuid4().hex[:8]}.{ext}"
-    filepath = os.path.join(upload_dir, filename)
-    
-    with open(filepath, "wb") as f:
-        content = await file.read()
-        f.write(content)
-    
-    image_url = f"/uploads/products/{filename}"
-    
-    # Add to product images
-    if not product.images:
-        product.images = []
-    product.images = product.images + [image_url]
-    
-    # Set as primary if first image
-    if not product.primary_image:
-        product.primary_image = image_url
-    
-    db.commit()
-    
-    return {"image_url": image_url}
+    # Save file (streamed, stored once per content hash) and its resized variants
+    stored, variants = await uploads.store_image(file, "products")
+    image_url = stored.url
+    
+    def _update():
+        if variants:
+            product.image_variants = {**(product.image_variants or {}), image_url: variants}
+        
+        # Add to product images
+        if not product.images:
+            product.images = []
+        if image_url not in product.images:
+            product.images = product.images + [image_url]
+        
+        # Set as primary if first image
+        if not product.primary_image:
+            product.primary_image = image_url
+        
+        db.commit()
+    
+    await asyncio.to_thread(_update)
+    return {"image_url": image_url, "variants": variants}
 
 @router.patch("/products/{product_id}/inventory")
-async def update_inventory(
+def update_inventory(
     product_id: int,
     quantity: int,
-    current_user: User = Depends(require_manufacturer),
+    current_user: Principal = Depends(require_manufacturer),
     db: Session = Depends(get_db)
 ):
     """Update product inventory"""
-    manufacturer = get_manufacturer_for_user(current_user, db)
+    manufacturer_id = get_manufacturer_id(current_user)
     
     product = db.query(Product).filter(
         Product.id == product_id,
-        Product.manufacturer_id == manufacturer.id
+        Product.manufacturer_id == manufacturer_id
     ).first()
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    product.stock_quantity = quantity
+    inventory.set_stock(db, product, quantity)
     db.commit()
     
     return {"message": "Inventory updated", "stock_quantity": product.stock_quantity}
@@ -235,33 +234,24 @@ async def update_inventory(
 # ============== DASHBOARD ==============
 
 @router.get("/dashboard/stats")
-async def get_dashboard_stats(
-    current_user: User = Depends(require_manufacturer),
-    db: Session = Depends(get_db)
+def get_dashboard_stats(
+    current_user: Principal = Depends(require_manufacturer),
+    db: Session = Depends(get_read_db)
 ):
     """Get manufacturer dashboard stats"""
-    manufacturer = get_manufacturer_for_user(current_user, db)
-    
-    total_products = db.query(Product).filter(
-        Product.manufacturer_id == manufacturer.id
-    ).count()
+    manufacturer_id = get_manufacturer_id(current_user)
     
-    active_products = db.query(Product).filter(
-        Product.manufacturer_id == manufacturer.id,
-        Product.is_active == True
-    ).count()
+    active = Product.is_active == True
+    stats = db.query(
+        func.count(Product.id),
+        func.coalesce(func.sum(case((active, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((and_(active, Product.stock_quantity <= Product.low_stock_threshold), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((and_(active, Product.stock_quantity == 0), 1), else_=0)), 0)
+    ).filter(
+        Product.manufacturer_id == manufacturer_id
+    ).one()
     
-    low_stock = db.query(Product).filter(
-        Product.manufacturer_id == manufacturer.id,
-        Product.is_active == True,
-        Product.stock_quantity <= Product.low_stock_threshold
-    ).count()
-    
-    out_of_stock = db.query(Product).filter(
-        Product.manufacturer_id == manufacturer.id,
-        Product.is_active == True,
-        Product.stock_quantity == 0
-    ).count()
+    total_products, active_products, low_stock, out_of_stock = (int(v) for v in stats)
     
     return {
         "total_products": total_products,
@@ -269,3 +259,60 @@ async def get_dashboard_stats(
         "low_stock": low_stock,
         "out_of_stock": out_of_stock
     }
+
+@router.get("/dashboard/top-products", response_model=List[TopProduct])
+def get_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    rank_by: str = Query("units", pattern="^(units|revenue)$"),
+    current_user: Principal = Depends(require_manufacturer),
+    db: Session = Depends(get_read_db)
+):
+    """Get best-selling products across all resellers"""
+    manufacturer_id = get_manufacturer_id(current_user)
+    return leaderboards.top_products_for_manufacturer(db, manufacturer_id, limit=limit, rank_by=rank_by)
+
+@router.get("/dashboard/top-resellers", response_model=List[TopReseller])
+def get_top_resellers(
+    limit: int = Query(10, ge=1, le=100),
+    rank_by: str = Query("units", pattern="^(units|revenue)$"),
+    current_user: Principal = Depends(require_manufacturer),
+    db: Session = Depends(get_read_db)
+):
+    """Get the resellers selling the most of this manufacturer's products"""
+    manufacturer_id = get_manufacturer_id(current_user)
+    return leaderboards.top_resellers_for_manufacturer(db, manufacturer_id, limit=limit, rank_by=rank_by)
+
+# ============== LOW-STOCK ALERTS ==============
+
+@router.get("/alerts", response_model=List[LowStockAlertResponse])
+def get_low_stock_alerts(
+    include_resolved: bool = False,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Principal = Depends(require_manufacturer),
+    db: Session = Depends(get_db)
+):
+    """Get low-stock alerts, newest first"""
+    manufacturer_id = get_manufacturer_id(current_user)
+    return inventory.get_open_alerts(db, manufacturer_id, include_resolved=include_resolved, limit=limit)
+
+@router.patch("/alerts/{alert_id}/acknowledge")
+def acknowledge_alert(
+    alert_id: int,
+    current_user: Principal = Depends(require_manufacturer),
+    db: Session = Depends(get_db)
+):
+    """Acknowledge a low-stock alert"""
+    manufacturer_id = get_manufacturer_id(current_user)
+    
+    alert = db.query(LowStockAlert).filter(
+        LowStockAlert.id == alert_id,
+        LowStockAlert.manufacturer_id == manufacturer_id
+    ).first()
+    
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    
+    alert.is_acknowledged = True
+    db.commit()
+    
+    return {"message": "Alert acknowledged"}
@@ -1,29 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy import update
 from typing import Optional, List
 from datetime import datetime
 import uuid
 
 from database.database import get_db
 from database.models import (
-    User, Reseller, Order, OrderItem, Product, ResellerProduct, Manufacturer
+    Reseller, Order, OrderItem, Product, ResellerProduct, Manufacturer
 )
 from database.schemas import (
-    OrderCreate, OrderResponse, OrderStatusUpdate, OrderItemResponse
+    OrderCreate, OrderResponse, OrderStatusUpdate, OrderItemResponse,
+    OrderTrackingResponse
 )
-from routers.auth import get_current_active_user, require_reseller
+from routers.auth import get_current_active_user, require_reseller, get_reseller_id
+from services.principals import Principal
+from services.order_search import search_orders, track_order, invalidate_tracking
+from services import rollups, ledger, inventory, leaderboards
+from services.ratelimit import per_ip, per_path_param
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 # ============== HELPER FUNCTIONS ==============
 
-def get_reseller_for_user(user: User, db: Session) -> Reseller:
-    reseller = db.query(Reseller).filter(Reseller.user_id == user.id).first()
-    if not reseller:
-        raise HTTPException(status_code=404, detail="Reseller profile not found")
-    return reseller
-
 def generate_order_number() -> str:
     """Generate unique order number"""
     timestamp = datetime.now().strftime("%Y%m%d")
@@ -33,19 +32,19 @@ def generate_order_number() -> str:
 # ============== ORDER ROUTES ==============
 
 @router.get("", response_model=List[OrderResponse])
-async def get_orders(
+def get_orders(
     status_filter: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Get reseller's orders"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     query = db.query(Order).options(
         joinedload(Order.items)
-    ).filter(Order.reseller_id == reseller.id)
+    ).filter(Order.reseller_id == reseller_id)
     
     if status_filter:
         query = query.filter(Order.status == status_filter)
@@ -56,20 +55,58 @@ async def get_orders(
     
     return orders
 
+@router.get("/search", response_model=List[OrderResponse])
+def search_reseller_orders(
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    order_number: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_db)
+):
+    """Search reseller's orders by customer email, phone or order number"""
+    if not (email or phone or order_number):
+        raise HTTPException(status_code=400, detail="Provide email, phone or order_number")
+    
+    reseller_id = get_reseller_id(current_user)
+    
+    return search_orders(
+        db,
+        email=email,
+        phone=phone,
+        order_number=order_number,
+        reseller_id=reseller_id,
+        offset=(page - 1) * per_page,
+        limit=per_page
+    )
+
+@router.get("/track", response_model=OrderTrackingResponse)
+def track_storefront_order(
+    order_number: str,
+    email: str,
+    db: Session = Depends(get_db)
+):
+    """Track an order by order number and customer email (customer-facing)"""
+    tracking = track_order(db, order_number, email)
+    if not tracking:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return tracking
+
 @router.get("/{order_id}", response_model=OrderResponse)
-async def get_order(
+def get_order(
     order_id: int,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Get single order details"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     order = db.query(Order).options(
         joinedload(Order.items)
     ).filter(
         Order.id == order_id,
-        Order.reseller_id == reseller.id
+        Order.reseller_id == reseller_id
     ).first()
     
     if not order:
@@ -78,20 +115,15 @@ async def get_order(
     return order
 
 @router.get("/stats/summary")
-async def get_order_stats(
-    current_user: User = Depends(require_reseller),
+def get_order_stats(
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Get order statistics"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     # Count by status
-    status_counts = db.query(
-        Order.status,
-        func.count(Order.id)
-    ).filter(
-        Order.reseller_id == reseller.id
-    ).group_by(Order.status).all()
+    status_counts = rollups.get_status_counts(db, reseller_id).items()
     
     stats = {
         "pending": 0,
@@ -111,8 +143,14 @@ async def get_order_stats(
 
 # ============== STOREFRONT ORDER CREATION (Customer-facing) ==============
 
-@router.post("/storefront/{reseller_slug}")
-async def create_storefront_order(
+@router.post(
+    "/storefront/{reseller_slug}",
+    dependencies=[
+        Depends(per_ip("checkout_ip")),
+        Depends(per_path_param("checkout_store", "reseller_slug"))
+    ]
+)
+def create_storefront_order(
     reseller_slug: str,
     order_data: OrderCreate,
     db: Session = Depends(get_db)
@@ -132,24 +170,22 @@ async def create_storefront_order(
     total_commission = 0
     order_items = []
     
-    for item_data in order_data.items:
-        # Get reseller product
-        reseller_product = db.query(ResellerProduct).filter(
+    # Every ordered product with its store listing, in one query
+    listings = {
+        product.id: (reseller_product, product)
+        for reseller_product, product in db.query(ResellerProduct, Product).join(
+            Product, Product.id == ResellerProduct.product_id
+        ).filter(
             ResellerProduct.reseller_id == reseller.id,
-            ResellerProduct.product_id == item_data.product_id,
+            ResellerProduct.product_id.in_([item.product_id for item in order_data.items]),
             ResellerProduct.is_active == True
-        ).first()
-        
-        if not reseller_product:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Product {item_data.product_id} not available"
-            )
-        
-        # Get base product
-        product = db.query(Product).filter(Product.id == item_data.product_id).first()
+        ).all()
+    }
+    
+    for item_data in order_data.items:
+        reseller_product, product = listings.get(item_data.product_id, (None, None))
         
-        if not product or not product.is_active:
+        if not reseller_product or not product.is_active:
             raise HTTPException(
                 status_code=400,
                 detail=f"Product {item_data.product_id} not available"
@@ -208,10 +244,13 @@ async def create_storefront_order(
         manufacturer_amount=manufacturer_amount,
         customer_notes=order_data.customer_notes,
         status="pending",
-        payment_status="pending"
+        payment_status="pending",
+        # Set here rather than by the database: the rollups bucket the order by it right away
+        created_at=datetime.utcnow()
     )
     db.add(order)
     db.flush()
+    rollups.record_order_created(db, order)
     
     # Create order items
     for item in order_items:
@@ -231,8 +270,9 @@ async def create_storefront_order(
         
         # Update inventory
         if item["product"].track_inventory:
-            item["product"].stock_quantity -= item["quantity"]
+            inventory.decrement_stock(db, item["product"], item["quantity"])
     
+    leaderboards.record_order_created(db, order)
     db.commit()
     db.refresh(order)
     
@@ -249,10 +289,10 @@ async def create_storefront_order(
 # ============== ORDER STATUS UPDATES (For Admin/Manufacturer) ==============
 
 @router.patch("/{order_id}/status")
-async def update_order_status(
+def update_order_status(
     order_id: int,
     data: OrderStatusUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update order status (admin/manufacturer)"""
@@ -264,28 +304,46 @@ async def update_order_status(
     
     # Check access
     if current_user.role == "reseller":
-        reseller = db.query(Reseller).filter(Reseller.user_id == current_user.id).first()
-        if not reseller or order.reseller_id != reseller.id:
+        if order.reseller_id != current_user.reseller_id:
             raise HTTPException(status_code=403, detail="Access denied")
     
     # Update status
-    order.status = data.status.value
+    old_status = order.status
+    new_status = data.status.value
+    values = {"status": new_status}
     
     if data.tracking_number:
-        order.tracking_number = data.tracking_number
+        values["tracking_number"] = data.tracking_number
     if data.tracking_url:
-        order.tracking_url = data.tracking_url
+        values["tracking_url"] = data.tracking_url
     if data.internal_notes:
-        order.internal_notes = data.internal_notes
+        values["internal_notes"] = data.internal_notes
     
     # Set timestamps
-    if data.status.value == "shipped":
-        order.shipped_at = datetime.utcnow()
-    elif data.status.value == "delivered":
-        order.delivered_at = datetime.utcnow()
+    if new_status == "shipped":
+        values["shipped_at"] = datetime.utcnow()
+    elif new_status == "delivered":
+        values["delivered_at"] = datetime.utcnow()
+    
+    # Conditional on the status read above: of two concurrent updates only one
+    # applies, so commission, rollups and leaderboards move exactly once
+    result = db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == old_status)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Order status changed concurrently, please retry")
+    
+    rollups.record_status_change(db, order, old_status, new_status)
+    ledger.apply_order_status_change(db, order, old_status, new_status)
+    leaderboards.record_status_change(db, order, old_status, new_status)
     
     db.commit()
+    invalidate_tracking(order)
     
     # TODO: Send status update email to customer
     
-    return {"message": "Order status updated", "status": order.status}
+    return {"message": "Order status updated", "status": new_status}
@@ -1,99 +1,57 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import Optional, List
 from datetime import datetime
 
 from database.database import get_db
-from database.models import User, Reseller, Order, Payout
+from database.models import Payout
 from database.schemas import PayoutRequest, PayoutResponse
-from routers.auth import get_current_active_user, require_reseller
+from routers.auth import get_current_active_user, require_reseller, get_reseller_id
+from services.principals import Principal
+from services import ledger
 
 router = APIRouter(prefix="/payouts", tags=["Payouts"])
 
 # ============== HELPER FUNCTIONS ==============
 
-def get_reseller_for_user(user: User, db: Session) -> Reseller:
-    reseller = db.query(Reseller).filter(Reseller.user_id == user.id).first()
-    if not reseller:
-        raise HTTPException(status_code=404, detail="Reseller profile not found")
-    return reseller
-
 def calculate_available_payout(reseller_id: int, db: Session) -> float:
     """Calculate available payout amount"""
-    # Sum of commissions from delivered orders
-    total_commission = db.query(
-        func.sum(Order.reseller_commission)
-    ).filter(
-        Order.reseller_id == reseller_id,
-        Order.status == "delivered"
-    ).scalar() or 0
-    
-    # Subtract already paid out or pending payouts
-    paid_out = db.query(
-        func.sum(Payout.amount)
-    ).filter(
-        Payout.reseller_id == reseller_id,
-        Payout.status.in_(["pending", "processing", "completed"])
-    ).scalar() or 0
-    
-    return max(0, float(total_commission - paid_out))
+    balance = ledger.get_balance(db, reseller_id)
+    return max(0, float(balance.available)) if balance else 0.0
 
 # ============== PAYOUT ROUTES ==============
 
 @router.get("/balance")
-async def get_payout_balance(
-    current_user: User = Depends(require_reseller),
+def get_payout_balance(
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Get current payout balance"""
-    reseller = get_reseller_for_user(current_user, db)
-    
-    available = calculate_available_payout(reseller.id, db)
-    
-    # Get pending payouts
-    pending = db.query(
-        func.sum(Payout.amount)
-    ).filter(
-        Payout.reseller_id == reseller.id,
-        Payout.status.in_(["pending", "processing"])
-    ).scalar() or 0
+    reseller_id = get_reseller_id(current_user)
     
-    # Get total paid out
-    total_paid = db.query(
-        func.sum(Payout.amount)
-    ).filter(
-        Payout.reseller_id == reseller.id,
-        Payout.status == "completed"
-    ).scalar() or 0
-    
-    # Get total earned (all commissions)
-    total_earned = db.query(
-        func.sum(Order.reseller_commission)
-    ).filter(
-        Order.reseller_id == reseller.id,
-        Order.status == "delivered"
-    ).scalar() or 0
+    balance = ledger.get_balance(db, reseller_id)
+    if not balance:
+        return {"available": 0.0, "pending": 0.0, "total_paid": 0.0, "total_earned": 0.0}
     
     return {
-        "available": float(available),
-        "pending": float(pending),
-        "total_paid": float(total_paid),
-        "total_earned": float(total_earned)
+        "available": max(0, float(balance.available)),
+        "pending": float(balance.pending),
+        "total_paid": float(balance.total_paid),
+        "total_earned": float(balance.total_earned)
     }
 
 @router.get("", response_model=List[PayoutResponse])
-async def get_payouts(
+def get_payouts(
     status_filter: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Get payout history"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
-    query = db.query(Payout).filter(Payout.reseller_id == reseller.id)
+    query = db.query(Payout).filter(Payout.reseller_id == reseller_id)
     
     if status_filter:
         query = query.filter(Payout.status == status_filter)
@@ -104,39 +62,26 @@ async def get_payouts(
     return payouts
 
 @router.post("/request", response_model=PayoutResponse)
-async def request_payout(
+def request_payout(
     data: PayoutRequest,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Request a payout"""
-    reseller = get_reseller_for_user(current_user, db)
-    
-    available = calculate_available_payout(reseller.id, db)
-    
-    if available <= 0:
-        raise HTTPException(
-            status_code=400,
-            detail="No available balance for payout"
-        )
-    
-    # Determine amount
-    amount = data.amount if data.amount and data.amount <= available else available
+    reseller_id = get_reseller_id(current_user)
     
-    if amount < 100:  # Minimum payout
-        raise HTTPException(
-            status_code=400,
-            detail="Minimum payout amount is Rs.100"
-        )
+    # Reserve funds under the balance row lock, then record the payout
+    amount = ledger.reserve_payout(db, reseller_id, data.amount)
     
-    # Create payout request
     payout = Payout(
-        reseller_id=reseller.id,
+        reseller_id=reseller_id,
         amount=amount,
         payment_method=data.payment_method,
         status="pending"
     )
     db.add(payout)
+    db.flush()
+    ledger.record_payout_requested(db, payout)
     db.commit()
     db.refresh(payout)
     
@@ -145,17 +90,17 @@ async def request_payout(
     return payout
 
 @router.get("/{payout_id}", response_model=PayoutResponse)
-async def get_payout(
+def get_payout(
     payout_id: int,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Get payout details"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     payout = db.query(Payout).filter(
         Payout.id == payout_id,
-        Payout.reseller_id == reseller.id
+        Payout.reseller_id == reseller_id
     ).first()
     
     if not payout:
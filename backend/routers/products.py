@@ -4,31 +4,21 @@ from sqlalchemy import func, or_
 from typing import Optional, List
 
 from database.database import get_db
-from database.models import User, Reseller, Product, ResellerProduct, Manufacturer
+from database.models import Product, ResellerProduct, Manufacturer
 from database.schemas import (
     ProductResponse, ResellerProductCreate, ResellerProductUpdate,
     ResellerProductResponse, BulkPriceUpdate
 )
-from routers.auth import get_current_active_user, require_reseller
+from routers.auth import get_current_active_user, require_reseller, get_reseller_id
+from services.principals import Principal
+from services.replicas import get_read_db
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
-# ============== HELPER FUNCTIONS ==============
-
-def get_reseller_for_user(user: User, db: Session) -> Reseller:
-    """Get reseller profile for current user"""
-    reseller = db.query(Reseller).filter(Reseller.user_id == user.id).first()
-    if not reseller:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Reseller profile not found"
-        )
-    return reseller
-
 # ============== CATALOG ROUTES (View Manufacturer Products) ==============
 
 @router.get("/catalog", response_model=List[ProductResponse])
-async def get_catalog(
+def get_catalog(
     category: Optional[str] = None,
     material: Optional[str] = None,
     min_price: Optional[float] = None,
@@ -36,8 +26,8 @@ async def get_catalog(
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(require_reseller),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
 ):
     """Browse manufacturer product catalog"""
     query = db.query(Product).filter(Product.is_active == True)
@@ -67,9 +57,9 @@ async def get_catalog(
     return products
 
 @router.get("/catalog/categories")
-async def get_categories(
-    current_user: User = Depends(require_reseller),
-    db: Session = Depends(get_db)
+def get_categories(
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
 ):
     """Get list of product categories"""
     categories = db.query(Product.category).filter(
@@ -80,9 +70,9 @@ async def get_categories(
     return [c[0] for c in categories if c[0]]
 
 @router.get("/catalog/materials")
-async def get_materials(
-    current_user: User = Depends(require_reseller),
-    db: Session = Depends(get_db)
+def get_materials(
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
 ):
     """Get list of product materials"""
     materials = db.query(Product.material).filter(
@@ -93,10 +83,10 @@ async def get_materials(
     return [m[0] for m in materials if m[0]]
 
 @router.get("/catalog/{product_id}", response_model=ProductResponse)
-async def get_catalog_product(
+def get_catalog_product(
     product_id: int,
-    current_user: User = Depends(require_reseller),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
 ):
     """Get single product from catalog"""
     product = db.query(Product).filter(
@@ -115,21 +105,21 @@ async def get_catalog_product(
 # ============== MY PRODUCTS (Reseller's Selected Products) ==============
 
 @router.get("/my-products")
-async def get_my_products(
+def get_my_products(
     is_active: Optional[bool] = None,
     is_featured: Optional[bool] = None,
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(require_reseller),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
 ):
     """Get reseller's selected products"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     query = db.query(ResellerProduct).options(
         joinedload(ResellerProduct.product)
-    ).filter(ResellerProduct.reseller_id == reseller.id)
+    ).filter(ResellerProduct.reseller_id == reseller_id)
     
     # Apply filters
     if is_active is not None:
@@ -204,13 +194,13 @@ async def get_my_products(
     }
 
 @router.post("/my-products")
-async def add_product(
+def add_product(
     data: ResellerProductCreate,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Add a product to reseller's store"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     # Check if product exists
     product = db.query(Product).filter(
@@ -226,7 +216,7 @@ async def add_product(
     
     # Check if already added
     existing = db.query(ResellerProduct).filter(
-        ResellerProduct.reseller_id == reseller.id,
+        ResellerProduct.reseller_id == reseller_id,
         ResellerProduct.product_id == data.product_id
     ).first()
     
@@ -251,7 +241,7 @@ async def add_product(
     
     # Create reseller product
     reseller_product = ResellerProduct(
-        reseller_id=reseller.id,
+        reseller_id=reseller_id,
         product_id=data.product_id,
         retail_price=data.retail_price,
         compare_at_price=data.compare_at_price,
@@ -266,18 +256,18 @@ async def add_product(
     return {"message": "Product added successfully", "id": reseller_product.id}
 
 @router.put("/my-products/{reseller_product_id}")
-async def update_reseller_product(
+def update_reseller_product(
     reseller_product_id: int,
     data: ResellerProductUpdate,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Update a product in reseller's store"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     reseller_product = db.query(ResellerProduct).filter(
         ResellerProduct.id == reseller_product_id,
-        ResellerProduct.reseller_id == reseller.id
+        ResellerProduct.reseller_id == reseller_id
     ).first()
     
     if not reseller_product:
@@ -314,17 +304,17 @@ async def update_reseller_product(
     return {"message": "Product updated successfully"}
 
 @router.delete("/my-products/{reseller_product_id}")
-async def remove_reseller_product(
+def remove_reseller_product(
     reseller_product_id: int,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Remove a product from reseller's store"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     reseller_product = db.query(ResellerProduct).filter(
         ResellerProduct.id == reseller_product_id,
-        ResellerProduct.reseller_id == reseller.id
+        ResellerProduct.reseller_id == reseller_id
     ).first()
     
     if not reseller_product:
@@ -339,33 +329,32 @@ async def remove_reseller_product(
     return {"message": "Product removed successfully"}
 
 @router.post("/my-products/bulk-update")
-async def bulk_update_prices(
+def bulk_update_prices(
     data: BulkPriceUpdate,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Bulk update product prices with markup percentage"""
-    reseller = get_reseller_for_user(current_user, db)
-    
-    # Get reseller products
-    reseller_products = db.query(ResellerProduct).filter(
-        ResellerProduct.reseller_id == reseller.id,
+    reseller_id = get_reseller_id(current_user)
+    
+    # Reseller products with their product and manufacturer, in one query
+    rows = db.query(ResellerProduct, Product, Manufacturer).join(
+        Product, Product.id == ResellerProduct.product_id
+    ).outerjoin(
+        Manufacturer, Manufacturer.id == Product.manufacturer_id
+    ).filter(
+        ResellerProduct.reseller_id == reseller_id,
         ResellerProduct.product_id.in_(data.product_ids)
     ).all()
     
     updated = 0
     errors = []
     
-    for rp in reseller_products:
-        product = db.query(Product).filter(Product.id == rp.product_id).first()
+    for rp, product, manufacturer in rows:
         if product:
             new_price = product.base_price * (1 + data.markup_percent / 100)
             
             # Check minimum markup
-            manufacturer = db.query(Manufacturer).filter(
-                Manufacturer.id == product.manufacturer_id
-            ).first()
-            
             if manufacturer:
                 min_price = product.base_price * (1 + manufacturer.minimum_markup_percent / 100)
                 if new_price < min_price:
@@ -1,47 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import Optional, List
-from datetime import datetime, timedelta
-import os
-import uuid
+from datetime import date, timedelta
+import asyncio
 
 from database.database import get_db
-from database.models import User, Reseller, ResellerProduct, Order, OrderItem, Payout, StorefrontConfig, Product
+from database.models import Reseller, ResellerProduct, OrderItem, StorefrontConfig, Product
 from database.schemas import (
-    ResellerResponse, ResellerUpdate, ResellerBranding, ResellerDomain,
-    DashboardStats, RevenueByPeriod, StorefrontConfigUpdate, StorefrontConfigResponse
+    ResellerResponse, ResellerUpdate, ResellerBranding, ResellerDomain, ResellerPayoutDetails,
+    DashboardStats, RevenueByPeriod, RevenueTimeSeries, TopProduct, StorefrontConfigUpdate, StorefrontConfigResponse
 )
-from routers.auth import get_current_active_user, require_reseller
+from routers.auth import get_current_active_user, require_reseller, get_reseller_id, get_reseller_for_user
+from services.principals import Principal
+from services import rollups, ledger, timeseries, analytics, leaderboards, uploads
+from services.replicas import get_read_db
 
 router = APIRouter(prefix="/resellers", tags=["Resellers"])
 
-# ============== HELPER FUNCTIONS ==============
-
-def get_reseller_for_user(user: User, db: Session) -> Reseller:
-    """Get reseller profile for current user"""
-    reseller = db.query(Reseller).filter(Reseller.user_id == user.id).first()
-    if not reseller:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Reseller profile not found"
-        )
-    return reseller
-
 # ============== PROFILE ROUTES ==============
 
 @router.get("/profile", response_model=ResellerResponse)
-async def get_profile(
-    current_user: User = Depends(require_reseller),
+def get_profile(
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Get current reseller's profile"""
     return get_reseller_for_user(current_user, db)
 
 @router.put("/profile", response_model=ResellerResponse)
-async def update_profile(
+def update_profile(
     data: ResellerUpdate,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Update reseller profile"""
@@ -54,10 +43,34 @@ async def update_profile(
     db.refresh(reseller)
     return reseller
 
+@router.get("/payout-details", response_model=ResellerPayoutDetails)
+def get_payout_details(
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_db)
+):
+    """Get bank/UPI details used for payouts"""
+    return get_reseller_for_user(current_user, db)
+
+@router.put("/payout-details", response_model=ResellerPayoutDetails)
+def update_payout_details(
+    data: ResellerPayoutDetails,
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_db)
+):
+    """Update bank/UPI details used for payouts"""
+    reseller = get_reseller_for_user(current_user, db)
+    
+    for field, value in data.model_dump(exclude_unset=True).items():
+        setattr(reseller, field, value)
+    
+    db.commit()
+    db.refresh(reseller)
+    return reseller
+
 @router.put("/branding", response_model=ResellerResponse)
-async def update_branding(
+def update_branding(
     data: ResellerBranding,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Update storefront branding"""
@@ -73,11 +86,11 @@ async def update_branding(
 @router.post("/logo")
 async def upload_logo(
     file: UploadFile = File(...),
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Upload store logo"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller = await asyncio.to_thread(get_reseller_for_user, current_user, db)
     
     # Validate file type
     allowed_types = ["image/jpeg", "image/png", "image/webp", "image/svg+xml"]
@@ -87,23 +100,10 @@ async def upload_logo(
             detail="Invalid file type. Allowed: JPEG, PNG, WebP, SVG"
         )
     
-    # Create uploads directory
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    upload_dir = os.path.join(base_dir, "uploads", "logos")
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
-    ext = file.filename.split(".")[-1] if "." in file.filename else "png"
-    filename = f"{reseller.slug}-{uuid.uuid4().hex[:8]}.{ext}"
-    filepath = os.path.join(upload_dir, filename)
-    
-    # Save file
+    # Save file (streamed, stored once per content hash) and its resized variants
     try:
-        with open(filepath, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        print(f"[DEBUG] Logo saved to: {filepath}")
-    except Exception as e:
+        stored, variants = await uploads.store_image(file, "logos")
+    except OSError as e:
         print(f"[ERROR] Failed to save logo: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -111,19 +111,22 @@ async def upload_logo(
         )
     
     # Update reseller
-    reseller.logo_url = f"/uploads/logos/{filename}"
-    db.commit()
+    def _update():
+        reseller.logo_url = stored.url
+        reseller.image_variants = {stored.url: variants} if variants else {}
+        db.commit()
     
-    return {"logo_url": reseller.logo_url}
+    await asyncio.to_thread(_update)
+    return {"logo_url": stored.url, "variants": variants}
 
 @router.post("/banner")
 async def upload_banner(
     file: UploadFile = File(...),
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Upload store banner"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller = await asyncio.to_thread(get_reseller_for_user, current_user, db)
     
     # Validate file type
     allowed_types = ["image/jpeg", "image/png", "image/webp"]
@@ -133,23 +136,10 @@ async def upload_banner(
             detail="Invalid file type. Allowed: JPEG, PNG, WebP"
         )
     
-    # Create uploads directory
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    upload_dir = os.path.join(base_dir, "uploads", "banners")
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
-    ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    filename = f"{reseller.slug}-banner-{uuid.uuid4().hex[:8]}.{ext}"
-    filepath = os.path.join(upload_dir, filename)
-    
-    # Save file
+    # Save file (streamed, stored once per content hash) and its resized variants
     try:
-        with open(filepath, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        print(f"[DEBUG] Banner saved to: {filepath}")
-    except Exception as e:
+        stored, variants = await uploads.store_image(file, "banners")
+    except OSError as e:
         print(f"[ERROR] Failed to save banner: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -157,20 +147,23 @@ async def upload_banner(
         )
     
     # Update storefront config
-    config = db.query(StorefrontConfig).filter(StorefrontConfig.reseller_id == reseller.id).first()
-    if not config:
-        config = StorefrontConfig(reseller_id=reseller.id)
-        db.add(config)
-    
-    config.hero_image = f"/uploads/banners/{filename}"
-    db.commit()
+    def _update():
+        config = db.query(StorefrontConfig).filter(StorefrontConfig.reseller_id == reseller.id).first()
+        if not config:
+            config = StorefrontConfig(reseller_id=reseller.id)
+            db.add(config)
+        
+        config.hero_image = stored.url
+        config.image_variants = {stored.url: variants} if variants else {}
+        db.commit()
     
-    return {"banner_url": config.hero_image}
+    await asyncio.to_thread(_update)
+    return {"banner_url": stored.url, "variants": variants}
 
 @router.put("/domain", response_model=ResellerResponse)
-async def update_domain(
+def update_domain(
     data: ResellerDomain,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Update domain settings"""
@@ -199,8 +192,8 @@ async def update_domain(
     return reseller
 
 @router.post("/publish", response_model=ResellerResponse)
-async def publish_store(
-    current_user: User = Depends(require_reseller),
+def publish_store(
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Publish the storefront"""
@@ -232,8 +225,8 @@ async def publish_store(
     return reseller
 
 @router.post("/unpublish", response_model=ResellerResponse)
-async def unpublish_store(
-    current_user: User = Depends(require_reseller),
+def unpublish_store(
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Unpublish the storefront"""
@@ -246,59 +239,29 @@ async def unpublish_store(
 # ============== DASHBOARD ROUTES ==============
 
 @router.get("/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(
-    current_user: User = Depends(require_reseller),
-    db: Session = Depends(get_db)
+def get_dashboard_stats(
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
 ):
     """Get dashboard statistics"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     # Get counts
     total_products = db.query(ResellerProduct).filter(
-        ResellerProduct.reseller_id == reseller.id,
+        ResellerProduct.reseller_id == reseller_id,
         ResellerProduct.is_active == True
     ).count()
     
-    total_orders = db.query(Order).filter(Order.reseller_id == reseller.id).count()
-    
-    # Get totals
-    revenue_result = db.query(
-        func.sum(Order.total_amount),
-        func.sum(Order.reseller_commission)
-    ).filter(Order.reseller_id == reseller.id).first()
+    # Lifetime totals from the daily rollups
+    total_orders, total_revenue, total_commission = rollups.get_totals(db, reseller_id)
     
-    total_revenue = revenue_result[0] or 0
-    total_commission = revenue_result[1] or 0
-    
-    # Get pending payout
-    pending_payout = db.query(
-        func.sum(Order.reseller_commission)
-    ).filter(
-        Order.reseller_id == reseller.id,
-        Order.status.in_(["delivered"])
-    ).scalar() or 0
-    
-    # Subtract already paid out
-    paid_out = db.query(
-        func.sum(Payout.amount)
-    ).filter(
-        Payout.reseller_id == reseller.id,
-        Payout.status == "completed"
-    ).scalar() or 0
-    
-    pending_payout = max(0, pending_payout - paid_out)
+    # Earned but not yet paid out, from the ledger balance
+    balance = ledger.get_balance(db, reseller_id)
+    pending_payout = max(0, balance.available + balance.pending) if balance else 0
     
     # This month stats
-    first_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    month_result = db.query(
-        func.count(Order.id),
-        func.sum(Order.total_amount),
-        func.sum(Order.reseller_commission)
-    ).filter(
-        Order.reseller_id == reseller.id,
-        Order.created_at >= first_of_month
-    ).first()
+    first_of_month = rollups.local_now().date().replace(day=1)
+    month_result = rollups.get_totals(db, reseller_id, since=first_of_month)
     
     return DashboardStats(
         total_products=total_products,
@@ -312,34 +275,22 @@ async def get_dashboard_stats(
     )
 
 @router.get("/dashboard/revenue", response_model=List[RevenueByPeriod])
-async def get_revenue_by_period(
-    days: int = 30,
-    current_user: User = Depends(require_reseller),
-    db: Session = Depends(get_db)
+def get_revenue_by_period(
+    days: int = Query(30, ge=1, le=366),
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
 ):
     """Get revenue breakdown by day"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
-    start_date = datetime.now() - timedelta(days=days)
-    
-    # Query orders grouped by date
-    results = db.query(
-        func.date(Order.created_at).label('date'),
-        func.sum(Order.total_amount).label('revenue'),
-        func.count(Order.id).label('orders'),
-        func.sum(Order.reseller_commission).label('commission')
-    ).filter(
-        Order.reseller_id == reseller.id,
-        Order.created_at >= start_date
-    ).group_by(
-        func.date(Order.created_at)
-    ).order_by(
-        func.date(Order.created_at)
-    ).all()
+    start_date = rollups.local_now().date() - timedelta(days=days)
+    
+    # Read pre-aggregated daily rows
+    results = rollups.get_daily_series(db, reseller_id, start_date)
     
     return [
         RevenueByPeriod(
-            period=str(r.date),
+            period=str(r.day),
             revenue=float(r.revenue or 0),
             orders=r.orders,
             commission=float(r.commission or 0)
@@ -347,23 +298,77 @@ async def get_revenue_by_period(
         for r in results
     ]
 
+@router.get("/dashboard/timeseries", response_model=RevenueTimeSeries)
+def get_revenue_timeseries(
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
+):
+    """Get gap-filled revenue series with previous-period comparison"""
+    reseller_id = get_reseller_id(current_user)
+    
+    end = end or rollups.local_now().date()
+    start = start or end - timedelta(days=29)
+    
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be on or before end"
+        )
+    if (end - start).days > timeseries.MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range cannot exceed {timeseries.MAX_RANGE_DAYS} days"
+        )
+    
+    return timeseries.revenue_series(db, reseller_id, granularity, start, end)
+
+@router.get("/dashboard/top-products", response_model=List[TopProduct])
+def get_top_products(
+    limit: int = Query(10, ge=1, le=100),
+    rank_by: str = Query("units", pattern="^(units|revenue)$"),
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
+):
+    """Get best-selling products for this store"""
+    reseller_id = get_reseller_id(current_user)
+    return leaderboards.top_products_for_reseller(db, reseller_id, limit=limit, rank_by=rank_by)
+
+@router.get("/analytics/products")
+def get_product_analytics(
+    days: int = Query(30, ge=1, le=366),
+    current_user: Principal = Depends(require_reseller),
+    db: Session = Depends(get_read_db)
+):
+    """Get storefront page views and per-product views / add-to-carts"""
+    reseller_id = get_reseller_id(current_user)
+    
+    since = rollups.local_now().date() - timedelta(days=days)
+    
+    return {
+        "page_views": analytics.store_page_views(db, reseller_id, since),
+        "products": analytics.product_counters(db, reseller_id, since)
+    }
+
 # ============== STOREFRONT CONFIG ==============
 
 @router.get("/storefront-config", response_model=StorefrontConfigResponse)
-async def get_storefront_config(
-    current_user: User = Depends(require_reseller),
+def get_storefront_config(
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Get storefront configuration"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     config = db.query(StorefrontConfig).filter(
-        StorefrontConfig.reseller_id == reseller.id
+        StorefrontConfig.reseller_id == reseller_id
     ).first()
     
     if not config:
         # Create default config
-        config = StorefrontConfig(reseller_id=reseller.id)
+        config = StorefrontConfig(reseller_id=reseller_id)
         db.add(config)
         db.commit()
         db.refresh(config)
@@ -371,20 +376,20 @@ async def get_storefront_config(
     return config
 
 @router.put("/storefront-config", response_model=StorefrontConfigResponse)
-async def update_storefront_config(
+def update_storefront_config(
     data: StorefrontConfigUpdate,
-    current_user: User = Depends(require_reseller),
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Update storefront configuration"""
-    reseller = get_reseller_for_user(current_user, db)
+    reseller_id = get_reseller_id(current_user)
     
     config = db.query(StorefrontConfig).filter(
-        StorefrontConfig.reseller_id == reseller.id
+        StorefrontConfig.reseller_id == reseller_id
     ).first()
     
     if not config:
-        config = StorefrontConfig(reseller_id=reseller.id)
+        config = StorefrontConfig(reseller_id=reseller_id)
         db.add(config)
     
     for field, value in data.model_dump(exclude_unset=True).items():
@@ -397,8 +402,8 @@ async def update_storefront_config(
 # ============== ONBOARDING ==============
 
 @router.get("/onboarding-status")
-async def get_onboarding_status(
-    current_user: User = Depends(require_reseller),
+def get_onboarding_status(
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Get onboarding progress"""
@@ -426,8 +431,8 @@ async def get_onboarding_status(
     }
 
 @router.post("/complete-onboarding", response_model=ResellerResponse)
-async def complete_onboarding(
-    current_user: User = Depends(require_reseller),
+def complete_onboarding(
+    current_user: Principal = Depends(require_reseller),
     db: Session = Depends(get_db)
 ):
     """Mark onboarding as complete"""
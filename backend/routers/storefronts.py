@@ -1,24 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_
+from sqlalchemy import or_, and_, func
 from typing import Optional, List, Dict
 import time
 
-from database.database import get_db
 from database.models import (
-    Reseller, Product, ResellerProduct, StorefrontConfig
+    Reseller, Product, ResellerProduct, StorefrontConfig, ProductSalesStats
 )
-from database.schemas import ProductResponse
+from database.schemas import ProductResponse, StorefrontEventBatch
+from services import analytics, images
+from services.replicas import get_read_db
 
 router = APIRouter(prefix="/store", tags=["Storefront"])
 
 # ============== PUBLIC STOREFRONT ROUTES ==============
 
 @router.get("/{slug}")
-async def get_storefront(
+def get_storefront(
     slug: str,
     response: Response,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get storefront data by slug"""
     # Force no-cache to ensure dashboard settings reflect immediately
@@ -49,6 +50,7 @@ async def get_storefront(
             "slug": reseller.slug,
             "description": reseller.description,
             "logo_url": reseller.logo_url,
+            "logo_variants": images.describe(reseller.image_variants, reseller.logo_url),
             "primary_color": reseller.primary_color,
             "secondary_color": reseller.secondary_color,
             "accent_color": reseller.accent_color,
@@ -67,6 +69,7 @@ async def get_storefront(
             "hero_title": config.hero_title if config else reseller.homepage_title,
             "hero_subtitle": config.hero_subtitle if config else reseller.homepage_tagline,
             "hero_image": config.hero_image if config else None,
+            "hero_image_variants": images.describe(config.image_variants, config.hero_image) if config else None,
             "hero_cta_text": config.hero_cta_text if config else "Shop Now",
             "footer_text": config.footer_text if config else None,
             "social_links": config.social_links if config else {}
@@ -75,7 +78,7 @@ async def get_storefront(
     }
 
 @router.get("/{slug}/products")
-async def get_storefront_products(
+def get_storefront_products(
     slug: str,
     category: Optional[str] = None,
     material: Optional[str] = None,
@@ -83,9 +86,10 @@ async def get_storefront_products(
     max_price: Optional[float] = None,
     search: Optional[str] = None,
     featured_only: bool = False,
+    sort: Optional[str] = Query(None, pattern="^bestsellers$"),
     page: int = Query(1, ge=1),
     per_page: int = Query(12, ge=1, le=48),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get products for a storefront"""
     reseller = db.query(Reseller).filter(
@@ -130,10 +134,24 @@ async def get_storefront_products(
     
     # Paginate
     offset = (page - 1) * per_page
-    items = query.order_by(
-        ResellerProduct.is_featured.desc(),
-        ResellerProduct.display_order
-    ).offset(offset).limit(per_page).all()
+    if sort == "bestsellers":
+        # Ranked by the precomputed per-store sales counters
+        query = query.outerjoin(
+            ProductSalesStats,
+            and_(
+                ProductSalesStats.reseller_id == ResellerProduct.reseller_id,
+                ProductSalesStats.product_id == ResellerProduct.product_id
+            )
+        ).order_by(
+            func.coalesce(ProductSalesStats.units_sold, 0).desc(),
+            ResellerProduct.display_order
+        )
+    else:
+        query = query.order_by(
+            ResellerProduct.is_featured.desc(),
+            ResellerProduct.display_order
+        )
+    items = query.offset(offset).limit(per_page).all()
     
     # Format response
     products = []
@@ -150,6 +168,7 @@ async def get_storefront_products(
             "category": rp.product.category,
             "material": rp.product.material,
             "primary_image": rp.product.primary_image,
+            "primary_image_variants": images.describe(rp.product.image_variants, rp.product.primary_image),
             "images": rp.product.images or [],
             "is_featured": rp.is_featured,
             "in_stock": rp.product.stock_quantity > 0,
@@ -165,10 +184,10 @@ async def get_storefront_products(
     }
 
 @router.get("/{slug}/products/{product_slug}")
-async def get_storefront_product(
+def get_storefront_product(
     slug: str,
     product_slug: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get single product from storefront"""
     reseller = db.query(Reseller).filter(
@@ -210,7 +229,12 @@ async def get_storefront_product(
         "weight": product.weight,
         "dimensions": product.dimensions,
         "primary_image": product.primary_image,
+        "primary_image_variants": images.describe(product.image_variants, product.primary_image),
         "images": product.images or [],
+        "image_variants": {
+            url: product.image_variants[url] for url in product.images or []
+            if url in (product.image_variants or {})
+        },
         "is_featured": reseller_product.is_featured,
         "in_stock": product.stock_quantity > 0,
         "stock_quantity": product.stock_quantity if product.track_inventory else None,
@@ -219,9 +243,9 @@ async def get_storefront_product(
     }
 
 @router.get("/{slug}/categories")
-async def get_storefront_categories(
+def get_storefront_categories(
     slug: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get categories available in storefront"""
     reseller = db.query(Reseller).filter(
@@ -245,10 +269,10 @@ async def get_storefront_categories(
     return [c[0] for c in categories if c[0]]
 
 @router.get("/{slug}/featured")
-async def get_featured_products(
+def get_featured_products(
     slug: str,
     limit: int = Query(8, ge=1, le=20),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get featured products for storefront"""
     reseller = db.query(Reseller).filter(
@@ -278,7 +302,20 @@ async def get_featured_products(
             "price": rp.retail_price,
             "compare_at_price": rp.compare_at_price,
             "primary_image": rp.product.primary_image,
+            "primary_image_variants": images.describe(rp.product.image_variants, rp.product.primary_image),
             "category": rp.product.category
         })
     
     return products
+
+# ============== ANALYTICS BEACON ==============
+
+@router.post("/{slug}/events", status_code=status.HTTP_202_ACCEPTED)
+async def record_storefront_events(
+    slug: str,
+    data: StorefrontEventBatch
+):
+    """Record storefront analytics events (buffered, no database access)"""
+    for event in data.events:
+        analytics.record_event(slug, event.type, event.product_id, event.session_id)
+    return {"accepted": len(data.events)}
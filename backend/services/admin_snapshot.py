@@ -0,0 +1,113 @@
+"""
+Admin dashboard metrics, computed with conditional aggregation and kept in an
+in-memory snapshot that a background task refreshes every
+ADMIN_SNAPSHOT_INTERVAL seconds.
+"""
+
+from sqlalchemy import func, case, select
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Optional
+import asyncio
+import os
+import threading
+
+from database.models import Reseller, Manufacturer, Product, Order, Payout
+from services.rollups import month_start_utc
+
+ADMIN_SNAPSHOT_INTERVAL = int(os.getenv("ADMIN_SNAPSHOT_INTERVAL", "60"))
+
+_snapshot: Optional[dict] = None
+_lock = threading.Lock()
+
+
+def compute_admin_metrics(db: Session) -> dict:
+    """All admin dashboard metrics in three aggregate queries"""
+    first_of_month = month_start_utc()
+
+    orders = db.query(
+        func.count(Order.id),
+        func.coalesce(func.sum(case((Order.status == "pending", 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Order.created_at >= first_of_month, 1), else_=0)), 0),
+        func.coalesce(func.sum(Order.total_amount), 0),
+        func.coalesce(func.sum(Order.reseller_commission), 0),
+        func.coalesce(func.sum(case((Order.created_at >= first_of_month, Order.total_amount), else_=0)), 0)
+    ).one()
+
+    resellers = db.query(
+        func.count(Reseller.id),
+        func.coalesce(func.sum(case((Reseller.is_published == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((Reseller.created_at >= first_of_month, 1), else_=0)), 0)
+    ).one()
+
+    others = db.execute(select(
+        select(func.count(Manufacturer.id)).scalar_subquery(),
+        select(func.count(Product.id)).where(Product.is_active == True).scalar_subquery(),
+        select(func.coalesce(func.sum(Payout.amount), 0)).where(Payout.status == "pending").scalar_subquery()
+    )).one()
+
+    return {
+        "resellers": {
+            "total": int(resellers[0]),
+            "active": int(resellers[1]),
+            "new_this_month": int(resellers[2])
+        },
+        "manufacturers": {
+            "total": int(others[0])
+        },
+        "products": {
+            "total": int(others[1])
+        },
+        "orders": {
+            "total": int(orders[0]),
+            "pending": int(orders[1]),
+            "this_month": int(orders[2])
+        },
+        "revenue": {
+            "total": float(orders[3]),
+            "this_month": float(orders[5]),
+            "total_commission": float(orders[4])
+        },
+        "payouts": {
+            "pending": float(others[2])
+        }
+    }
+
+
+def refresh_snapshot(db: Session) -> dict:
+    global _snapshot
+    snapshot = {
+        "metrics": compute_admin_metrics(db),
+        "generated_at": datetime.now(timezone.utc)
+    }
+    with _lock:
+        _snapshot = snapshot
+    return snapshot
+
+
+def get_snapshot(db: Session, fresh: bool = False) -> dict:
+    """Latest snapshot, recomputing when asked to or when none exists yet"""
+    snapshot = _snapshot
+    if fresh or snapshot is None:
+        snapshot = refresh_snapshot(db)
+    return snapshot
+
+
+def _refresh_with_new_session() -> None:
+    from database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        refresh_snapshot(db)
+    finally:
+        db.close()
+
+
+async def run_refresher(interval: int = ADMIN_SNAPSHOT_INTERVAL) -> None:
+    """Background loop keeping the snapshot warm"""
+    while True:
+        try:
+            await asyncio.to_thread(_refresh_with_new_session)
+        except Exception as e:
+            print(f"[ERROR] Admin snapshot refresh failed: {e}")
+        await asyncio.sleep(interval)
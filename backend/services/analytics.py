@@ -0,0 +1,244 @@
+"""
+Buffered storefront analytics.
+
+The beacon endpoint only appends to an in-memory ring buffer; nothing
+touches the database per request. A background flusher writes buffered
+events to `storefront_events` with batched executemany inserts, and a
+periodic compaction folds them into `product_daily_stats` counters and
+deletes the raw rows.
+
+Compact manually with:
+    python -m services.analytics
+"""
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import asyncio
+import os
+
+from database.models import Reseller, Product, StorefrontEvent, ProductDailyStats
+from services.rollups import local_day
+
+EVENT_TYPES = ("page_view", "product_view", "add_to_cart")
+COUNTER_COLUMNS = {
+    "page_view": "page_views",
+    "product_view": "product_views",
+    "add_to_cart": "add_to_carts"
+}
+
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "100000"))
+EVENTS_FLUSH_INTERVAL = float(os.getenv("EVENTS_FLUSH_INTERVAL", "2"))
+EVENTS_FLUSH_BATCH = int(os.getenv("EVENTS_FLUSH_BATCH", "5000"))
+EVENTS_COMPACT_INTERVAL = int(os.getenv("EVENTS_COMPACT_INTERVAL", "300"))  # 0 disables
+
+
+class EventBuffer:
+    """Bounded ring buffer; the oldest events are dropped when it is full"""
+
+    def __init__(self, maxlen: int = EVENTS_BUFFER_SIZE):
+        self._events = deque(maxlen=maxlen)
+        self.accepted = 0
+        self.dropped = 0
+        self.flushed = 0
+
+    def append(self, event: dict) -> None:
+        # deque.append is atomic under the GIL, so no lock on the hot path
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(event)
+        self.accepted += 1
+
+    def drain(self, limit: int) -> List[dict]:
+        events = []
+        popleft = self._events.popleft
+        try:
+            for _ in range(limit):
+                events.append(popleft())
+        except IndexError:
+            pass
+        return events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+event_buffer = EventBuffer()
+
+
+def record_event(store_slug: str, event_type: str, product_id: Optional[int], session_id: Optional[str]) -> None:
+    now = datetime.now(timezone.utc)
+    event_buffer.append({
+        "store_slug": store_slug,
+        "event_type": event_type,
+        "product_id": product_id,
+        "session_id": session_id,
+        "day": local_day(now),
+        "created_at": now
+    })
+
+
+def flush_events(db: Session) -> int:
+    """Write everything currently buffered in large executemany batches"""
+    written = 0
+    while True:
+        events = event_buffer.drain(EVENTS_FLUSH_BATCH)
+        if not events:
+            break
+        db.execute(insert(StorefrontEvent), events)
+        db.commit()
+        written += len(events)
+    event_buffer.flushed += written
+    return written
+
+
+def compact_events(db: Session) -> int:
+    """Fold raw events into daily counters; returns events compacted"""
+    max_id = db.query(func.max(StorefrontEvent.id)).scalar()
+    if max_id is None:
+        return 0
+
+    grouped = db.query(
+        StorefrontEvent.store_slug,
+        StorefrontEvent.product_id,
+        StorefrontEvent.day,
+        StorefrontEvent.event_type,
+        func.count(StorefrontEvent.id)
+    ).filter(
+        StorefrontEvent.id <= max_id
+    ).group_by(
+        StorefrontEvent.store_slug,
+        StorefrontEvent.product_id,
+        StorefrontEvent.day,
+        StorefrontEvent.event_type
+    ).all()
+
+    total = sum(row[4] for row in grouped)
+    slugs = {row[0] for row in grouped}
+    reseller_ids = dict(db.query(Reseller.slug, Reseller.id).filter(Reseller.slug.in_(list(slugs))).all())
+
+    # Beacon payloads are untrusted; only count products that exist
+    product_ids = {row[1] for row in grouped if row[1] is not None}
+    known_products = {
+        pid for (pid,) in db.query(Product.id).filter(Product.id.in_(list(product_ids)))
+    } if product_ids else set()
+
+    counters: Dict[tuple, Dict[str, int]] = {}
+    for slug, product_id, day, event_type, count in grouped:
+        reseller_id = reseller_ids.get(slug)
+        column = COUNTER_COLUMNS.get(event_type)
+        if reseller_id is None or column is None:
+            continue
+        if event_type == "page_view":
+            product_id = None
+        elif product_id not in known_products:
+            continue
+        key = (reseller_id, product_id, day)
+        counters.setdefault(key, {})
+        counters[key][column] = counters[key].get(column, 0) + count
+
+    if counters:
+        days = {key[2] for key in counters}
+        existing = {
+            (row.reseller_id, row.product_id, row.day): row
+            for row in db.query(ProductDailyStats).filter(
+                ProductDailyStats.reseller_id.in_(list({key[0] for key in counters})),
+                ProductDailyStats.day.in_(list(days))
+            )
+        }
+        new_rows = []
+        for key, values in counters.items():
+            row = existing.get(key)
+            if row is None:
+                new_rows.append({
+                    "reseller_id": key[0],
+                    "product_id": key[1],
+                    "day": key[2],
+                    "page_views": values.get("page_views", 0),
+                    "product_views": values.get("product_views", 0),
+                    "add_to_carts": values.get("add_to_carts", 0)
+                })
+            else:
+                for column, count in values.items():
+                    setattr(row, column, getattr(row, column) + count)
+        if new_rows:
+            db.execute(insert(ProductDailyStats), new_rows)
+
+    deleted = db.query(StorefrontEvent).filter(
+        StorefrontEvent.id <= max_id
+    ).delete(synchronize_session=False)
+
+    # Another worker compacted an overlapping range first; let it win
+    if deleted != total:
+        db.rollback()
+        return 0
+
+    db.commit()
+    return total
+
+
+def product_counters(db: Session, reseller_id: int, since) -> List[dict]:
+    rows = db.query(
+        ProductDailyStats.product_id,
+        func.sum(ProductDailyStats.product_views),
+        func.sum(ProductDailyStats.add_to_carts)
+    ).filter(
+        ProductDailyStats.reseller_id == reseller_id,
+        ProductDailyStats.day >= since,
+        ProductDailyStats.product_id.isnot(None)
+    ).group_by(ProductDailyStats.product_id).all()
+
+    return [
+        {"product_id": product_id, "views": int(views or 0), "add_to_carts": int(carts or 0)}
+        for product_id, views, carts in rows
+    ]
+
+
+def store_page_views(db: Session, reseller_id: int, since) -> int:
+    return int(db.query(
+        func.coalesce(func.sum(ProductDailyStats.page_views), 0)
+    ).filter(
+        ProductDailyStats.reseller_id == reseller_id,
+        ProductDailyStats.day >= since
+    ).scalar())
+
+
+def _with_session(fn):
+    from database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return fn(db)
+    finally:
+        db.close()
+
+
+async def run_flusher(interval: float = EVENTS_FLUSH_INTERVAL) -> None:
+    """Background loop flushing the buffer and periodically compacting"""
+    last_compact = asyncio.get_running_loop().time()
+    while True:
+        try:
+            await asyncio.sleep(interval)
+            if len(event_buffer):
+                await asyncio.to_thread(_with_session, flush_events)
+            now = asyncio.get_running_loop().time()
+            if EVENTS_COMPACT_INTERVAL and now - last_compact >= EVENTS_COMPACT_INTERVAL:
+                last_compact = now
+                await asyncio.to_thread(_with_session, compact_events)
+        except asyncio.CancelledError:
+            # Final flush so buffered events survive a clean shutdown
+            if len(event_buffer):
+                _with_session(flush_events)
+            raise
+        except Exception as e:
+            print(f"[ERROR] Analytics flush failed: {e}")
+
+
+if __name__ == "__main__":
+    from database.database import init_db
+
+    init_db()
+    count = _with_session(compact_events)
+    print(f"[OK] Compacted {count} storefront events")
@@ -0,0 +1,251 @@
+"""
+Resized WebP (and optionally AVIF) variants of uploaded images.
+
+Logos, banners and product images used to be served exactly as uploaded,
+often multi-megabyte PNG/JPEG originals. Each upload is now decoded in a
+process pool, so resizing and encoding never hold the API worker's GIL, and
+written out beside the original in up to three sizes:
+
+    thumbnail   320px   product grids, logos
+    medium      800px   product pages, phone-width banners
+    large      1600px   desktop banners, zoom
+
+Each size fits within that many pixels on its longest side. Images are never
+upscaled: the first size that would be larger than the original is written
+at the original size and the larger ones are skipped. EXIF orientation is
+applied, then all metadata (EXIF with any GPS position, XMP, ICC) is left
+out of the variants. The original is kept so variants can be rebuilt.
+
+The variants are recorded on the row that owns the image, in its
+image_variants JSON column keyed by image URL, so storefront payloads list
+them without extra queries. describe() gives the entry for one URL: the
+original's width and height and each variant's name, format, URL, width
+and height, enough for the frontend to build `srcset` and `sizes`.
+
+IMAGE_AVIF=1 adds AVIF variants when the installed Pillow can write AVIF
+(a build with libavif, or the pillow-avif-plugin package).
+
+Variants for images uploaded before this existed:
+    python -m services.images --backfill [--force]
+"""
+
+from PIL import Image, ImageOps
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+import multiprocessing
+import os
+import threading
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+IMAGE_AVIF = os.getenv("IMAGE_AVIF", "0") == "1"
+WEBP_QUALITY = int(os.getenv("WEBP_QUALITY", "80"))
+AVIF_QUALITY = int(os.getenv("AVIF_QUALITY", "55"))
+IMAGE_TIMEOUT_SECONDS = 60
+
+# (name, longest side in pixels), smallest first
+VARIANT_SIZES = [("thumbnail", 320), ("medium", 800), ("large", 1600)]
+
+ORIENTATION_TAG = 0x0112
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class InvalidImage(ValueError):
+    """The upload is not an image Pillow can decode"""
+
+
+# ============== RENDERING (process pool) ==============
+
+def _render(path: str, formats: List[str]) -> dict:
+    """Write the variants of `path` next to it; returns sizes and file names"""
+    try:
+        with Image.open(path) as source:
+            width, height = source.size
+            if source.getexif().get(ORIENTATION_TAG) in (5, 6, 7, 8):
+                width, height = height, width
+            # JPEGs decode straight at 1/2, 1/4 or 1/8 scale when that is still larger than needed
+            largest = VARIANT_SIZES[-1][1]
+            source.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e))
+
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    image.info = {}
+
+    stem = os.path.splitext(path)[0]
+    variants = []
+    for name, size in VARIANT_SIZES:
+        scaled = image.copy()
+        scaled.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            filename = f"{stem}-{name}.{fmt}"
+            # Written aside and swapped in: a re-upload of the same file rebuilds variants being served
+            if fmt == "avif":
+                scaled.save(f"{filename}.tmp", "AVIF", quality=AVIF_QUALITY)
+            else:
+                scaled.save(f"{filename}.tmp", "WEBP", quality=WEBP_QUALITY, method=4)
+            os.replace(f"{filename}.tmp", filename)
+            variants.append({
+                "name": name,
+                "format": fmt,
+                "file": os.path.basename(filename),
+                "width": scaled.size[0],
+                "height": scaled.size[1]
+            })
+        if max(width, height) <= size:
+            break
+    return {"width": width, "height": height, "variants": variants}
+
+
+# ============== POOL ==============
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_formats: Optional[List[str]] = None
+
+
+def output_formats() -> List[str]:
+    global _formats
+    if _formats is None:
+        formats = ["webp"]
+        if IMAGE_AVIF:
+            try:
+                import pillow_avif  # noqa: F401  registers the AVIF plugin
+            except ImportError:
+                pass
+            Image.init()
+            if "AVIF" in Image.SAVE:
+                formats.append("avif")
+            else:
+                print("[ERROR] IMAGE_AVIF is on but this Pillow cannot write AVIF; writing WebP only")
+        _formats = formats
+    return _formats
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs the event loop and its threads can deadlock
+            _pool = ProcessPoolExecutor(
+                max_workers=IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def derive(path: str, url: str) -> Optional[dict]:
+    """
+    Build the variants of the image at `path`, served at `url`, and return its
+    image_variants entry. Raises InvalidImage for files Pillow cannot decode;
+    returns None (the original is still usable) if processing fails otherwise.
+    """
+    global _pool
+    try:
+        rendered = _get_pool().submit(_render, path, output_formats()).result(timeout=IMAGE_TIMEOUT_SECONDS)
+    except InvalidImage:
+        raise
+    except BrokenProcessPool as e:
+        # A worker died (out of memory on a huge image); start a fresh pool next time
+        with _pool_lock:
+            _pool = None
+        print(f"[ERROR] Image pool failed on {url}: {e}")
+        return None
+    except (TimeoutError, OSError) as e:
+        print(f"[ERROR] Image variants for {url} failed: {e!r}")
+        return None
+
+    base_url = url.rsplit("/", 1)[0]
+    for variant in rendered["variants"]:
+        variant["url"] = f"{base_url}/{variant.pop('file')}"
+    return rendered
+
+
+def variant_urls(url: str) -> List[str]:
+    """Every URL _render can write a variant of `url` to, whether or not it exists"""
+    stem = url.rsplit(".", 1)[0]
+    return [f"{stem}-{name}.{fmt}" for name, _ in VARIANT_SIZES for fmt in ("webp", "avif")]
+
+
+def describe(variants_by_url: Optional[Dict[str, dict]], url: Optional[str]) -> Optional[dict]:
+    """The image_variants entry for `url`, or None when it has no variants"""
+    if not url or not variants_by_url:
+        return None
+    return variants_by_url.get(url)
+
+
+# ============== BACKFILL ==============
+
+def _local_path(url: Optional[str]) -> Optional[str]:
+    if not url or not url.startswith("/uploads/"):
+        return None
+    path = os.path.join(BACKEND_DIR, url.lstrip("/"))
+    return path if os.path.isfile(path) else None
+
+
+def _backfill_urls(row, urls: List[Optional[str]], force: bool) -> int:
+    variants_by_url = dict(row.image_variants or {})
+    built = 0
+    for url in urls:
+        path = _local_path(url)
+        if path is None or (url in variants_by_url and not force) or path.endswith(".svg"):
+            continue
+        try:
+            entry = derive(path, url)
+        except InvalidImage as e:
+            print(f"[ERROR] Skipping {url}: {e}")
+            continue
+        if entry:
+            variants_by_url[url] = entry
+            built += 1
+    if built:
+        row.image_variants = variants_by_url
+    return built
+
+
+def backfill(force: bool = False) -> int:
+    """Build variants for uploaded images that have none; returns how many were built"""
+    from database.database import SessionLocal
+    from database.models import Product, Reseller, StorefrontConfig
+
+    db = SessionLocal()
+    built = 0
+    try:
+        for reseller in db.query(Reseller).filter(Reseller.logo_url.like("/uploads/%")).all():
+            built += _backfill_urls(reseller, [reseller.logo_url], force)
+        for config in db.query(StorefrontConfig).filter(StorefrontConfig.hero_image.like("/uploads/%")).all():
+            built += _backfill_urls(config, [config.hero_image], force)
+        for product in db.query(Product).all():
+            urls = [product.primary_image] + [url for url in product.images or [] if url != product.primary_image]
+            built += _backfill_urls(product, urls, force)
+        db.commit()
+    finally:
+        db.close()
+        shutdown_pool()
+    return built
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build resized variants of uploaded images")
+    parser.add_argument("--backfill", action="store_true", help="build variants for uploads that have none")
+    parser.add_argument("--force", action="store_true", help="rebuild variants that already exist")
+    args = parser.parse_args()
+
+    if args.backfill:
+        print(f"[OK] Built variants for {backfill(force=args.force)} images")
+    else:
+        parser.print_help()
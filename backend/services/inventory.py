@@ -0,0 +1,173 @@
+"""
+Stock changes with incremental low-stock detection.
+
+All stock writes go through `set_stock` so threshold crossings are detected
+at the point of change instead of by scanning products:
+
+    above threshold -> at/below threshold   raises a low_stock alert
+    above zero      -> zero                 raises an out_of_stock alert
+    zero            -> at/below, above zero  moves an open out_of_stock alert
+                                             to low_stock
+    at/below        -> above threshold      resolves open alerts
+
+New alerts stay queued (notified_at is null) until the background
+notifier posts them to ALERT_WEBHOOK_URL, one JSON batch per pass, for an
+email or chat integration to deliver to the manufacturer. A failed post
+puts the batch back in the queue. Without a webhook the notifier does not
+run, and alerts are only listed on the manufacturer dashboard.
+"""
+
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List
+import asyncio
+import os
+
+from database.models import Manufacturer, Product, LowStockAlert
+
+ALERT_NOTIFY_INTERVAL = int(os.getenv("ALERT_NOTIFY_INTERVAL", "30"))
+ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+ALERT_WEBHOOK_TIMEOUT = float(os.getenv("ALERT_WEBHOOK_TIMEOUT", "10"))
+
+
+def set_stock(db: Session, product: Product, new_quantity: int) -> None:
+    """Write a product's stock level and record any threshold crossing"""
+    old_quantity = product.stock_quantity or 0
+    product.stock_quantity = new_quantity
+
+    if not product.track_inventory or old_quantity == new_quantity:
+        return
+
+    threshold = product.low_stock_threshold or 0
+
+    if new_quantity > threshold:
+        if old_quantity <= threshold:
+            db.query(LowStockAlert).filter(
+                LowStockAlert.product_id == product.id,
+                LowStockAlert.resolved_at.is_(None)
+            ).update({"resolved_at": datetime.utcnow()}, synchronize_session=False)
+        return
+
+    if old_quantity <= 0 < new_quantity:
+        # Partly restocked: still low, no longer out
+        db.query(LowStockAlert).filter(
+            LowStockAlert.product_id == product.id,
+            LowStockAlert.kind == "out_of_stock",
+            LowStockAlert.resolved_at.is_(None)
+        ).update({"kind": "low_stock", "stock_quantity": new_quantity}, synchronize_session=False)
+        return
+
+    if old_quantity > 0 and new_quantity <= 0:
+        kind = "out_of_stock"
+    elif old_quantity > threshold:
+        kind = "low_stock"
+    else:
+        return
+
+    db.add(LowStockAlert(
+        manufacturer_id=product.manufacturer_id,
+        product_id=product.id,
+        kind=kind,
+        stock_quantity=new_quantity,
+        threshold=threshold
+    ))
+
+
+def decrement_stock(db: Session, product: Product, quantity: int) -> None:
+    set_stock(db, product, (product.stock_quantity or 0) - quantity)
+
+
+def get_open_alerts(db: Session, manufacturer_id: int, include_resolved: bool = False, limit: int = 100) -> List[LowStockAlert]:
+    query = db.query(LowStockAlert).filter(LowStockAlert.manufacturer_id == manufacturer_id)
+    if not include_resolved:
+        query = query.filter(LowStockAlert.resolved_at.is_(None))
+    return query.order_by(LowStockAlert.created_at.desc()).limit(limit).all()
+
+
+def drain_notifications(db: Session, limit: int = 500) -> List[LowStockAlert]:
+    """Claim queued alerts for notification"""
+    alerts = db.query(LowStockAlert).filter(
+        LowStockAlert.notified_at.is_(None)
+    ).order_by(LowStockAlert.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    now = datetime.utcnow()
+    for alert in alerts:
+        alert.notified_at = now
+    db.commit()
+    return alerts
+
+
+def release_notifications(db: Session, alerts: List[LowStockAlert]) -> None:
+    """Put claimed alerts back in the queue"""
+    db.rollback()
+    db.query(LowStockAlert).filter(
+        LowStockAlert.id.in_([alert.id for alert in alerts])
+    ).update({"notified_at": None}, synchronize_session=False)
+    db.commit()
+
+
+def notification_payload(db: Session, alerts: List[LowStockAlert]) -> dict:
+    """Webhook body for claimed alerts; alerts whose manufacturer is gone are left out"""
+    manufacturer_ids = {alert.manufacturer_id for alert in alerts}
+    product_ids = {alert.product_id for alert in alerts}
+    manufacturers = {
+        row.id: row for row in db.query(
+            Manufacturer.id, Manufacturer.company_name, Manufacturer.contact_email
+        ).filter(Manufacturer.id.in_(manufacturer_ids))
+    }
+    products = dict(db.query(Product.id, Product.name).filter(Product.id.in_(product_ids)).all())
+
+    payload = []
+    for alert in alerts:
+        manufacturer = manufacturers.get(alert.manufacturer_id)
+        if manufacturer is None:
+            print(f"[ERROR] Low-stock alert {alert.id}: manufacturer {alert.manufacturer_id} not found, not notifying")
+            continue
+        payload.append({
+            "id": alert.id,
+            "kind": alert.kind,
+            "manufacturer_id": alert.manufacturer_id,
+            "manufacturer_name": manufacturer.company_name,
+            "contact_email": manufacturer.contact_email,
+            "product_id": alert.product_id,
+            "product_name": products.get(alert.product_id),
+            "stock_quantity": alert.stock_quantity,
+            "threshold": alert.threshold,
+            "created_at": alert.created_at.isoformat() if alert.created_at else None
+        })
+    return {"alerts": payload}
+
+
+def _notify_pending() -> int:
+    """Post queued alerts to ALERT_WEBHOOK_URL; returns how many were delivered"""
+    import httpx
+    from database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        alerts = drain_notifications(db)
+        if not alerts:
+            return 0
+        payload = notification_payload(db, alerts)
+        if not payload["alerts"]:
+            return 0
+        try:
+            response = httpx.post(ALERT_WEBHOOK_URL, json=payload, timeout=ALERT_WEBHOOK_TIMEOUT)
+            response.raise_for_status()
+        except Exception:
+            sent = {alert["id"] for alert in payload["alerts"]}
+            release_notifications(db, [alert for alert in alerts if alert.id in sent])
+            raise
+        return len(payload["alerts"])
+    finally:
+        db.close()
+
+
+async def run_notifier(interval: int = ALERT_NOTIFY_INTERVAL) -> None:
+    """Background loop draining the low-stock notification queue"""
+    while True:
+        try:
+            await asyncio.to_thread(_notify_pending)
+        except Exception as e:
+            print(f"[ERROR] Low-stock notification failed: {e}")
+        await asyncio.sleep(interval)
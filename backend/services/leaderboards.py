@@ -0,0 +1,283 @@
+"""
+Best-seller leaderboards from incrementally maintained sales counters.
+
+`product_sales_stats` holds one row per (reseller, product) with units sold,
+orders, item revenue and commission. Checkout adds an order's items in the
+same transaction as the order; cancelling an order subtracts them again (and
+un-cancelling adds them back). Per-reseller rankings read the
+(reseller_id, units_sold) index directly; per-manufacturer rankings sum the
+rows for that manufacturer's products instead of scanning order items.
+
+Rebuild from order history with:
+    python -m services.leaderboards
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, List
+
+from database.models import Order, OrderItem, Product, Reseller, ProductSalesStats
+
+CANCELLED = "cancelled"
+RANK_COLUMNS = {
+    "units": ProductSalesStats.units_sold,
+    "revenue": ProductSalesStats.revenue
+}
+
+
+def _bump(
+    db: Session,
+    reseller_id: int,
+    product_id: int,
+    manufacturer_id: int,
+    units: int,
+    orders: int,
+    revenue: float,
+    commission: float
+) -> None:
+    """Add deltas to a counter row, creating it if needed"""
+    dialect = db.get_bind().dialect.name
+    values = {
+        "reseller_id": reseller_id,
+        "product_id": product_id,
+        "manufacturer_id": manufacturer_id,
+        "units_sold": units,
+        "orders": orders,
+        "revenue": revenue,
+        "commission": commission
+    }
+
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        table = ProductSalesStats.__table__
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["reseller_id", "product_id"],
+            set_={
+                "units_sold": table.c.units_sold + stmt.excluded.units_sold,
+                "orders": table.c.orders + stmt.excluded.orders,
+                "revenue": table.c.revenue + stmt.excluded.revenue,
+                "commission": table.c.commission + stmt.excluded.commission,
+                "updated_at": func.now()
+            }
+        )
+        db.execute(stmt)
+        return
+
+    row = db.query(ProductSalesStats).filter(
+        ProductSalesStats.reseller_id == reseller_id,
+        ProductSalesStats.product_id == product_id
+    ).with_for_update().first()
+    if row is None:
+        db.add(ProductSalesStats(**values))
+        db.flush()
+    else:
+        row.units_sold += units
+        row.orders += orders
+        row.revenue += revenue
+        row.commission += commission
+
+
+def _apply_items(db: Session, order: Order, sign: int) -> None:
+    # Sessions run with autoflush off; make just-added items visible
+    db.flush()
+    items = db.query(
+        OrderItem.product_id,
+        Product.manufacturer_id,
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.total_price),
+        func.sum(OrderItem.commission_amount)
+    ).join(
+        Product, Product.id == OrderItem.product_id
+    ).filter(
+        OrderItem.order_id == order.id
+    ).group_by(OrderItem.product_id, Product.manufacturer_id).all()
+
+    for product_id, manufacturer_id, quantity, revenue, commission in items:
+        _bump(
+            db,
+            order.reseller_id,
+            product_id,
+            manufacturer_id,
+            sign * int(quantity or 0),
+            sign,
+            sign * float(revenue or 0),
+            sign * float(commission or 0)
+        )
+
+
+def record_order_created(db: Session, order: Order) -> None:
+    """Count a newly placed order's items; call after the items are added"""
+    if order.status != CANCELLED:
+        _apply_items(db, order, 1)
+
+
+def record_status_change(db: Session, order: Order, old_status: str, new_status: str) -> None:
+    """Remove an order's items on cancellation, restore them if it is reinstated"""
+    if old_status == new_status:
+        return
+    if new_status == CANCELLED:
+        _apply_items(db, order, -1)
+    elif old_status == CANCELLED:
+        _apply_items(db, order, 1)
+
+
+def top_products_for_reseller(db: Session, reseller_id: int, limit: int = 10, rank_by: str = "units") -> List[dict]:
+    column = RANK_COLUMNS[rank_by]
+    rows = db.query(
+        ProductSalesStats,
+        Product.name
+    ).join(
+        Product, Product.id == ProductSalesStats.product_id
+    ).filter(
+        ProductSalesStats.reseller_id == reseller_id,
+        ProductSalesStats.units_sold > 0
+    ).order_by(
+        column.desc(),
+        ProductSalesStats.product_id
+    ).limit(limit).all()
+
+    return [
+        {
+            "product_id": stats.product_id,
+            "name": name,
+            "units_sold": stats.units_sold,
+            "orders": stats.orders,
+            "revenue": round(stats.revenue, 2),
+            "commission": round(stats.commission, 2)
+        }
+        for stats, name in rows
+    ]
+
+
+def top_products_for_manufacturer(db: Session, manufacturer_id: int, limit: int = 10, rank_by: str = "units") -> List[dict]:
+    units = func.sum(ProductSalesStats.units_sold)
+    revenue = func.sum(ProductSalesStats.revenue)
+    rows = db.query(
+        ProductSalesStats.product_id,
+        Product.name,
+        units,
+        func.sum(ProductSalesStats.orders),
+        revenue,
+        func.sum(ProductSalesStats.commission)
+    ).join(
+        Product, Product.id == ProductSalesStats.product_id
+    ).filter(
+        ProductSalesStats.manufacturer_id == manufacturer_id
+    ).group_by(
+        ProductSalesStats.product_id,
+        Product.name
+    ).having(
+        units > 0
+    ).order_by(
+        (units if rank_by == "units" else revenue).desc(),
+        ProductSalesStats.product_id
+    ).limit(limit).all()
+
+    return [
+        {
+            "product_id": product_id,
+            "name": name,
+            "units_sold": int(units_sold),
+            "orders": int(orders),
+            "revenue": round(float(product_revenue), 2),
+            "commission": round(float(commission), 2)
+        }
+        for product_id, name, units_sold, orders, product_revenue, commission in rows
+    ]
+
+
+def top_resellers_for_manufacturer(db: Session, manufacturer_id: int, limit: int = 10, rank_by: str = "units") -> List[dict]:
+    units = func.sum(ProductSalesStats.units_sold)
+    revenue = func.sum(ProductSalesStats.revenue)
+    rows = db.query(
+        ProductSalesStats.reseller_id,
+        Reseller.business_name,
+        units,
+        func.sum(ProductSalesStats.orders),
+        revenue
+    ).join(
+        Reseller, Reseller.id == ProductSalesStats.reseller_id
+    ).filter(
+        ProductSalesStats.manufacturer_id == manufacturer_id
+    ).group_by(
+        ProductSalesStats.reseller_id,
+        Reseller.business_name
+    ).having(
+        units > 0
+    ).order_by(
+        (units if rank_by == "units" else revenue).desc(),
+        ProductSalesStats.reseller_id
+    ).limit(limit).all()
+
+    return [
+        {
+            "reseller_id": reseller_id,
+            "business_name": business_name,
+            "units_sold": int(units_sold),
+            "orders": int(orders),
+            "revenue": round(float(reseller_revenue), 2)
+        }
+        for reseller_id, business_name, units_sold, orders, reseller_revenue in rows
+    ]
+
+
+def rebuild_leaderboards(db: Session, batch_size: int = 5000) -> int:
+    """Recompute every counter row from non-cancelled orders; returns rows written"""
+    db.query(ProductSalesStats).delete(synchronize_session=False)
+
+    query = db.query(
+        Order.reseller_id,
+        OrderItem.order_id,
+        OrderItem.product_id,
+        Product.manufacturer_id,
+        OrderItem.quantity,
+        OrderItem.total_price,
+        OrderItem.commission_amount
+    ).join(
+        Order, Order.id == OrderItem.order_id
+    ).join(
+        Product, Product.id == OrderItem.product_id
+    ).filter(
+        Order.status != CANCELLED
+    )
+
+    counters: Dict[tuple, list] = {}
+    for row in query.yield_per(batch_size):
+        key = (row.reseller_id, row.product_id)
+        counter = counters.setdefault(key, [row.manufacturer_id, 0, set(), 0.0, 0.0])
+        counter[1] += row.quantity or 0
+        counter[2].add(row.order_id)
+        counter[3] += row.total_price or 0
+        counter[4] += row.commission_amount or 0
+
+    db.bulk_insert_mappings(ProductSalesStats, [
+        {
+            "reseller_id": reseller_id,
+            "product_id": product_id,
+            "manufacturer_id": manufacturer_id,
+            "units_sold": units,
+            "orders": len(order_ids),
+            "revenue": revenue,
+            "commission": commission
+        }
+        for (reseller_id, product_id), (manufacturer_id, units, order_ids, revenue, commission) in counters.items()
+    ])
+    db.commit()
+    return len(counters)
+
+
+if __name__ == "__main__":
+    from database.database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        count = rebuild_leaderboards(db)
+        print(f"[OK] Rebuilt {count} product sales counters")
+    finally:
+        db.close()
@@ -0,0 +1,268 @@
+"""
+Commission ledger and materialized reseller balances.
+
+Every change to a reseller's available balance appends a row to
+`commission_ledger` and updates the single `reseller_balances` row in the
+same transaction:
+
+    order delivered        -> credit  (available += commission)
+    delivered order undone -> debit   (available -= commission)
+    payout requested       -> debit   (available -= amount, pending += amount)
+    payout failed/rejected -> credit  (available += amount, pending -= amount)
+    payout completed       -> no entry (pending -= amount, total_paid += amount)
+
+Payout reservations use a conditional UPDATE on the locked balance row, so two
+concurrent requests can never both spend the same balance. Bank reconciliation
+settles a whole file with settle_payouts: one UPDATE per reseller, not one
+lock and update per payout.
+
+Rebuild balances from order/payout history with:
+    python -m services.ledger
+"""
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Dict, Optional, Sequence
+
+from database.models import (
+    Order, Payout, CommissionLedgerEntry, ResellerBalance, LedgerEntryType
+)
+
+MINIMUM_PAYOUT = 100.0
+
+# Reseller ids per locking SELECT in settle_payouts
+SETTLE_CHUNK_SIZE = 500
+
+
+def lock_balance(db: Session, reseller_id: int) -> ResellerBalance:
+    """Fetch the reseller's balance row FOR UPDATE, creating it on first use"""
+    balance = db.query(ResellerBalance).filter(
+        ResellerBalance.reseller_id == reseller_id
+    ).with_for_update().first()
+    if balance is not None:
+        return balance
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        db.execute(
+            insert(ResellerBalance.__table__)
+            .values(reseller_id=reseller_id, available=0, pending=0, total_earned=0, total_paid=0)
+            .on_conflict_do_nothing(index_elements=["reseller_id"])
+        )
+    else:
+        db.add(ResellerBalance(reseller_id=reseller_id, available=0, pending=0, total_earned=0, total_paid=0))
+        db.flush()
+
+    return db.query(ResellerBalance).filter(
+        ResellerBalance.reseller_id == reseller_id
+    ).with_for_update().one()
+
+
+def get_balance(db: Session, reseller_id: int) -> Optional[ResellerBalance]:
+    return db.query(ResellerBalance).filter(ResellerBalance.reseller_id == reseller_id).first()
+
+
+def _append(
+    db: Session,
+    balance: ResellerBalance,
+    entry_type: LedgerEntryType,
+    reason: str,
+    amount: float,
+    order_id: Optional[int] = None,
+    payout_id: Optional[int] = None
+) -> None:
+    db.add(CommissionLedgerEntry(
+        reseller_id=balance.reseller_id,
+        entry_type=entry_type.value,
+        reason=reason,
+        amount=amount,
+        balance_after=balance.available,
+        order_id=order_id,
+        payout_id=payout_id
+    ))
+
+
+def apply_order_status_change(db: Session, order: Order, old_status: str, new_status: str) -> None:
+    """Credit commission when an order is delivered, debit it if delivery is undone"""
+    if old_status == new_status or "delivered" not in (old_status, new_status):
+        return
+
+    commission = order.reseller_commission or 0
+    if commission == 0:
+        return
+
+    balance = lock_balance(db, order.reseller_id)
+    if new_status == "delivered":
+        balance.available += commission
+        balance.total_earned += commission
+        _append(db, balance, LedgerEntryType.CREDIT, "order_delivered", commission, order_id=order.id)
+    else:
+        balance.available -= commission
+        balance.total_earned -= commission
+        _append(db, balance, LedgerEntryType.DEBIT, "order_reversed", commission, order_id=order.id)
+
+
+def reserve_payout(db: Session, reseller_id: int, requested: Optional[float]) -> float:
+    """Move funds from available to pending; returns the reserved amount"""
+    balance = lock_balance(db, reseller_id)
+
+    if balance.available <= 0:
+        raise HTTPException(status_code=400, detail="No available balance for payout")
+
+    amount = requested if requested and requested <= balance.available else balance.available
+    amount = round(amount, 2)
+
+    if amount < MINIMUM_PAYOUT:
+        raise HTTPException(status_code=400, detail="Minimum payout amount is Rs.100")
+
+    # Conditional update guards backends without row locks (SQLite)
+    result = db.execute(
+        update(ResellerBalance)
+        .where(
+            ResellerBalance.reseller_id == reseller_id,
+            ResellerBalance.available >= amount
+        )
+        .values(
+            available=ResellerBalance.available - amount,
+            pending=ResellerBalance.pending + amount
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise HTTPException(status_code=409, detail="Balance changed, please retry")
+
+    db.refresh(balance)
+    return amount
+
+
+def record_payout_requested(db: Session, payout: Payout) -> None:
+    """Ledger entry for a payout whose funds were reserved via reserve_payout"""
+    balance = lock_balance(db, payout.reseller_id)
+    _append(db, balance, LedgerEntryType.DEBIT, "payout_requested", payout.amount, payout_id=payout.id)
+
+
+def release_payout(db: Session, payout: Payout) -> None:
+    """Return a failed or rejected payout's funds to the available balance"""
+    balance = lock_balance(db, payout.reseller_id)
+    balance.available += payout.amount
+    balance.pending -= payout.amount
+    _append(db, balance, LedgerEntryType.CREDIT, "payout_reversed", payout.amount, payout_id=payout.id)
+
+
+def complete_payout(db: Session, payout: Payout) -> None:
+    balance = lock_balance(db, payout.reseller_id)
+    balance.pending -= payout.amount
+    balance.total_paid += payout.amount
+
+
+def settle_payouts(db: Session, completed: Sequence, failed: Sequence) -> None:
+    """
+    complete_payout / release_payout for many payouts at once. Rows need id,
+    reseller_id and amount. Balances are locked in reseller id order, so two
+    settlements never wait on each other's locks in opposite orders.
+    """
+    paid: Dict[int, float] = defaultdict(float)
+    released: Dict[int, float] = defaultdict(float)
+    for payout in completed:
+        paid[payout.reseller_id] += payout.amount
+    for payout in failed:
+        released[payout.reseller_id] += payout.amount
+
+    reseller_ids = sorted(set(paid) | set(released))
+    available: Dict[int, float] = {}
+    for i in range(0, len(reseller_ids), SETTLE_CHUNK_SIZE):
+        chunk = reseller_ids[i:i + SETTLE_CHUNK_SIZE]
+        available.update(db.query(
+            ResellerBalance.reseller_id,
+            ResellerBalance.available
+        ).filter(
+            ResellerBalance.reseller_id.in_(chunk)
+        ).order_by(ResellerBalance.reseller_id).with_for_update().all())
+    for reseller_id in reseller_ids:
+        if reseller_id not in available:
+            available[reseller_id] = lock_balance(db, reseller_id).available
+
+    # One reversal entry per failed payout, each with the balance after it
+    entries = []
+    for payout in sorted(failed, key=lambda p: p.id):
+        available[payout.reseller_id] += payout.amount
+        entries.append({
+            "reseller_id": payout.reseller_id,
+            "entry_type": LedgerEntryType.CREDIT.value,
+            "reason": "payout_reversed",
+            "amount": payout.amount,
+            "balance_after": available[payout.reseller_id],
+            "payout_id": payout.id
+        })
+    if entries:
+        db.execute(insert(CommissionLedgerEntry.__table__), entries)
+
+    for reseller_id in reseller_ids:
+        db.execute(
+            update(ResellerBalance)
+            .where(ResellerBalance.reseller_id == reseller_id)
+            .values(
+                available=ResellerBalance.available + released[reseller_id],
+                pending=ResellerBalance.pending - released[reseller_id] - paid[reseller_id],
+                total_paid=ResellerBalance.total_paid + paid[reseller_id]
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+def rebuild_balances(db: Session) -> int:
+    """Recreate balance rows (with an opening ledger entry) from history"""
+    earned = dict(db.query(
+        Order.reseller_id,
+        func.sum(Order.reseller_commission)
+    ).filter(Order.status == "delivered").group_by(Order.reseller_id).all())
+
+    pending = dict(db.query(
+        Payout.reseller_id,
+        func.sum(Payout.amount)
+    ).filter(Payout.status.in_(["pending", "processing"])).group_by(Payout.reseller_id).all())
+
+    paid = dict(db.query(
+        Payout.reseller_id,
+        func.sum(Payout.amount)
+    ).filter(Payout.status == "completed").group_by(Payout.reseller_id).all())
+
+    db.query(CommissionLedgerEntry).delete(synchronize_session=False)
+    db.query(ResellerBalance).delete(synchronize_session=False)
+
+    reseller_ids = set(earned) | set(pending) | set(paid)
+    for reseller_id in reseller_ids:
+        total_earned = float(earned.get(reseller_id) or 0)
+        total_pending = float(pending.get(reseller_id) or 0)
+        total_paid = float(paid.get(reseller_id) or 0)
+        balance = ResellerBalance(
+            reseller_id=reseller_id,
+            available=total_earned - total_pending - total_paid,
+            pending=total_pending,
+            total_earned=total_earned,
+            total_paid=total_paid
+        )
+        db.add(balance)
+        entry_type = LedgerEntryType.CREDIT if balance.available >= 0 else LedgerEntryType.DEBIT
+        _append(db, balance, entry_type, "opening_balance", abs(balance.available))
+
+    db.commit()
+    return len(reseller_ids)
+
+
+if __name__ == "__main__":
+    from database.database import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        count = rebuild_balances(db)
+        print(f"[OK] Rebuilt balances for {count} resellers")
+    finally:
+        db.close()
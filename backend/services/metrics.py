@@ -0,0 +1,376 @@
+"""
+Prometheus metrics for GET /api/metrics.
+
+Served in the Prometheus text format:
+
+    http_requests_total{method,route,status}          requests by route template
+    http_request_duration_seconds{method,route}       latency histogram
+    http_requests_in_flight                           requests being handled
+    db_pool_checkout_wait_seconds{engine}             wait for a pooled connection
+    db_pool_connections{engine,state}                 checked out / idle / overflow
+    cache_requests_total{cache,result}                hits and misses per cache
+    cache_entries{cache}
+    queue_depth{queue}                                analytics buffer, password hashing
+    analytics_events_total{outcome}                   accepted / dropped / flushed
+    password_hashes_total{outcome}                    completed / rejected
+    rate_limit_requests_total{rule,outcome}           allowed / limited
+
+Request metrics are plain dicts only touched from the event loop thread, so
+the request path takes no lock; the other counters are read from the
+services that already keep them when a scrape comes in.
+
+Each uvicorn worker has its own counters. With several workers set
+METRICS_DIR to a directory they share: every worker writes a snapshot there
+each METRICS_FLUSH_INTERVAL seconds (and on shutdown), and a scrape, which
+lands on any one worker, adds its live counters to the other workers' files.
+Counters of workers that have exited are kept so totals never go backwards;
+gauges only count live workers. Empty the directory when the server starts.
+
+Set METRICS_TOKEN to require `Authorization: Bearer <token>` on scrapes.
+"""
+
+from fastapi import HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.pool import QueuePool
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import glob
+import json
+import os
+import threading
+import time
+
+from database.database import engine, replica_engines
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+HELP = {
+    "http_requests_total": "Requests handled, by route template and status",
+    "http_request_duration_seconds": "Time from request start to response end",
+    "http_requests_in_flight": "Requests being handled",
+    "db_pool_checkout_wait_seconds": "Time waiting to get a connection from the pool",
+    "db_pool_connections": "Pooled connections by state",
+    "cache_requests_total": "In-process cache lookups by result",
+    "cache_entries": "Entries in each in-process cache",
+    "queue_depth": "Work waiting in in-process queues",
+    "analytics_events_total": "Storefront analytics events by outcome",
+    "password_hashes_total": "Password hash jobs by outcome",
+    "rate_limit_requests_total": "Rate-limited requests by rule and outcome",
+}
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # labels -> per-bucket counts (the last one is +Inf) followed by the sum
+        self.series: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def snapshot(self, labelnames: List[str]) -> dict:
+        return {
+            "labels": labelnames,
+            "buckets": list(self.buckets),
+            "series": [[list(labels), values[:-1], values[-1]] for labels, values in self.series.items()]
+        }
+
+
+class WorkerMetrics:
+    """This worker's request and pool counters"""
+
+    def __init__(self):
+        # Event loop thread only
+        self.requests: Dict[tuple, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.in_flight = 0
+        # Observed from threadpool threads when handlers open sessions
+        self.pool_wait = Histogram(POOL_WAIT_BUCKETS)
+        self._pool_lock = threading.Lock()
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, str(status))
+        self.requests[key] = self.requests.get(key, 0) + 1
+        self.latency.observe((method, route), seconds)
+
+    def observe_pool_wait(self, name: str, seconds: float) -> None:
+        with self._pool_lock:
+            self.pool_wait.observe((name,), seconds)
+
+    def snapshot(self) -> dict:
+        """Everything this worker reports; call from the event loop thread"""
+        from services import analytics, passwords, principals, order_search, ratelimit
+
+        caches = {"principals": principals.principal_cache, "order_tracking": order_search.tracking_cache}
+        buffer = analytics.event_buffer
+        hashing = passwords.hash_pool
+        limiter = ratelimit.limiter
+
+        with self._pool_lock:
+            pool_wait = self.pool_wait.snapshot(["engine"])
+
+        return {
+            "pid": os.getpid(),
+            "counters": {
+                "http_requests_total": _series(["method", "route", "status"], self.requests.items()),
+                "cache_requests_total": _series(["cache", "result"], [
+                    item
+                    for name, cache in caches.items()
+                    for item in (((name, "hit"), cache.hits), ((name, "miss"), cache.misses))
+                ]),
+                "analytics_events_total": _series(["outcome"], [
+                    (("accepted",), buffer.accepted), (("dropped",), buffer.dropped), (("flushed",), buffer.flushed)
+                ]),
+                "password_hashes_total": _series(["outcome"], [
+                    (("completed",), hashing.completed), (("rejected",), hashing.rejected)
+                ]),
+                "rate_limit_requests_total": _series(["rule", "outcome"], [
+                    ((rule, outcome), counts[rule])
+                    for outcome, counts in (("allowed", limiter.allowed), ("limited", limiter.limited))
+                    for rule in limiter.rules
+                ]),
+            },
+            "histograms": {
+                "http_request_duration_seconds": self.latency.snapshot(["method", "route"]),
+                "db_pool_checkout_wait_seconds": pool_wait,
+            },
+            "gauges": {
+                "http_requests_in_flight": _series([], [((), self.in_flight)]),
+                "db_pool_connections": _series(["engine", "state"], _pool_gauges()),
+                "cache_entries": _series(["cache"], [((name,), len(cache)) for name, cache in caches.items()]),
+                "queue_depth": _series(["queue"], [
+                    (("analytics_events",), len(buffer)),
+                    (("password_hash",), max(0, hashing.in_flight - hashing.workers))
+                ]),
+            },
+        }
+
+
+def _series(labelnames: List[str], items) -> dict:
+    return {"labels": labelnames, "series": [[list(labels), value] for labels, value in items]}
+
+
+def _engines() -> List[Tuple[str, object]]:
+    return [("primary", engine)] + [(f"replica-{index}", bound) for index, bound in enumerate(replica_engines)]
+
+
+def _pool_gauges():
+    for name, bound in _engines():
+        pool = bound.pool
+        if isinstance(pool, QueuePool):
+            yield (name, "checked_out"), pool.checkedout()
+            yield (name, "idle"), pool.checkedin()
+            yield (name, "overflow"), max(0, pool.overflow())
+
+
+worker = WorkerMetrics()
+
+
+def instrument_pool(name: str, bound) -> None:
+    """Time every connection checkout from `bound`'s pool"""
+    pool = bound.pool
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            worker.observe_pool_wait(name, time.perf_counter() - started)
+
+    pool.connect = timed_connect
+
+
+for _name, _bound in _engines():
+    instrument_pool(_name, _bound)
+
+
+# ============== REQUESTS ==============
+
+_route_templates: Dict[object, str] = {}
+
+
+def route_template(scope) -> str:
+    """Route path the request matched, e.g. /api/store/{slug}; keeps label cardinality bounded"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if not _route_templates:
+        for route in scope["app"].routes:
+            _route_templates[getattr(route, "endpoint", None) or getattr(route, "app", None)] = route.path
+    return _route_templates.get(endpoint, "unmatched")
+
+
+class MetricsMiddleware:
+    """Counts requests and their latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        worker.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            worker.in_flight -= 1
+            worker.observe_request(scope["method"], route_template(scope), status, time.perf_counter() - started)
+
+
+# ============== AGGREGATION ==============
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"worker-{pid}.json")
+
+
+def write_snapshot(snapshot: dict) -> None:
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = _snapshot_path(snapshot["pid"])
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(snapshot, f)
+    # Readers never see a half-written file
+    os.replace(f"{path}.tmp", path)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _other_workers(pid: int) -> List[dict]:
+    snapshots = []
+    for path in glob.glob(os.path.join(METRICS_DIR, "worker-*.json")):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if snapshot.get("pid") != pid:
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def merge(snapshots: List[dict], live: Optional[set] = None) -> dict:
+    """Add up workers' snapshots; gauges only from pids in `live` (all when None)"""
+    merged = {"counters": {}, "histograms": {}, "gauges": {}}
+    for snapshot in snapshots:
+        for kind in ("counters", "gauges"):
+            if kind == "gauges" and live is not None and snapshot["pid"] not in live:
+                continue
+            for name, metric in snapshot[kind].items():
+                target = merged[kind].setdefault(name, {"labels": metric["labels"], "values": {}})
+                for labels, value in metric["series"]:
+                    key = tuple(labels)
+                    target["values"][key] = target["values"].get(key, 0) + value
+        for name, metric in snapshot["histograms"].items():
+            target = merged["histograms"].setdefault(
+                name, {"labels": metric["labels"], "buckets": metric["buckets"], "values": {}}
+            )
+            for labels, counts, total in metric["series"]:
+                key = tuple(labels)
+                current = target["values"].get(key)
+                if current is None:
+                    target["values"][key] = [list(counts), total]
+                else:
+                    current[0] = [a + b for a, b in zip(current[0], counts)]
+                    current[1] += total
+    return merged
+
+
+# ============== EXPOSITION ==============
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(merged: dict) -> str:
+    lines = []
+    for kind, prom_type in (("counters", "counter"), ("gauges", "gauge")):
+        for name, metric in sorted(merged[kind].items()):
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {prom_type}")
+            for labels, value in sorted(metric["values"].items()):
+                lines.append(f"{name}{_labels(metric['labels'], labels)} {_number(value)}")
+    for name, metric in sorted(merged["histograms"].items()):
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        bounds = [_number(bound) for bound in metric["buckets"]] + ["+Inf"]
+        for labels, (counts, total) in sorted(metric["values"].items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_labels(metric['labels'], labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(metric['labels'], labels)} {repr(float(total))}")
+            lines.append(f"{name}_count{_labels(metric['labels'], labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _render_all(local: dict) -> str:
+    if not METRICS_DIR:
+        return render(merge([local]))
+    others = _other_workers(local["pid"])
+    live = {local["pid"]} | {snapshot["pid"] for snapshot in others if _alive(snapshot["pid"])}
+    return render(merge([local] + others, live))
+
+
+async def metrics_response(request: Request) -> PlainTextResponse:
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    # Snapshot on the event loop, which owns the request counters; file reads off it
+    local = worker.snapshot()
+    return PlainTextResponse(await asyncio.to_thread(_render_all, local), media_type=CONTENT_TYPE)
+
+
+async def run_snapshot_writer(interval: float = METRICS_FLUSH_INTERVAL) -> None:
+    """Background loop sharing this worker's counters with the others through METRICS_DIR"""
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(write_snapshot, worker.snapshot())
+            except Exception as e:
+                print(f"[ERROR] Writing metrics snapshot failed: {e}")
+    finally:
+        # Keep this worker's counts after it exits
+        write_snapshot(worker.snapshot())
@@ -0,0 +1,136 @@
+"""
+Order lookup by customer email, phone and order number.
+
+Searches go through the normalized `customer_email_lower` and
+`customer_phone_normalized` columns so every lookup hits a composite index.
+Run `python -m services.order_search` to backfill them on existing orders.
+"""
+
+from sqlalchemy.orm import Session, joinedload
+from typing import Optional
+import re
+
+from database.models import Order
+from services.cache import TTLCache
+
+# Public "track my order" lookups are cached briefly per (order_number, email)
+tracking_cache = TTLCache(maxsize=4096, ttl=30)
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Lowercase and trim an email address"""
+    if not email:
+        return None
+    return email.strip().lower()
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Reduce a phone number to its national digits (last 10 for Indian numbers)"""
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if not digits:
+        return None
+    return digits[-10:]
+
+
+def search_orders(
+    db: Session,
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    order_number: Optional[str] = None,
+    reseller_id: Optional[int] = None,
+    offset: int = 0,
+    limit: int = 20
+):
+    """Find orders matching any given customer key, newest first"""
+    query = db.query(Order).options(joinedload(Order.items))
+
+    if reseller_id is not None:
+        query = query.filter(Order.reseller_id == reseller_id)
+    if order_number:
+        query = query.filter(Order.order_number == order_number.strip().upper())
+    if email:
+        query = query.filter(Order.customer_email_lower == normalize_email(email))
+    if phone:
+        normalized = normalize_phone(phone)
+        if not normalized:
+            return []
+        query = query.filter(Order.customer_phone_normalized == normalized)
+
+    return query.order_by(Order.created_at.desc()).offset(offset).limit(limit).all()
+
+
+def track_order(db: Session, order_number: str, email: str) -> Optional[dict]:
+    """Public order tracking payload, served from a short-TTL cache"""
+    key = (order_number.strip().upper(), normalize_email(email))
+    cached = tracking_cache.get(key)
+    if cached is not None:
+        return cached
+
+    order = db.query(Order).options(joinedload(Order.items)).filter(
+        Order.order_number == key[0],
+        Order.customer_email_lower == key[1]
+    ).first()
+
+    if not order:
+        return None
+
+    payload = {
+        "order_number": order.order_number,
+        "status": order.status,
+        "payment_status": order.payment_status,
+        "total_amount": order.total_amount,
+        "tracking_number": order.tracking_number,
+        "tracking_url": order.tracking_url,
+        "created_at": order.created_at,
+        "shipped_at": order.shipped_at,
+        "delivered_at": order.delivered_at,
+        "items": [
+            {
+                "product_name": item.product_name,
+                "product_image": item.product_image,
+                "quantity": item.quantity,
+                "total_price": item.total_price
+            }
+            for item in order.items
+        ]
+    }
+    tracking_cache.set(key, payload)
+    return payload
+
+
+def invalidate_tracking(order: Order) -> None:
+    """Drop the cached tracking payload after an order changes"""
+    tracking_cache.pop((order.order_number, order.customer_email_lower))
+
+
+def backfill_normalized_contacts(db: Session, batch_size: int = 1000) -> int:
+    """Populate normalized email/phone columns on orders created before they existed"""
+    updated = 0
+    last_id = 0
+    while True:
+        orders = db.query(Order).filter(
+            Order.id > last_id,
+            Order.customer_email_lower.is_(None)
+        ).order_by(Order.id).limit(batch_size).all()
+        if not orders:
+            break
+        for order in orders:
+            order.customer_email_lower = normalize_email(order.customer_email)
+            order.customer_phone_normalized = normalize_phone(order.customer_phone)
+        last_id = orders[-1].id
+        updated += len(orders)
+        db.commit()
+    return updated
+
+
+if __name__ == "__main__":
+    from database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = backfill_normalized_contacts(db)
+        print(f"[OK] Backfilled contact columns on {count} orders")
+    finally:
+        db.close()
@@ -0,0 +1,109 @@
+"""
+Password hashing off the event loop.
+
+bcrypt costs ~200ms of CPU per hash or verify. The auth handlers are
+`async def`, so running it inline stalls every other request on the worker.
+`hash_password` / `verify_password` run it on a small dedicated thread pool
+instead (bcrypt releases the GIL while hashing):
+
+    PASSWORD_HASH_WORKERS   concurrent hashes (default: CPU count, max 4)
+    PASSWORD_HASH_QUEUE     callers allowed to wait for a worker (default 64);
+                            beyond that requests get 503 with Retry-After
+    BCRYPT_ROUNDS           cost factor for new hashes (default 12)
+
+Hashes made with a different cost than BCRYPT_ROUNDS are reported as needing
+an update by `verify_password`, so logins transparently rehash them.
+"""
+
+# Monkeypatch for passlib compatibility with bcrypt 4.x
+try:
+    import bcrypt
+    if not hasattr(bcrypt, "__about__"):
+        bcrypt.__about__ = bcrypt
+except ImportError:
+    pass
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import asyncio
+import os
+import time
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "64"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class HashPool:
+    """Bounded executor with admission control and queueing metrics"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_QUEUE):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        # Only touched from the event loop thread, so plain ints are enough
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Too many sign-in attempts in progress, please retry",
+                headers={"Retry-After": "1"}
+            )
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            return started, fn(*args)
+
+        self.in_flight += 1
+        try:
+            started, result = await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self.in_flight -= 1
+
+        wait = started - submitted
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.total_run += time.perf_counter() - started
+        return result
+
+    def stats(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / completed * 1000, 2),
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "avg_hash_ms": round(self.total_run / completed * 1000, 2)
+        }
+
+
+hash_pool = HashPool()
+
+
+async def hash_password(password: str) -> str:
+    return await hash_pool.run(pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash); new_hash is set when the stored hash should be upgraded"""
+    if not hashed_password:
+        return False, None
+    return await hash_pool.run(pwd_context.verify_and_update, password, hashed_password)
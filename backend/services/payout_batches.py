@@ -0,0 +1,250 @@
+"""
+Month-end batch payouts.
+
+A batch run locks every eligible pending payout, moves them to `processing`
+in bulk and streams a bank bulk-transfer CSV (NEFT rows for bank accounts,
+UPI rows for UPI ids) to PAYOUT_FILES_DIR, renamed into place only once
+the batch is committed. The bank's returned status file is reconciled in
+bulk: successful rows complete their payouts, failed rows release the
+funds back to the reseller's ledger balance.
+"""
+
+from fastapi import HTTPException
+from sqlalchemy import or_, and_, case, update
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Dict, IO, List, Optional
+import csv
+import io
+import os
+import time
+
+from database.models import Payout, PayoutBatch, Reseller
+from services import ledger
+
+PAYOUT_FILES_DIR = os.getenv(
+    "PAYOUT_FILES_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "payout_files")
+)
+
+CHUNK_SIZE = 500
+
+BANK_FILE_COLUMNS = [
+    "reference", "transfer_mode", "beneficiary_name", "account_number",
+    "ifsc", "upi_id", "amount", "narration"
+]
+
+SUCCESS_STATUSES = {"success", "successful", "completed", "paid", "processed"}
+FAILED_STATUSES = {"failed", "failure", "rejected", "returned", "reversed"}
+
+
+def _chunks(items: List, size: int = CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _has_payout_details():
+    return or_(
+        and_(Reseller.bank_account_number.isnot(None), Reseller.bank_ifsc.isnot(None)),
+        Reseller.upi_id.isnot(None)
+    )
+
+
+def create_batch(db: Session, created_by: Optional[int] = None, limit: Optional[int] = None) -> Optional[PayoutBatch]:
+    """Lock eligible pending payouts, mark them processing and write the bank file"""
+    started = time.perf_counter()
+
+    query = db.query(Payout.id, Payout.amount).join(
+        Reseller, Reseller.id == Payout.reseller_id
+    ).filter(
+        Payout.status == "pending",
+        Payout.batch_id.is_(None),
+        _has_payout_details()
+    ).order_by(Payout.id).with_for_update(skip_locked=True, of=Payout)
+    if limit:
+        query = query.limit(limit)
+    eligible = query.all()
+    if not eligible:
+        db.rollback()
+        return None
+
+    skipped = db.query(Payout.id).join(
+        Reseller, Reseller.id == Payout.reseller_id
+    ).filter(
+        Payout.status == "pending",
+        ~_has_payout_details()
+    ).count()
+
+    batch = PayoutBatch(
+        status="processing",
+        created_by=created_by,
+        payout_count=len(eligible),
+        total_amount=round(sum(p.amount for p in eligible), 2),
+        skipped_count=skipped
+    )
+    db.add(batch)
+    db.flush()
+
+    now = datetime.utcnow()
+    payout_ids = [p.id for p in eligible]
+    for chunk in _chunks(payout_ids):
+        db.execute(
+            update(Payout)
+            .where(Payout.id.in_(chunk), Payout.status == "pending")
+            .values(status="processing", processed_at=now, batch_id=batch.id)
+            .execution_options(synchronize_session=False)
+        )
+
+    # Written aside and renamed once the batch is committed: a failed commit leaves no file behind
+    path = bank_file_path(batch.id)
+    temp_path = f"{path}.tmp"
+    try:
+        write_bank_file(db, batch.id, temp_path)
+        batch.file_path = path
+        batch.build_seconds = round(time.perf_counter() - started, 3)
+        db.commit()
+    except Exception:
+        db.rollback()
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    os.replace(temp_path, path)
+    db.refresh(batch)
+    return batch
+
+
+def bank_file_path(batch_id: int) -> str:
+    return os.path.join(PAYOUT_FILES_DIR, f"payout-batch-{batch_id}.csv")
+
+
+def write_bank_file(db: Session, batch_id: int, path: str) -> None:
+    """Stream the batch's transfer rows to a CSV at `path`"""
+    os.makedirs(PAYOUT_FILES_DIR, exist_ok=True)
+
+    rows = db.query(
+        Payout.id,
+        Payout.amount,
+        Reseller.business_name,
+        Reseller.bank_account_name,
+        Reseller.bank_account_number,
+        Reseller.bank_ifsc,
+        Reseller.upi_id
+    ).join(
+        Reseller, Reseller.id == Payout.reseller_id
+    ).filter(
+        Payout.batch_id == batch_id
+    ).order_by(Payout.id).yield_per(CHUNK_SIZE)
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(BANK_FILE_COLUMNS)
+        for row in rows:
+            use_bank = bool(row.bank_account_number and row.bank_ifsc)
+            writer.writerow([
+                row.id,
+                "NEFT" if use_bank else "UPI",
+                row.bank_account_name or row.business_name,
+                row.bank_account_number if use_bank else "",
+                row.bank_ifsc if use_bank else "",
+                "" if use_bank else row.upi_id,
+                f"{row.amount:.2f}",
+                f"Commission payout {row.id}"
+            ])
+
+
+def reconcile_batch(db: Session, batch: PayoutBatch, status_file: IO[bytes]) -> Dict[str, int]:
+    """Apply a bank status file (reference, status[, utr]) to a batch in bulk"""
+    started = time.perf_counter()
+
+    reader = csv.DictReader(io.TextIOWrapper(status_file, encoding="utf-8-sig", newline=""))
+    results: Dict[int, tuple] = {}
+    unknown = 0
+    for row in reader:
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        try:
+            payout_id = int(row.get("reference", ""))
+        except ValueError:
+            unknown += 1
+            continue
+        outcome = row.get("status", "").lower()
+        if outcome in SUCCESS_STATUSES:
+            results[payout_id] = ("completed", row.get("utr") or None)
+        elif outcome in FAILED_STATUSES:
+            results[payout_id] = ("failed", row.get("reason") or None)
+        else:
+            unknown += 1
+
+    completed, failed = [], []
+    now = datetime.utcnow()
+    for chunk in _chunks(list(results)):
+        payouts = db.query(
+            Payout.id,
+            Payout.reseller_id,
+            Payout.amount,
+            Payout.status
+        ).filter(
+            Payout.id.in_(chunk),
+            Payout.batch_id == batch.id
+        ).order_by(Payout.id).with_for_update().all()
+        # References that are not payouts of this batch
+        unknown += len(chunk) - len(payouts)
+
+        # Payouts already settled by an earlier upload of the same file are left alone
+        settling = [p for p in payouts if p.status == "processing"]
+        done = [p for p in settling if results[p.id][0] == "completed"]
+        rejected = [p for p in settling if results[p.id][0] == "failed"]
+        _set_outcome(db, done, "completed", "payment_reference", results, completed_at=now)
+        _set_outcome(db, rejected, "failed", "notes", results)
+        completed.extend(done)
+        failed.extend(rejected)
+
+    ledger.settle_payouts(db, completed, failed)
+
+    batch.completed_count += len(completed)
+    batch.failed_count += len(failed)
+    remaining = db.query(Payout.id).filter(
+        Payout.batch_id == batch.id,
+        Payout.status == "processing"
+    ).count()
+    if remaining == 0:
+        batch.status = "reconciled"
+        batch.reconciled_at = now
+    batch.reconcile_seconds = round(time.perf_counter() - started, 3)
+    db.commit()
+
+    return {
+        "completed": len(completed),
+        "failed": len(failed),
+        "unknown": unknown,
+        "still_processing": remaining
+    }
+
+
+def _set_outcome(db: Session, payouts: List, status: str, detail_column: str, results: Dict[int, tuple], **values) -> None:
+    """One UPDATE moving `payouts` from processing to `status`, with each row's UTR or reason"""
+    if not payouts:
+        return
+    details = {p.id: results[p.id][1] for p in payouts if results[p.id][1]}
+    if details:
+        column = getattr(Payout, detail_column)
+        values[detail_column] = case(details, value=Payout.id, else_=column)
+
+    result = db.execute(
+        update(Payout)
+        .where(Payout.id.in_([p.id for p in payouts]), Payout.status == "processing")
+        .values(status=status, **values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(payouts):
+        # Rows locked above changed anyway: a backend without row locks (SQLite)
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Payouts changed during reconciliation, please retry")
+
+
+def throughput(count: int, seconds: Optional[float]) -> Optional[float]:
+    """Payouts handled per second"""
+    if not seconds:
+        return None
+    return round(count / seconds, 1)
@@ -0,0 +1,76 @@
+"""
+Authenticated principals for request dependencies.
+
+A principal is the slice of a user that authorization needs: id, role,
+active/verified flags and the reseller / manufacturer profile id. The token
+identifies the user; the rest is loaded with one joined query and cached
+for PRINCIPAL_CACHE_TTL seconds, so authenticated requests normally make no
+user or profile lookups at all.
+
+Anything that changes these fields must call `invalidate(user_id)`. Other
+worker processes pick up the change when their cached entry expires.
+"""
+
+from sqlalchemy.orm import Session
+from dataclasses import dataclass
+from typing import Optional
+import os
+
+from database.models import User, Reseller, Manufacturer
+from services.cache import TTLCache
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+
+principal_cache = TTLCache(maxsize=10000, ttl=PRINCIPAL_CACHE_TTL)
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: str
+    is_active: bool
+    is_verified: bool
+    reseller_id: Optional[int] = None
+    manufacturer_id: Optional[int] = None
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    row = db.query(
+        User.id,
+        User.email,
+        User.role,
+        User.is_active,
+        User.is_verified,
+        Reseller.id,
+        Manufacturer.id
+    ).outerjoin(
+        Reseller, Reseller.user_id == User.id
+    ).outerjoin(
+        Manufacturer, Manufacturer.user_id == User.id
+    ).filter(User.id == user_id).first()
+
+    if row is None:
+        return None
+    return Principal(
+        id=row[0],
+        email=row[1],
+        role=row[2],
+        is_active=bool(row[3]),
+        is_verified=bool(row[4]),
+        reseller_id=row[5],
+        manufacturer_id=row[6]
+    )
+
+
+def get_principal(db: Session, user_id: int) -> Optional[Principal]:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = load_principal(db, user_id)
+        if principal is not None:
+            principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate(user_id: int) -> None:
+    principal_cache.pop(user_id)
@@ -0,0 +1,373 @@
+"""
+On-demand profiling of single requests.
+
+An admin gets a short-lived profile token from POST
+/api/admin/profiling/token and sends it with the request to profile, as
+an `X-Profile: <token>` header or a `_profile=<token>` query parameter, for
+example on a slow storefront page. Other requests only pay for the check
+for that header and parameter.
+
+A flagged request is read in full and then replayed on a private event loop
+in its own thread. Every thread that works on the request is then known:
+the private loop's thread, plus the anyio worker threads that loop starts
+for sync handlers and dependencies. Nothing else runs on them. A sampler
+thread reads their stacks every PROFILE_INTERVAL_MS and skips samples where
+they are idle, so concurrent requests never show up in the profile.
+
+The profile is saved as JSON in PROFILE_DIR. It holds:
+
+- the collapsed stacks ("folded" format, one `frame;frame;frame count` line
+  per stack), which flamegraph.pl and speedscope read directly
+- the functions with the most self and total time
+- the SQL statements the request ran, in order, with their timings. They
+  come from services.query_stats, so QUERY_STATS_ENABLED must be on.
+
+The newest PROFILE_KEEP profiles are kept. The response carries
+`X-Profile-Id`; the admin profile endpoints list and return profiles.
+
+One request per worker is profiled at a time. A flagged request that
+arrives while another is being profiled, or that has an invalid token,
+runs normally.
+"""
+
+from fastapi import HTTPException
+from jose import JWTError, jwt
+from starlette.datastructures import MutableHeaders
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs
+import asyncio
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+
+from services import query_stats
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "1") == "1"
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+PROFILE_TOKEN_MINUTES = int(os.getenv("PROFILE_TOKEN_MINUTES", "15"))
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_PARAM = "_profile"
+TOP_FUNCTIONS = 40
+
+_PROFILE_ID = re.compile(r"^[\w.-]+$")
+_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+# ============== TOKENS ==============
+
+def _signing_key() -> str:
+    from routers.auth import SECRET_KEY
+
+    # Derived key: a profile token is never accepted as an access token
+    return f"{SECRET_KEY}:profile"
+
+
+def issue_token(user_id: int) -> Tuple[str, datetime]:
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=PROFILE_TOKEN_MINUTES)
+    token = jwt.encode({"sub": str(user_id), "exp": expires_at}, _signing_key(), algorithm="HS256")
+    return token, expires_at
+
+
+def verify_token(token: str) -> Optional[int]:
+    """Admin user id the token was issued to, or None if it is invalid or expired"""
+    try:
+        return int(jwt.decode(token, _signing_key(), algorithms=["HS256"])["sub"])
+    except (JWTError, KeyError, ValueError):
+        return None
+
+
+def _flag(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1")
+    query_string = scope.get("query_string", b"")
+    if b"_profile=" in query_string:
+        return parse_qs(query_string.decode("latin-1")).get(PROFILE_PARAM, [None])[0]
+    return None
+
+
+# ============== SAMPLER ==============
+
+def _label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_BACKEND):
+        path = path[len(_BACKEND):]
+    else:
+        marker = path.rfind("site-packages" + os.sep)
+        path = path[marker + 14:] if marker >= 0 else os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _idle(frame) -> bool:
+    """The loop waiting in select() or a worker thread waiting for work"""
+    caller = frame
+    while caller is not None:
+        name = caller.f_code.co_name
+        if name == "select" and caller.f_back is not None and caller.f_back.f_code.co_name == "_run_once":
+            return True
+        if name == "get" and caller.f_code.co_filename.endswith("queue.py"):
+            return caller.f_back is not None and caller.f_back.f_code.co_filename.endswith("_asyncio.py")
+        caller = caller.f_back
+    return False
+
+
+class Sampler(threading.Thread):
+    """Collects the stacks of one private event loop's threads"""
+
+    def __init__(self, loop_thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.event_loop = None
+        self.stacks: Counter = Counter()
+        self.ticks = 0
+        self._stop_event = threading.Event()
+
+    def _thread_ids(self) -> List[int]:
+        # anyio worker threads record the loop that started them
+        return [self.loop_thread_id] + [
+            thread.ident for thread in threading.enumerate()
+            if thread.ident is not None and getattr(thread, "loop", None) is self.event_loop
+        ]
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.ticks += 1
+            frames = sys._current_frames()
+            for ident in self._thread_ids():
+                frame = frames.get(ident)
+                if frame is None or _idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+# ============== PROFILES ==============
+
+def _summarize(stacks: Counter, sample_ms: float) -> dict:
+    self_samples: Counter = Counter()
+    total_samples: Counter = Counter()
+    for stack, count in stacks.items():
+        self_samples[stack[-1]] += count
+        for label in set(stack):
+            total_samples[label] += count
+    return {
+        "top_self": [
+            {"function": label, "ms": round(count * sample_ms, 2), "samples": count}
+            for label, count in self_samples.most_common(TOP_FUNCTIONS)
+        ],
+        "top_total": [
+            {"function": label, "ms": round(count * sample_ms, 2), "samples": count}
+            for label, count in total_samples.most_common(TOP_FUNCTIONS)
+        ],
+        "folded": "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common()),
+    }
+
+
+def _query_without_token(scope) -> str:
+    query_string = scope.get("query_string", b"").decode("latin-1")
+    return "&".join(part for part in query_string.split("&") if part and not part.startswith(f"{PROFILE_PARAM}="))
+
+
+def _profile_id(scope, started_at: datetime) -> str:
+    path = re.sub(r"[^\w]+", "-", scope["path"]).strip("-")[:60] or "root"
+    return f"{started_at:%Y%m%dT%H%M%S}-{scope['method']}-{path}-{secrets.token_hex(3)}"
+
+
+def save(profile: dict) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{profile['id']}.json")
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(profile, f)
+    os.replace(f"{path}.tmp", path)
+
+    # Rotate: keep the newest PROFILE_KEEP
+    names = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+    for name in names[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else []:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except FileNotFoundError:
+            pass
+
+
+def list_profiles() -> List[dict]:
+    """Saved profiles, newest first, without their stacks"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summaries.append({
+            key: profile.get(key)
+            for key in ("id", "created_at", "method", "path", "status", "duration_ms", "samples")
+        } | {"sql_count": profile.get("sql", {}).get("count")})
+    return summaries
+
+
+def load_profile(profile_id: str) -> dict:
+    if not _PROFILE_ID.match(profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    try:
+        with open(os.path.join(PROFILE_DIR, f"{profile_id}.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+
+# ============== MIDDLEWARE ==============
+
+_busy = threading.Lock()
+
+
+@contextmanager
+def _statement_log():
+    """Record the current request's SQL statements in order"""
+    queries = query_stats.current_queries()
+    if queries is None:
+        yield []
+        return
+    queries.log = []
+    try:
+        yield queries.log
+    finally:
+        queries.log = None
+
+
+def _run_isolated(app, scope, body: bytes, interval: float):
+    """Run the request on a private event loop in this thread; returns (messages, sampler)"""
+    messages = []
+    sampler = Sampler(threading.get_ident(), interval)
+    delivered = False
+
+    async def receive():
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # The full body was already delivered; wait to be cancelled
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    async def main():
+        sampler.event_loop = asyncio.get_running_loop()
+        sampler.start()
+        try:
+            await app(scope, receive, send)
+        finally:
+            sampler.stop()
+
+    asyncio.run(main())
+    return messages, sampler
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry a valid admin profile token"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        token = _flag(scope)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        user_id = verify_token(token)
+        if user_id is None or not _busy.acquire(blocking=False):
+            if user_id is None:
+                print(f"[ERROR] Ignored invalid profile token on {scope['method']} {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send, user_id)
+        finally:
+            _busy.release()
+
+    async def _profile(self, scope, receive, send, user_id: int) -> None:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+
+        started_at = datetime.now(timezone.utc)
+        profile_id = _profile_id(scope, started_at)
+        with _statement_log() as statements:
+            started = time.perf_counter()
+            messages, sampler = await asyncio.to_thread(
+                _run_isolated, self.app, scope, b"".join(chunks), PROFILE_INTERVAL_MS / 1000
+            )
+            elapsed = time.perf_counter() - started
+            statements = list(statements)
+
+        status = 500
+        for message in messages:
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        sample_ms = elapsed * 1000 / sampler.ticks if sampler.ticks else PROFILE_INTERVAL_MS
+        profile = {
+            "id": profile_id,
+            "created_at": started_at.isoformat(),
+            "user_id": user_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": _query_without_token(scope),
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 2),
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "samples": sum(sampler.stacks.values()),
+            "sql": {
+                "count": len(statements),
+                "total_ms": round(sum(seconds for _, seconds, _ in statements) * 1000, 2),
+                "statements": [
+                    {
+                        "at_ms": round((finished - seconds - started) * 1000, 2),
+                        "ms": round(seconds * 1000, 2),
+                        "sql": statement
+                    }
+                    for statement, seconds, finished in statements
+                ]
+            },
+            **_summarize(sampler.stacks, sample_ms),
+        }
+        try:
+            await asyncio.to_thread(save, profile)
+        except OSError as e:
+            print(f"[ERROR] Saving profile {profile_id} failed: {e}")
@@ -0,0 +1,238 @@
+"""
+Per-request SQL instrumentation.
+
+Engine event hooks count every statement and add up its time for the
+request that issued it. `QueryStatsMiddleware` reports the totals on each
+response:
+
+    Server-Timing: db;dur=12.4;desc="7 queries", app;dur=30.1
+    X-DB-Queries: 7
+
+and prints a line for requests over budget: more than REQUEST_QUERY_WARN
+statements, more than REQUEST_DB_MS_WARN milliseconds in the database, or
+the same statement run QUERY_REPEAT_WARN times or more (an N+1 loop). The
+line names the most repeated statement by its fingerprint: the SQL with
+literals replaced by `?` and IN-lists collapsed, so every call of the same
+query shares one.
+
+Statements slower than SLOW_QUERY_MS go to the slow-query log, which prints
+them and keeps per-fingerprint counts and timings for the admin system
+stats.
+
+`assert_query_budget` checks a response's X-DB-Queries against a budget;
+tests/test_query_budgets.py runs it for each endpoint in its BUDGETS, so the
+test suite fails when an endpoint issues more queries than it should on the
+seeded dataset.
+
+Set QUERY_STATS_ENABLED=0 to remove the hooks, or QUERY_STATS_HEADERS=0 to
+keep the logs but leave the headers off responses.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Optional
+import os
+import re
+import threading
+import time
+
+from database.database import engine, replica_engines
+
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "1") == "1"
+QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "1") == "1"
+REQUEST_QUERY_WARN = int(os.getenv("REQUEST_QUERY_WARN", "30"))
+REQUEST_DB_MS_WARN = float(os.getenv("REQUEST_DB_MS_WARN", "250"))
+QUERY_REPEAT_WARN = int(os.getenv("QUERY_REPEAT_WARN", "10"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "500"))
+
+
+# ============== FINGERPRINTS ==============
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+|\$\?)"
+_IN_LIST = re.compile(rf"IN \({_PLACEHOLDER}(?:, {_PLACEHOLDER})*\)", re.IGNORECASE)
+
+
+def fingerprint(statement: str) -> str:
+    """SQL with literals and IN-lists normalized, shared by every call of one query"""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+# ============== PER-REQUEST COUNTS ==============
+
+class RequestQueries:
+    """Statements issued while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # Compiled SQL is cached, so repeats of one query share the exact string
+        self.statements: Counter = Counter()
+        # (statement, seconds, finished at) in order; only kept for profiled requests
+        self.log: Optional[list] = None
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+        if self.log is not None:
+            self.log.append((statement, seconds, time.perf_counter()))
+
+    def most_repeated(self):
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+    def server_timing(self, app_seconds: float) -> str:
+        return (
+            f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries", '
+            f"app;dur={app_seconds * 1000:.1f}"
+        )
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def current_queries() -> Optional[RequestQueries]:
+    """Statement counts of the request being handled, if QueryStatsMiddleware is tracking it"""
+    return _current.get()
+
+
+# ============== SLOW QUERY LOG ==============
+
+class SlowQueryLog:
+    """Per-fingerprint counts of slow statements, the least recently seen dropped first"""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, max_fingerprints: int = SLOW_QUERY_MAX_FINGERPRINTS):
+        self.threshold_ms = threshold_ms
+        self.max_fingerprints = max_fingerprints
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        sql = fingerprint(statement)
+        print(f"[SLOW] {elapsed_ms:.1f}ms {sql[:500]}")
+        with self._lock:
+            entry = self._entries.get(sql)
+            if entry is None:
+                entry = self._entries[sql] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            self._entries.move_to_end(sql)
+            if len(self._entries) > self.max_fingerprints:
+                self._entries.popitem(last=False)
+
+    def stats(self, limit: int = 20) -> dict:
+        with self._lock:
+            entries = sorted(self._entries.items(), key=lambda item: -item[1]["total_ms"])[:limit]
+        return {
+            "threshold_ms": self.threshold_ms,
+            "fingerprints": len(self._entries),
+            "top": [
+                {
+                    "sql": sql,
+                    "count": entry["count"],
+                    "total_ms": round(entry["total_ms"], 1),
+                    "max_ms": round(entry["max_ms"], 1)
+                }
+                for sql, entry in entries
+            ]
+        }
+
+
+slow_log = SlowQueryLog()
+
+
+# ============== ENGINE HOOKS ==============
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started_at
+    queries = _current.get()
+    if queries is not None:
+        queries.add(statement, elapsed)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        slow_log.record(statement, elapsed * 1000)
+
+
+def instrument(bound: Engine) -> None:
+    if not event.contains(bound, "before_cursor_execute", _before_cursor_execute):
+        event.listen(bound, "before_cursor_execute", _before_cursor_execute)
+        event.listen(bound, "after_cursor_execute", _after_cursor_execute)
+
+
+if QUERY_STATS_ENABLED:
+    for _bound in (engine, *replica_engines):
+        instrument(_bound)
+
+
+# ============== REQUESTS ==============
+
+def _report(scope, queries: RequestQueries) -> None:
+    statement, repeats = queries.most_repeated()
+    db_ms = queries.seconds * 1000
+    if queries.count <= REQUEST_QUERY_WARN and db_ms <= REQUEST_DB_MS_WARN and repeats < QUERY_REPEAT_WARN:
+        return
+    line = f"[SLOW] {scope['method']} {scope['path']}: {queries.count} queries, {db_ms:.1f}ms in the database"
+    if repeats > 1:
+        line += f"; {repeats}x {fingerprint(statement)[:300]}"
+    print(line)
+
+
+class QueryStatsMiddleware:
+    """Counts each request's SQL statements and reports them in Server-Timing"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = _current.set(queries)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and QUERY_STATS_HEADERS:
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", queries.server_timing(time.perf_counter() - started))
+                headers.append("X-DB-Queries", str(queries.count))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _report(scope, queries)
+
+
+# ============== BUDGETS ==============
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def assert_query_budget(response, budget: int, label: Optional[str] = None) -> int:
+    """Fail when a response's request issued more than `budget` statements; returns the count"""
+    header = response.headers.get("x-db-queries")
+    if header is None:
+        raise QueryBudgetExceeded(f"{label or response.url}: no X-DB-Queries header (QUERY_STATS_HEADERS=0?)")
+    count = int(header)
+    if count > budget:
+        raise QueryBudgetExceeded(f"{label or response.url}: {count} queries, budget is {budget}")
+    return count
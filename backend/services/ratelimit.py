@@ -0,0 +1,226 @@
+"""
+Rate limiting for the expensive public endpoints.
+
+Logins and registrations each cost a bcrypt hash, and storefront checkout is
+the heaviest write path, so both can be flooded into exhausting CPU and the
+DB pool. Each rule allows `limit` hits per `period` seconds for a key (client
+IP, email or storefront slug); over the limit the request gets 429 with
+Retry-After.
+
+Rules are set as "<limit>/<seconds>" through the environment:
+
+    RATE_LIMIT_LOGIN_IP         logins per client IP (default 20/60)
+    RATE_LIMIT_LOGIN_EMAIL      logins per email address (default 10/300)
+    RATE_LIMIT_REGISTER_IP      registrations per client IP (default 10/3600)
+    RATE_LIMIT_CHECKOUT_IP      checkouts per client IP (default 30/60)
+    RATE_LIMIT_CHECKOUT_STORE   checkouts per storefront (default 600/60)
+
+By default each worker keeps a token bucket per key in a bounded LRU map
+(RATE_LIMIT_MAX_KEYS per rule), so a check is O(1) and memory stays flat
+however many keys an attacker cycles through. Set RATE_LIMIT_REDIS_URL to
+share limits between workers instead; that uses a sliding-window counter in
+Redis (needs the `redis` package) and falls back to the local buckets if
+Redis is unavailable.
+
+Behind a reverse proxy set RATE_LIMIT_PROXY_HOPS to the number of proxies in
+front of the app, so the client IP is read from X-Forwarded-For. Set
+RATE_LIMIT_ENABLED=0 to switch limiting off.
+"""
+
+from fastapi import HTTPException, Request
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import math
+import os
+import threading
+import time
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "0"))
+
+
+@dataclass(frozen=True)
+class Rule:
+    limit: int
+    period: float
+
+
+def _rule(name: str, default: str) -> Rule:
+    limit, period = os.getenv(f"RATE_LIMIT_{name}", default).split("/")
+    return Rule(limit=int(limit), period=float(period))
+
+
+RULES: Dict[str, Rule] = {
+    "login_ip": _rule("LOGIN_IP", "20/60"),
+    "login_email": _rule("LOGIN_EMAIL", "10/300"),
+    "register_ip": _rule("REGISTER_IP", "10/3600"),
+    "checkout_ip": _rule("CHECKOUT_IP", "30/60"),
+    "checkout_store": _rule("CHECKOUT_STORE", "600/60"),
+}
+
+
+# ============== LOCAL TOKEN BUCKETS ==============
+
+class TokenBuckets:
+    """Per-key token buckets in an LRU map capped at `max_keys` entries"""
+
+    def __init__(self, rule: Rule, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rule = rule
+        self.rate = rule.limit / rule.period
+        self.max_keys = max_keys
+        # key -> (tokens, updated_at)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, now: Optional[float] = None) -> float:
+        """Take one token; returns 0 if allowed, else seconds until one is available"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(self.rule.limit), now))
+            tokens = min(float(self.rule.limit), tokens + (now - updated_at) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                # Evicted keys start again with a full bucket
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# ============== SHARED BACKEND ==============
+
+class RedisWindows:
+    """Sliding-window counters in Redis, shared by every worker"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+
+    async def hit(self, name: str, rule: Rule, key: str) -> float:
+        now = time.time()
+        window = int(now // rule.period)
+        elapsed = now - window * rule.period
+        prefix = f"ratelimit:{name}:{key}:"
+
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.incr(f"{prefix}{window}")
+        pipe.expire(f"{prefix}{window}", int(rule.period * 2) + 1)
+        pipe.get(f"{prefix}{window - 1}")
+        current, _, previous = await pipe.execute()
+
+        # Previous window's count weighted by how much of it still overlaps
+        weighted = int(previous or 0) * (1 - elapsed / rule.period) + current
+        if weighted <= rule.limit:
+            return 0.0
+        return rule.period - elapsed
+
+
+def _redis_backend() -> Optional[RedisWindows]:
+    if not RATE_LIMIT_REDIS_URL:
+        return None
+    try:
+        return RedisWindows(RATE_LIMIT_REDIS_URL)
+    except ImportError:
+        print("[ERROR] RATE_LIMIT_REDIS_URL is set but the redis package is not installed; using per-worker limits")
+        return None
+
+
+# ============== LIMITER ==============
+
+class RateLimiter:
+    def __init__(self, rules: Dict[str, Rule], enabled: bool = RATE_LIMIT_ENABLED):
+        self.rules = rules
+        self.enabled = enabled
+        self.shared = _redis_backend()
+        self._local = {name: TokenBuckets(rule) for name, rule in rules.items()}
+        # Only touched from the event loop thread, so plain ints are enough
+        self.allowed = {name: 0 for name in rules}
+        self.limited = {name: 0 for name in rules}
+        self.backend_errors = 0
+
+    async def hit(self, name: str, key: str) -> None:
+        """Count a request against `name` for `key`; raises 429 when over the limit"""
+        if not self.enabled or not key:
+            return
+
+        retry_after = None
+        if self.shared is not None:
+            try:
+                retry_after = await self.shared.hit(name, self.rules[name], key)
+            except Exception as e:
+                # Fail over to this worker's buckets rather than rejecting traffic
+                self.backend_errors += 1
+                if self.backend_errors == 1:
+                    print(f"[ERROR] Rate limit backend failed, using per-worker limits: {e}")
+        if retry_after is None:
+            retry_after = self._local[name].hit(key)
+
+        if retry_after <= 0:
+            self.allowed[name] += 1
+            return
+
+        self.limited[name] += 1
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please slow down",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "backend": "redis" if self.shared is not None else "memory",
+            "backend_errors": self.backend_errors,
+            "rules": {
+                name: {
+                    "limit": rule.limit,
+                    "period_seconds": rule.period,
+                    "allowed": self.allowed[name],
+                    "limited": self.limited[name],
+                    "tracked_keys": len(self._local[name])
+                }
+                for name, rule in self.rules.items()
+            }
+        }
+
+
+limiter = RateLimiter(RULES)
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_PROXY_HOPS > 0:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            hops = [hop.strip() for hop in forwarded.split(",")]
+            # Each trusted proxy appends the address it received from
+            return hops[-min(RATE_LIMIT_PROXY_HOPS, len(hops))]
+    return request.client.host if request.client else ""
+
+
+def per_ip(name: str):
+    """Dependency limiting an endpoint by client IP under rule `name`"""
+
+    async def dependency(request: Request) -> None:
+        await limiter.hit(name, client_ip(request))
+
+    return dependency
+
+
+def per_path_param(name: str, param: str):
+    """Dependency limiting an endpoint by one of its path parameters under rule `name`"""
+
+    async def dependency(request: Request) -> None:
+        await limiter.hit(name, request.path_params.get(param, ""))
+
+    return dependency
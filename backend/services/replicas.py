@@ -0,0 +1,173 @@
+"""
+Read/write splitting for read-mostly endpoints.
+
+Set DATABASE_REPLICA_URLS to one or more read replicas of DATABASE_URL.
+Endpoints that only read (storefront, catalog, dashboards) take their
+session from `get_read_db`, which picks a replica round-robin; everything
+else keeps using the primary through `get_db`.
+
+A read goes to the primary instead when:
+
+- the same client made a successful write in the last REPLICA_STICKY_SECONDS
+  (read-your-writes, e.g. a reseller previewing the store they just edited).
+  Clients are identified by bearer token, or by IP when anonymous, and the
+  stickiness is tracked per worker.
+- no replica is within REPLICA_MAX_LAG_SECONDS of the primary. A monitor
+  task stamps `replica_heartbeats` on the primary every
+  REPLICA_HEARTBEAT_INTERVAL seconds and reads the replicated row back from
+  each replica; a replica that has not been measured yet, or that errors,
+  counts as lagging.
+"""
+
+from fastapi import Request
+from sqlalchemy.orm import Session, sessionmaker
+from datetime import datetime, timezone
+from typing import List, Optional
+import asyncio
+import itertools
+import os
+import threading
+
+from database.database import SessionLocal, ReplicaSessions
+from database.models import ReplicaHeartbeat
+from services.cache import TTLCache
+from services.ratelimit import client_ip
+
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+REPLICA_HEARTBEAT_INTERVAL = float(os.getenv("REPLICA_HEARTBEAT_INTERVAL", "1"))
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _utc(dt: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored as UTC
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def client_key(request: Request) -> str:
+    return request.headers.get("authorization") or client_ip(request)
+
+
+class ReadRouter:
+    """Chooses the engine for each read session"""
+
+    def __init__(self, replicas: List[sessionmaker]):
+        self.replicas = replicas
+        # Seconds behind the primary per replica; None until measured
+        self.lag: List[Optional[float]] = [None] * len(replicas)
+        self.failing = [False] * len(replicas)
+        self.sticky = TTLCache(maxsize=10000, ttl=REPLICA_STICKY_SECONDS)
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self.last_beat: Optional[datetime] = None
+        self.reads = {"replica": 0, "sticky": 0, "lagging": 0}
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.reads[outcome] += 1
+
+    def session_for(self, key: Optional[str]) -> Session:
+        if not self.replicas:
+            return SessionLocal()
+        if key and self.sticky.get(key):
+            self._count("sticky")
+            return SessionLocal()
+
+        healthy = [
+            index for index, lag in enumerate(self.lag)
+            if lag is not None and lag <= REPLICA_MAX_LAG_SECONDS
+        ]
+        if not healthy:
+            self._count("lagging")
+            return SessionLocal()
+
+        self._count("replica")
+        return self.replicas[healthy[next(self._next) % len(healthy)]]()
+
+    def mark_write(self, key: Optional[str]) -> None:
+        if self.replicas and key:
+            self.sticky.set(key, True)
+
+    def check_lag(self) -> None:
+        """Measure how far each replica trails the last heartbeat, then stamp a new one"""
+        for index, make_session in enumerate(self.replicas):
+            if self.last_beat is None:
+                break
+            db = make_session()
+            try:
+                seen = db.query(ReplicaHeartbeat.beat_at).filter(ReplicaHeartbeat.id == 1).scalar()
+                # Replicas that have applied the last beat are current to within one interval
+                self.lag[index] = None if seen is None else max(0.0, (self.last_beat - _utc(seen)).total_seconds())
+                self.failing[index] = False
+            except Exception as e:
+                self.lag[index] = None
+                if not self.failing[index]:
+                    self.failing[index] = True
+                    print(f"[ERROR] Replica {index} lag check failed, reading from the primary: {e}")
+            finally:
+                db.close()
+
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            beat = db.get(ReplicaHeartbeat, 1)
+            if beat is None:
+                db.add(ReplicaHeartbeat(id=1, beat_at=now))
+            else:
+                beat.beat_at = now
+            db.commit()
+            self.last_beat = now
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {
+            "replicas": len(self.replicas),
+            "lag_seconds": [None if lag is None else round(lag, 3) for lag in self.lag],
+            "max_lag_seconds": REPLICA_MAX_LAG_SECONDS,
+            "sticky_clients": len(self.sticky),
+            "reads": dict(self.reads)
+        }
+
+
+read_router = ReadRouter(ReplicaSessions)
+
+
+def get_read_db(request: Request):
+    """Dependency to get a read-only session, on a replica when one is fresh enough"""
+    db = read_router.session_for(client_key(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client's reads to the primary for a while after a successful write"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not read_router.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            # 202 is for deferred work (e.g. the analytics beacon), nothing to read back yet
+            if message["type"] == "http.response.start" and message["status"] < 400 and message["status"] != 202:
+                read_router.mark_write(client_key(Request(scope)))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+async def run_replica_monitor(interval: float = REPLICA_HEARTBEAT_INTERVAL) -> None:
+    """Background loop measuring replica lag"""
+    while True:
+        try:
+            await asyncio.to_thread(read_router.check_lag)
+        except Exception as e:
+            print(f"[ERROR] Replica heartbeat failed: {e}")
+        await asyncio.sleep(interval)
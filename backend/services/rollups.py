@@ -0,0 +1,233 @@
+"""
+Daily sales rollups for reseller dashboards.
+
+`reseller_daily_stats` holds one row per (reseller, local day, order status).
+Order creation and status changes adjust the rows in the same transaction as
+the order itself, so dashboards read a handful of rollup rows instead of
+scanning order history.
+
+Rebuild from scratch with:
+    python -m services.rollups [--reseller-id ID]
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import argparse
+import os
+
+from database.models import Order, ResellerDailyStats
+
+# Business day boundary; defaults to IST (UTC+05:30, no DST)
+STATS_UTC_OFFSET_MINUTES = int(os.getenv("STATS_UTC_OFFSET_MINUTES", "330"))
+STATS_TZ = timezone(timedelta(minutes=STATS_UTC_OFFSET_MINUTES))
+
+
+def local_now() -> datetime:
+    return datetime.now(STATS_TZ)
+
+
+def month_start_utc() -> datetime:
+    """Start of the current business month as naive UTC, for timestamp filters"""
+    start = local_now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return start.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def local_day(dt: Optional[datetime]) -> date:
+    """Business-local calendar day of a timestamp (naive values are UTC)"""
+    if dt is None:
+        return local_now().date()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(STATS_TZ).date()
+
+
+def _bump(
+    db: Session,
+    reseller_id: int,
+    day: date,
+    status: str,
+    orders: int,
+    revenue: float,
+    commission: float
+) -> None:
+    """Add deltas to a rollup row, creating it if needed"""
+    dialect = db.get_bind().dialect.name
+    values = {
+        "reseller_id": reseller_id,
+        "day": day,
+        "status": status,
+        "orders": orders,
+        "revenue": revenue,
+        "commission": commission
+    }
+
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        table = ResellerDailyStats.__table__
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["reseller_id", "day", "status"],
+            set_={
+                "orders": table.c.orders + stmt.excluded.orders,
+                "revenue": table.c.revenue + stmt.excluded.revenue,
+                "commission": table.c.commission + stmt.excluded.commission,
+                "updated_at": func.now()
+            }
+        )
+        db.execute(stmt)
+        return
+
+    row = db.query(ResellerDailyStats).filter(
+        ResellerDailyStats.reseller_id == reseller_id,
+        ResellerDailyStats.day == day,
+        ResellerDailyStats.status == status
+    ).with_for_update().first()
+    if row is None:
+        db.add(ResellerDailyStats(**values))
+        db.flush()
+    else:
+        row.orders += orders
+        row.revenue += revenue
+        row.commission += commission
+
+
+def record_order_created(db: Session, order: Order) -> None:
+    """Count a newly placed order in the rollup for the day it was placed"""
+    _bump(
+        db,
+        order.reseller_id,
+        # The same day record_status_change moves it within, even across midnight
+        local_day(order.created_at),
+        order.status,
+        1,
+        order.total_amount or 0,
+        order.reseller_commission or 0
+    )
+
+
+def record_status_change(db: Session, order: Order, old_status: str, new_status: str) -> None:
+    """Move an order's totals from its old status bucket to the new one"""
+    if old_status == new_status:
+        return
+    day = local_day(order.created_at)
+    revenue = order.total_amount or 0
+    commission = order.reseller_commission or 0
+    _bump(db, order.reseller_id, day, old_status, -1, -revenue, -commission)
+    _bump(db, order.reseller_id, day, new_status, 1, revenue, commission)
+
+
+def get_totals(
+    db: Session,
+    reseller_id: int,
+    since: Optional[date] = None,
+    status: Optional[str] = None
+) -> Tuple[int, float, float]:
+    """(orders, revenue, commission) summed over rollup rows"""
+    query = db.query(
+        func.coalesce(func.sum(ResellerDailyStats.orders), 0),
+        func.coalesce(func.sum(ResellerDailyStats.revenue), 0),
+        func.coalesce(func.sum(ResellerDailyStats.commission), 0)
+    ).filter(ResellerDailyStats.reseller_id == reseller_id)
+
+    if since is not None:
+        query = query.filter(ResellerDailyStats.day >= since)
+    if status is not None:
+        query = query.filter(ResellerDailyStats.status == status)
+
+    orders, revenue, commission = query.one()
+    return int(orders), float(revenue), float(commission)
+
+
+def get_status_counts(db: Session, reseller_id: int) -> Dict[str, int]:
+    rows = db.query(
+        ResellerDailyStats.status,
+        func.sum(ResellerDailyStats.orders)
+    ).filter(
+        ResellerDailyStats.reseller_id == reseller_id
+    ).group_by(ResellerDailyStats.status).all()
+    return {status: int(count or 0) for status, count in rows}
+
+
+def get_daily_series(db: Session, reseller_id: int, since: date, until: Optional[date] = None):
+    """Rollup rows aggregated across statuses, one per day with orders"""
+    query = db.query(
+        ResellerDailyStats.day.label("day"),
+        func.sum(ResellerDailyStats.orders).label("orders"),
+        func.sum(ResellerDailyStats.revenue).label("revenue"),
+        func.sum(ResellerDailyStats.commission).label("commission")
+    ).filter(
+        ResellerDailyStats.reseller_id == reseller_id,
+        ResellerDailyStats.day >= since
+    )
+    if until is not None:
+        query = query.filter(ResellerDailyStats.day <= until)
+
+    return query.group_by(
+        ResellerDailyStats.day
+    ).order_by(
+        ResellerDailyStats.day
+    ).all()
+
+
+def rebuild_rollups(db: Session, reseller_id: Optional[int] = None, batch_size: int = 5000) -> int:
+    """Recompute rollup rows from order history; returns orders scanned"""
+    delete_query = db.query(ResellerDailyStats)
+    if reseller_id is not None:
+        delete_query = delete_query.filter(ResellerDailyStats.reseller_id == reseller_id)
+    delete_query.delete(synchronize_session=False)
+
+    query = db.query(
+        Order.reseller_id,
+        Order.created_at,
+        Order.status,
+        Order.total_amount,
+        Order.reseller_commission
+    )
+    if reseller_id is not None:
+        query = query.filter(Order.reseller_id == reseller_id)
+
+    buckets: Dict[tuple, list] = {}
+    scanned = 0
+    for row in query.yield_per(batch_size):
+        key = (row.reseller_id, local_day(row.created_at), row.status)
+        bucket = buckets.setdefault(key, [0, 0.0, 0.0])
+        bucket[0] += 1
+        bucket[1] += row.total_amount or 0
+        bucket[2] += row.reseller_commission or 0
+        scanned += 1
+
+    db.bulk_insert_mappings(ResellerDailyStats, [
+        {
+            "reseller_id": key[0],
+            "day": key[1],
+            "status": key[2],
+            "orders": values[0],
+            "revenue": values[1],
+            "commission": values[2]
+        }
+        for key, values in buckets.items()
+    ])
+    db.commit()
+    return scanned
+
+
+if __name__ == "__main__":
+    from database.database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Rebuild reseller daily sales rollups")
+    parser.add_argument("--reseller-id", type=int, default=None)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        count = rebuild_rollups(db, reseller_id=args.reseller_id)
+        print(f"[OK] Rebuilt rollups from {count} orders")
+    finally:
+        db.close()
@@ -0,0 +1,241 @@
+"""
+Database preparation at startup.
+
+Every worker used to run `create_all` (which inspects every table) and then
+import and run the seeder on each boot. Now a boot reads the single
+`schema_stamps` row first. If it matches the current models' schema version
+and seeding is done, startup is finished after one query.
+
+Otherwise the worker takes a lock, re-checks the stamp (another worker may
+have just finished), migrates the schema, seeds if AUTO_SEED is on, and
+writes the stamp. The lock is a Postgres advisory lock, or a file lock next
+to the database for SQLite, so workers starting together never migrate or
+seed twice. Alembic, the seed module and the bcrypt hashing it does are
+imported only on that path.
+
+Migrations live in backend/migrations. An empty database gets every table
+from the models and is stamped at the latest revision. One created by
+create_all before migrations existed is stamped at the newest revision whose
+tables it already has (REVISION_MARKERS), upgraded from there, and then has
+the derived tables the upgrade created (rollups, ledger, leaderboards)
+rebuilt from its order history.
+
+Force a re-run with `python -m services.startup --force`.
+"""
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import DBAPIError
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional
+import hashlib
+import json
+import os
+
+from database.database import engine, SessionLocal, Base, init_db
+from database.models import SchemaStamp
+
+AUTO_SEED = os.getenv("AUTO_SEED", "1") == "1"
+
+# Arbitrary application-wide key for pg_advisory_lock
+STARTUP_LOCK_KEY = 7_321_004
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+# Revision matching the tables create_all made before migrations existed
+BASELINE_REVISION = "0001"
+
+# Newest first: (revision, table, column) that revision added; column None for a new table
+REVISION_MARKERS = [
+    ("0001j", "schema_stamps", None),
+    ("0001i", "replica_heartbeats", None),
+    ("0001h", "refresh_tokens", None),
+    ("0001g", "product_sales_stats", None),
+    ("0001f", "product_daily_stats", None),
+    ("0001e", "low_stock_alerts", None),
+    ("0001d", "payout_batches", None),
+    ("0001c", "commission_ledger", None),
+    ("0001b", "reseller_daily_stats", None),
+    ("0001a", "orders", "customer_email_lower"),
+]
+
+
+def schema_version() -> str:
+    """Hash of the tables, columns and indexes the models define"""
+    tables = []
+    for table in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        tables.append([
+            table.name,
+            [[column.name, repr(column.type), column.nullable] for column in table.columns],
+            sorted(index.name for index in table.indexes if index.name)
+        ])
+    return hashlib.sha256(json.dumps(tables).encode()).hexdigest()[:16]
+
+
+def read_stamp() -> Optional[Row]:
+    # Core query: the ORM would configure every mapper first
+    stamps = SchemaStamp.__table__
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(stamps.c.schema_version, stamps.c.seeded).where(stamps.c.id == 1)
+            ).first()
+    except DBAPIError:
+        # No stamp table yet: a fresh database
+        return None
+
+
+def _is_current(stamp: Optional[Row], version: str) -> bool:
+    return stamp is not None and stamp.schema_version == version and (stamp.seeded or not AUTO_SEED)
+
+
+def _lock_file(lock_file) -> None:
+    try:
+        import fcntl
+    except ImportError:
+        # Windows development setups
+        import msvcrt
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        return
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+
+def _unlock_file(lock_file) -> None:
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        return
+    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def startup_lock():
+    """Serialize database preparation across worker processes"""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": STARTUP_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": STARTUP_LOCK_KEY})
+        return
+
+    path = engine.url.database if engine.dialect.name == "sqlite" else None
+    if not path or path == ":memory:":
+        yield
+        return
+
+    with open(f"{path}.startup.lock", "a+b") as lock_file:
+        _lock_file(lock_file)
+        try:
+            yield
+        finally:
+            _unlock_file(lock_file)
+
+
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    # Leave the app's logging alone
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def unmigrated_revision(inspector) -> str:
+    """The revision an unversioned create_all database already matches"""
+    tables = set(inspector.get_table_names())
+    for revision, table, column in REVISION_MARKERS:
+        if table not in tables:
+            continue
+        if column is None or column in {c["name"] for c in inspector.get_columns(table)}:
+            return revision
+    return BASELINE_REVISION
+
+
+def backfill_derived_tables() -> None:
+    """Fill the columns and tables derived from orders and payouts on a freshly migrated database"""
+    from services.leaderboards import rebuild_leaderboards
+    from services.ledger import rebuild_balances
+    from services.order_search import backfill_normalized_contacts
+    from services.rollups import rebuild_rollups
+
+    db = SessionLocal()
+    try:
+        backfill_normalized_contacts(db)
+        for rebuild in (rebuild_rollups, rebuild_balances, rebuild_leaderboards):
+            rebuild(db)
+            db.commit()
+    finally:
+        db.close()
+
+
+def migrate() -> None:
+    """Bring the schema up to the latest migration"""
+    from alembic import command
+
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    config = alembic_config()
+    if "users" not in tables:
+        # Empty database: create_all is faster than replaying every migration
+        init_db()
+        command.stamp(config, "head")
+        return
+    unversioned = "alembic_version" not in tables
+    if unversioned:
+        command.stamp(config, unmigrated_revision(inspector))
+    command.upgrade(config, "head")
+    if unversioned:
+        backfill_derived_tables()
+
+
+def prepare_database(force: bool = False) -> str:
+    """Make sure the schema is migrated and seeded; returns "warm", "prepared" or "waited" """
+    version = schema_version()
+    if not force and _is_current(read_stamp(), version):
+        return "warm"
+
+    with startup_lock():
+        stamp = read_stamp()
+        if not force and _is_current(stamp, version):
+            # Another worker prepared the database while we waited for the lock
+            return "waited"
+
+        migrate()
+        # Schema changes only need migrating; existing seed data stays valid
+        seeded = bool(stamp and stamp.seeded) and not force
+        if AUTO_SEED and not seeded:
+            try:
+                from seed_data import seed_database
+                seed_database()
+                seeded = True
+            except Exception as e:
+                # Leave the stamp unseeded so the next boot retries
+                print(f"[ERROR] Auto-seeding failed: {e}")
+
+        db = SessionLocal()
+        try:
+            row = db.get(SchemaStamp, 1) or SchemaStamp(id=1)
+            row.schema_version = version
+            row.seeded = seeded
+            row.updated_at = datetime.now(timezone.utc)
+            db.add(row)
+            db.commit()
+        finally:
+            db.close()
+    return "prepared"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate the schema and seed data if needed")
+    parser.add_argument("--force", action="store_true", help="ignore the stamp and re-run")
+    args = parser.parse_args()
+
+    print(f"[OK] Database {prepare_database(force=args.force)} (schema {schema_version()})")
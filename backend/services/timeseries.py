@@ -0,0 +1,154 @@
+"""
+Gap-filled revenue time series at day/week/month granularity.
+
+Buckets follow the business timezone used by the daily rollups (IST by
+default), weeks start on Monday, and every series is compared with the
+same number of buckets immediately before it. Buckets are clipped to the
+requested range, and each previous bucket to the same days of its own
+period, so the month to date on the 19th is compared with the 1st to the
+19th of the month before, not all of it. All figures come from
+`reseller_daily_stats`, so a year at daily granularity is one indexed range
+read of at most ~2 x 365 x statuses rows.
+"""
+
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from services import rollups
+
+GRANULARITIES = ("day", "week", "month")
+MAX_RANGE_DAYS = 3 * 366
+
+
+def bucket_start(d: date, granularity: str) -> date:
+    if granularity == "week":
+        return d - timedelta(days=d.weekday())
+    if granularity == "month":
+        return d.replace(day=1)
+    return d
+
+
+def next_bucket(d: date, granularity: str) -> date:
+    if granularity == "week":
+        return d + timedelta(days=7)
+    if granularity == "month":
+        return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return d + timedelta(days=1)
+
+
+def bucket_starts(start: date, end: date, granularity: str) -> List[date]:
+    """Every bucket start overlapping [start, end]"""
+    buckets = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def previous_starts(first: date, count: int, granularity: str) -> List[date]:
+    """The `count` bucket starts immediately preceding `first`"""
+    starts = []
+    current = first
+    for _ in range(count):
+        current = bucket_start(current - timedelta(days=1), granularity)
+        starts.append(current)
+    starts.reverse()
+    return starts
+
+
+def bucket_windows(start: date, end: date, granularity: str) -> List[Tuple[date, date, date]]:
+    """(bucket start, first day, last day) of every bucket overlapping [start, end], clipped to it"""
+    return [
+        (s, max(s, start), min(next_bucket(s, granularity) - timedelta(days=1), end))
+        for s in bucket_starts(start, end, granularity)
+    ]
+
+
+def previous_windows(current: List[Tuple[date, date, date]], granularity: str) -> List[Tuple[date, date, date]]:
+    """The buckets preceding `current`, each covering the same days of its period as its current bucket"""
+    windows = []
+    for prev, (cur, first, last) in zip(previous_starts(current[0][0], len(current), granularity), current):
+        # Months differ in length: never run past the end of the previous bucket
+        prev_last = next_bucket(prev, granularity) - timedelta(days=1)
+        prev_first = min(prev + (first - cur), prev_last)
+        windows.append((prev, prev_first, min(prev_first + (last - first), prev_last)))
+    return windows
+
+
+def _aggregate(rows, windows: List[Tuple[date, date, date]], granularity: str) -> Dict[date, List[float]]:
+    totals = {s: [0, 0.0, 0.0] for s, _, _ in windows}
+    bounds = {s: (first, last) for s, first, last in windows}
+    for row in rows:
+        key = bucket_start(row.day, granularity)
+        if key not in bounds or not bounds[key][0] <= row.day <= bounds[key][1]:
+            continue
+        bucket = totals[key]
+        bucket[0] += int(row.orders or 0)
+        bucket[1] += float(row.revenue or 0)
+        bucket[2] += float(row.commission or 0)
+    return totals
+
+
+def _change(current: float, previous: float) -> Optional[float]:
+    if not previous:
+        return None
+    return round((current - previous) / previous * 100, 2)
+
+
+def revenue_series(
+    db: Session,
+    reseller_id: int,
+    granularity: str = "day",
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> dict:
+    """Gap-filled series plus aligned previous-period values and totals"""
+    end = end or rollups.local_now().date()
+    start = start or end - timedelta(days=29)
+
+    current = bucket_windows(start, end, granularity)
+    previous = previous_windows(current, granularity)
+
+    rows = rollups.get_daily_series(db, reseller_id, previous[0][1], end)
+    current_totals = _aggregate(rows, current, granularity)
+    previous_totals = _aggregate(rows, previous, granularity)
+
+    points = []
+    for (cur, _, _), (prev, _, _) in zip(current, previous):
+        c, p = current_totals[cur], previous_totals[prev]
+        points.append({
+            "period": cur.isoformat(),
+            "orders": c[0],
+            "revenue": round(c[1], 2),
+            "commission": round(c[2], 2),
+            "previous_period": prev.isoformat(),
+            "previous_orders": p[0],
+            "previous_revenue": round(p[1], 2),
+            "previous_commission": round(p[2], 2)
+        })
+
+    totals = {
+        "orders": sum(p["orders"] for p in points),
+        "revenue": round(sum(p["revenue"] for p in points), 2),
+        "commission": round(sum(p["commission"] for p in points), 2)
+    }
+    previous_summary = {
+        "orders": sum(p["previous_orders"] for p in points),
+        "revenue": round(sum(p["previous_revenue"] for p in points), 2),
+        "commission": round(sum(p["previous_commission"] for p in points), 2)
+    }
+
+    return {
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "utc_offset_minutes": rollups.STATS_UTC_OFFSET_MINUTES,
+        "points": points,
+        "totals": totals,
+        "previous_totals": previous_summary,
+        "change_percent": {
+            key: _change(totals[key], previous_summary[key]) for key in totals
+        }
+    }
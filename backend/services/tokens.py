@@ -0,0 +1,213 @@
+"""
+Refresh tokens and access-token revocation.
+
+Access tokens are short-lived JWTs (ACCESS_TOKEN_EXPIRE_MINUTES). Logins also
+get an opaque refresh token; only its SHA-256 is stored. Each refresh
+rotates it: the presented token is revoked and a new one issued in the same
+family. Presenting an already-rotated token means it leaked, so the whole
+family is revoked.
+
+Revoking a user (disable, password reset) writes a `token_revocations` row.
+Every worker keeps {user_id: revoked_before} in memory, updates it directly
+for its own revocations and re-syncs from the DB every
+REVOCATION_SYNC_INTERVAL seconds. Only revocations newer than one access
+token lifetime are kept, since older tokens have expired anyway. Checking a
+token is a dict lookup; no query per request.
+"""
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import secrets
+import threading
+
+from database.models import User, RefreshToken, TokenRevocation
+from services import principals
+
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+REVOCATION_SYNC_INTERVAL = int(os.getenv("REVOCATION_SYNC_INTERVAL", "15"))
+
+
+def _utc(dt: datetime) -> datetime:
+    # SQLite hands back naive datetimes; they are stored as UTC
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# ============== REVOCATION SET ==============
+
+class RevocationSet:
+    """user_id -> epoch seconds before which that user's access tokens are void"""
+
+    def __init__(self):
+        self._revoked: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self.synced_at: Optional[datetime] = None
+
+    def add(self, user_id: int, revoked_before: float) -> None:
+        with self._lock:
+            if revoked_before > self._revoked.get(user_id, 0):
+                self._revoked[user_id] = revoked_before
+
+    def is_revoked(self, user_id: int, issued_at: Optional[float]) -> bool:
+        revoked_before = self._revoked.get(user_id)
+        if revoked_before is None:
+            return False
+        return issued_at is None or issued_at <= revoked_before
+
+    def sync(self, db: Session) -> int:
+        """Replace the set with revocations still inside the access token lifetime"""
+        since = datetime.now(timezone.utc) - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        rows = db.query(
+            TokenRevocation.user_id,
+            func.max(TokenRevocation.created_at)
+        ).filter(
+            TokenRevocation.created_at >= since
+        ).group_by(TokenRevocation.user_id).all()
+
+        fresh = {user_id: _utc(created_at).timestamp() for user_id, created_at in rows}
+        cutoff = since.timestamp()
+        with self._lock:
+            # Keep local revocations the query may not have seen committed yet
+            for user_id, revoked_before in self._revoked.items():
+                if revoked_before >= cutoff and revoked_before > fresh.get(user_id, 0):
+                    fresh[user_id] = revoked_before
+            self._revoked = fresh
+        self.synced_at = datetime.now(timezone.utc)
+        return len(fresh)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+revocations = RevocationSet()
+
+
+def revoke_user(db: Session, user_id: int, reason: str) -> None:
+    """Void the user's outstanding access and refresh tokens; caller commits"""
+    now = datetime.now(timezone.utc)
+    db.add(TokenRevocation(user_id=user_id, reason=reason, created_at=now))
+    db.query(RefreshToken).filter(
+        RefreshToken.user_id == user_id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({"revoked_at": now}, synchronize_session=False)
+    revocations.add(user_id, now.timestamp())
+    principals.invalidate(user_id)
+
+
+# ============== REFRESH TOKENS ==============
+
+def issue_refresh_token(db: Session, user_id: int, family_id: Optional[str] = None) -> str:
+    """Create a refresh token row and return the raw token; caller commits"""
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return token
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[User, str]:
+    """Exchange a refresh token for a new one; returns (user, new_token)"""
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token"
+    )
+    row = db.query(RefreshToken).filter(
+        RefreshToken.token_hash == hash_token(token)
+    ).with_for_update().first()
+    if row is None:
+        raise invalid
+
+    now = datetime.now(timezone.utc)
+    if row.revoked_at is not None:
+        # Reuse of a rotated token: assume it was stolen and end the session
+        revoke_family(db, row.family_id)
+        db.commit()
+        raise invalid
+    if _utc(row.expires_at) <= now:
+        raise invalid
+
+    user = db.query(User).filter(User.id == row.user_id).first()
+    if user is None or not user.is_active:
+        raise invalid
+
+    row.revoked_at = now
+    new_token = issue_refresh_token(db, user.id, family_id=row.family_id)
+    db.commit()
+    return user, new_token
+
+
+def revoke_family(db: Session, family_id: str) -> None:
+    db.query(RefreshToken).filter(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({"revoked_at": datetime.now(timezone.utc)}, synchronize_session=False)
+
+
+def revoke_refresh_token(db: Session, token: str) -> None:
+    """Log out: end the session the refresh token belongs to"""
+    row = db.query(RefreshToken).filter(RefreshToken.token_hash == hash_token(token)).first()
+    if row is not None:
+        revoke_family(db, row.family_id)
+        db.commit()
+
+
+def purge_expired(db: Session) -> int:
+    cutoff = datetime.now(timezone.utc)
+    deleted = db.query(RefreshToken).filter(
+        RefreshToken.expires_at < cutoff
+    ).delete(synchronize_session=False)
+    db.query(TokenRevocation).filter(
+        TokenRevocation.created_at < cutoff - timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+# ============== BACKGROUND SYNC ==============
+
+def _sync() -> None:
+    from database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        revocations.sync(db)
+    finally:
+        db.close()
+
+
+def _purge() -> int:
+    from database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return purge_expired(db)
+    finally:
+        db.close()
+
+
+async def run_revocation_sync(interval: int = REVOCATION_SYNC_INTERVAL) -> None:
+    """Background loop keeping the in-memory revocation set current"""
+    last_purge = None
+    while True:
+        try:
+            await asyncio.to_thread(_sync)
+            now = asyncio.get_running_loop().time()
+            if last_purge is None or now - last_purge >= 3600:
+                last_purge = now
+                await asyncio.to_thread(_purge)
+        except Exception as e:
+            print(f"[ERROR] Token revocation sync failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,286 @@
+"""
+Streaming, content-addressed storage for uploaded images.
+
+Uploads are read in UPLOAD_CHUNK_BYTES chunks and written with aiofiles, so
+the event loop never waits on disk and an upload is never held in memory
+whole. Each chunk also feeds a SHA-256 hash, and the file is stored as
+`uploads/<kind>/<hash>.<ext>`: uploading the same image again (a store
+re-saving its logo, two products sharing a photo) reuses the stored file
+instead of writing another copy.
+
+Starlette parses a multipart body, spooling the file to disk, before the
+handler runs, so the size cap is enforced on the raw request by
+UploadSizeLimitMiddleware: multipart requests without a Content-Length
+(chunked) get 411, ones declaring more than the cap get 413 up front, and
+the body bytes actually received are counted so nothing past the cap is
+read. store() still checks the file itself against MAX_UPLOAD_MB.
+
+Replacing a logo, banner or product image leaves the old file behind, so
+collect_garbage() counts the references to every stored file from the
+columns holding upload URLs (logo_url, hero_image, primary_image, images,
+plus the variants recorded for those images). Order items keep showing the
+product image from checkout after the product's image changes, so their
+product_image counts as well, with its variants found by file name since
+the product may no longer record them. Files nothing references are deleted
+once older than UPLOAD_GC_GRACE_MINUTES, which covers uploads whose row is
+not committed yet; that includes files from before content addressing.
+The counts are rebuilt on every pass instead of kept in a column, so URLs
+set through the profile and product update endpoints are counted too.
+
+Collection runs every UPLOAD_GC_INTERVAL_SECONDS when that is set, or by hand:
+    python -m services.uploads --gc [--dry-run]
+"""
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import func
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import aiofiles
+import aiofiles.os
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+
+from services import images
+
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "10"))
+MAX_UPLOAD_BYTES = int(MAX_UPLOAD_MB * 1024 * 1024)
+UPLOAD_CHUNK_BYTES = 64 * 1024
+UPLOAD_GC_INTERVAL_SECONDS = int(os.getenv("UPLOAD_GC_INTERVAL_SECONDS", "0"))
+UPLOAD_GC_GRACE_MINUTES = int(os.getenv("UPLOAD_GC_GRACE_MINUTES", "60"))
+
+UPLOADS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
+KINDS = ("logos", "banners", "products")
+
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/svg+xml": "svg",
+}
+
+# Multipart boundaries and form fields around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+_utime = aiofiles.os.wrap(os.utime)
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    url: str
+    path: str
+    size: int
+    deduplicated: bool
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Maximum size is {MAX_UPLOAD_MB:g} MB"
+    )
+
+
+# ============== STORING ==============
+
+async def store(file: UploadFile, kind: str) -> StoredFile:
+    """Stream `file` into uploads/<kind>/ under its content hash"""
+    directory = os.path.join(UPLOADS_DIR, kind)
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".upload-{uuid.uuid4().hex}.tmp")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                await out.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+
+        filename = f"{digest.hexdigest()[:32]}.{EXTENSIONS[file.content_type]}"
+        path = os.path.join(directory, filename)
+        try:
+            # Already stored: restart its grace period so a collection running now keeps it
+            await _utime(path)
+            deduplicated = True
+        except FileNotFoundError:
+            await aiofiles.os.replace(temp_path, path)
+            deduplicated = False
+    finally:
+        try:
+            await aiofiles.os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
+    return StoredFile(url=f"/uploads/{kind}/{filename}", path=path, size=size, deduplicated=deduplicated)
+
+
+async def store_image(file: UploadFile, kind: str) -> Tuple[StoredFile, Optional[dict]]:
+    """store(), then build the resized variants (services.images); rejects files that are not images"""
+    stored = await store(file, kind)
+    if file.content_type == "image/svg+xml":
+        # Vector logos scale on their own
+        return stored, None
+    try:
+        variants = await asyncio.to_thread(images.derive, stored.path, stored.url)
+    except images.InvalidImage:
+        if not stored.deduplicated:
+            try:
+                await aiofiles.os.remove(stored.path)
+            except FileNotFoundError:
+                pass
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image file")
+    return stored, variants
+
+
+class UploadSizeLimitMiddleware:
+    """Caps multipart request bodies at the upload limit as they are received"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+        length = headers.get(b"content-length", b"")
+        if not length.isdigit():
+            response = JSONResponse(
+                status_code=status.HTTP_411_LENGTH_REQUIRED,
+                content={"detail": "Uploads must declare Content-Length"}
+            )
+        elif int(length) > limit:
+            response = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": _too_large().detail}
+            )
+        else:
+            response = None
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised while the form is parsed; FastAPI passes HTTPException through
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# ============== GARBAGE COLLECTION ==============
+
+def _count(counts: Counter, urls, variants_by_url: Optional[dict]) -> None:
+    for url in urls:
+        if not url:
+            continue
+        counts[url] += 1
+        for variant in ((variants_by_url or {}).get(url) or {}).get("variants", []):
+            counts[variant["url"]] += 1
+
+
+def reference_counts(db) -> Counter:
+    """References to each upload URL from the rows that hold them"""
+    from database.models import OrderItem, Product, Reseller, StorefrontConfig
+
+    counts: Counter = Counter()
+    for logo_url, variants in db.query(Reseller.logo_url, Reseller.image_variants):
+        _count(counts, [logo_url], variants)
+    for hero_image, variants in db.query(StorefrontConfig.hero_image, StorefrontConfig.image_variants):
+        _count(counts, [hero_image], variants)
+    products = db.query(Product.primary_image, Product.images, Product.image_variants).yield_per(1000)
+    for primary_image, product_images, variants in products:
+        _count(counts, {primary_image, *(product_images or [])}, variants)
+    snapshots = db.query(OrderItem.product_image, func.count()).filter(
+        OrderItem.product_image.like("/uploads/%")
+    ).group_by(OrderItem.product_image)
+    for product_image, references in snapshots:
+        counts[product_image] += references
+        for url in images.variant_urls(product_image):
+            counts[url] += references
+    return counts
+
+
+def collect_garbage(dry_run: bool = False) -> dict:
+    """Delete stored files nothing references; returns what was removed"""
+    from database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        counts = reference_counts(db)
+    finally:
+        db.close()
+
+    cutoff = time.time() - UPLOAD_GC_GRACE_MINUTES * 60
+    removed = kept = freed = 0
+    for kind in KINDS:
+        directory = os.path.join(UPLOADS_DIR, kind)
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if counts[f"/uploads/{kind}/{entry.name}"] or stat.st_mtime > cutoff:
+                kept += 1
+                continue
+            if not dry_run:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+            removed += 1
+            freed += stat.st_size
+    return {"removed": removed, "freed_bytes": freed, "kept": kept}
+
+
+async def run_collector(interval: int = UPLOAD_GC_INTERVAL_SECONDS) -> None:
+    """Background loop deleting unreferenced uploads"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            result = await asyncio.to_thread(collect_garbage)
+            if result["removed"]:
+                print(f"[OK] Removed {result['removed']} unreferenced uploads ({result['freed_bytes']} bytes)")
+        except Exception as e:
+            print(f"[ERROR] Upload garbage collection failed: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Delete uploaded files no row references")
+    parser.add_argument("--gc", action="store_true", help="collect unreferenced uploads")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be removed")
+    args = parser.parse_args()
+
+    if args.gc:
+        result = collect_garbage(dry_run=args.dry_run)
+        verb = "Would remove" if args.dry_run else "Removed"
+        print(f"[OK] {verb} {result['removed']} files ({result['freed_bytes']} bytes), kept {result['kept']}")
+    else:
+        parser.print_help()
@@ -0,0 +1,123 @@
+"""
+Shared test setup: every run gets its own throwaway SQLite database.
+
+DATABASE_URL has to be set before anything imports database.database, which
+creates the engine on import, so it is set here at collection time rather
+than in a fixture. Rate limiting and auto-seeding are off; tests that need
+data migrate and seed through the `seeded` fixture. The database is shared by
+the whole run, so tests create their own orders and payouts and check changes
+rather than totals.
+
+From the backend directory:
+    python -m pytest -q
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+TEST_DIR = tempfile.mkdtemp(prefix="jewelry-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'primary.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+os.environ["AUTO_SEED"] = "0"
+
+# Seeded accounts (seed_data.py)
+ADMIN_EMAIL = "admin@jewelryplatform.com"
+STORE_SLUG = "sparkle-jewels"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def test_dir():
+    yield TEST_DIR
+    from database.database import engine
+    engine.dispose()
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+
+@pytest.fixture(scope="session")
+def seeded():
+    """The test database at the latest migration with the demo data"""
+    from alembic import command
+    from services.startup import alembic_config
+    from seed_data import seed_database
+
+    command.upgrade(alembic_config(), "head")
+    seed_database()
+
+
+@pytest.fixture
+def client(seeded):
+    import main
+    from fastapi.testclient import TestClient
+
+    # No context manager: startup would start the background jobs
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def auth_headers(seeded):
+    """Bearer headers for a seeded user, minted directly rather than by logging in"""
+    from database.database import SessionLocal
+    from database.models import User
+    from routers.auth import create_access_token
+
+    def headers(email: str) -> dict:
+        db = SessionLocal()
+        try:
+            user = db.query(User).filter(User.email == email).one()
+            token = create_access_token(data={"sub": str(user.id), "role": user.role})
+        finally:
+            db.close()
+        return {"Authorization": f"Bearer {token}"}
+
+    return headers
+
+
+@pytest.fixture
+def place_order(client, auth_headers):
+    """Place a storefront order and move it to `status` as the admin; returns the order id"""
+    from database.database import SessionLocal
+    from database.models import Product, Reseller, ResellerProduct
+
+    def place(status: str = "delivered", quantity: int = 1) -> int:
+        db = SessionLocal()
+        try:
+            # The best stocked listing, so repeated orders do not sell out
+            product_id = db.query(Product.id).join(
+                ResellerProduct, ResellerProduct.product_id == Product.id
+            ).join(
+                Reseller, Reseller.id == ResellerProduct.reseller_id
+            ).filter(Reseller.slug == STORE_SLUG).order_by(Product.stock_quantity.desc()).first()[0]
+        finally:
+            db.close()
+
+        response = client.post(f"/api/orders/storefront/{STORE_SLUG}", json={
+            "customer_email": "buyer@example.com",
+            "customer_name": "Test Buyer",
+            "shipping_address_line1": "1 Test Street",
+            "shipping_city": "Jaipur",
+            "shipping_state": "Rajasthan",
+            "shipping_postal_code": "302001",
+            "items": [{"product_id": product_id, "quantity": quantity}]
+        })
+        assert response.status_code == 200, response.text
+        order_id = response.json()["order_id"]
+
+        if status != "pending":
+            response = client.patch(
+                f"/api/orders/{order_id}/status",
+                json={"status": status},
+                headers=auth_headers(ADMIN_EMAIL)
+            )
+            assert response.status_code == 200, response.text
+        return order_id
+
+    return place
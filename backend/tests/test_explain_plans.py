@@ -0,0 +1,11 @@
+"""Fails when a router query starts scanning a table explain_baseline.json does not allow"""
+
+from benchmarks import explain_plans
+
+
+def test_no_new_full_scans():
+    queries = explain_plans.capture()
+    regressions = explain_plans.find_regressions(queries, explain_plans.load_baseline())
+    assert not regressions, "\n".join(
+        explain_plans.describe_regression(key, entry, new) for key, entry, new in regressions
+    )
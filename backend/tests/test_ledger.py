@@ -0,0 +1,145 @@
+"""
+Commission ledger (services.ledger): order deliveries credit the reseller,
+undoing them debits it, payout reservations cannot overspend, and a rebuild
+from history agrees with the incrementally kept balances.
+"""
+
+import pytest
+
+ADMIN_EMAIL = "admin@jewelryplatform.com"
+RESELLER_EMAIL = "demo@mystore.com"
+SLUG = "sparkle-jewels"
+
+
+def reseller_id() -> int:
+    from database.database import SessionLocal
+    from database.models import Reseller
+
+    db = SessionLocal()
+    try:
+        return db.query(Reseller.id).filter(Reseller.slug == SLUG).scalar()
+    finally:
+        db.close()
+
+
+def balances() -> dict:
+    from database.database import SessionLocal
+    from database.models import ResellerBalance
+
+    db = SessionLocal()
+    try:
+        return {
+            row.reseller_id: (row.available, row.pending, row.total_earned, row.total_paid)
+            for row in db.query(ResellerBalance).all()
+        }
+    finally:
+        db.close()
+
+
+def order_entries(order_id: int) -> list:
+    from database.database import SessionLocal
+    from database.models import CommissionLedgerEntry
+
+    db = SessionLocal()
+    try:
+        return [
+            (entry.entry_type, entry.reason, entry.amount)
+            for entry in db.query(CommissionLedgerEntry).filter(
+                CommissionLedgerEntry.order_id == order_id
+            ).order_by(CommissionLedgerEntry.id).all()
+        ]
+    finally:
+        db.close()
+
+
+def commission_of(order_id: int) -> float:
+    from database.database import SessionLocal
+    from database.models import Order
+
+    db = SessionLocal()
+    try:
+        return db.query(Order.reseller_commission).filter(Order.id == order_id).scalar()
+    finally:
+        db.close()
+
+
+def test_delivery_credits_and_undo_debits(client, auth_headers, place_order):
+    reseller = reseller_id()
+    before = balances().get(reseller, (0, 0, 0, 0))
+
+    order_id = place_order("shipped")
+    commission = commission_of(order_id)
+    assert commission > 0
+    assert order_entries(order_id) == []
+
+    response = client.patch(f"/api/orders/{order_id}/status", json={"status": "delivered"}, headers=auth_headers(ADMIN_EMAIL))
+    assert response.status_code == 200
+    delivered = balances()[reseller]
+    assert delivered[0] == pytest.approx(before[0] + commission)
+    assert delivered[2] == pytest.approx(before[2] + commission)
+
+    response = client.patch(f"/api/orders/{order_id}/status", json={"status": "shipped"}, headers=auth_headers(ADMIN_EMAIL))
+    assert response.status_code == 200
+    undone = balances()[reseller]
+    assert undone[0] == pytest.approx(before[0])
+    assert undone[2] == pytest.approx(before[2])
+
+    assert order_entries(order_id) == [
+        ("credit", "order_delivered", commission),
+        ("debit", "order_reversed", commission),
+    ]
+
+
+def test_rebuild_matches_incremental_balance(client, auth_headers, place_order):
+    from database.database import SessionLocal
+    from services import ledger
+
+    place_order(quantity=2)
+    response = client.post("/api/payouts/request", json={"amount": 100}, headers=auth_headers(RESELLER_EMAIL))
+    assert response.status_code == 200, response.text
+
+    incremental = balances()
+    db = SessionLocal()
+    try:
+        ledger.rebuild_balances(db)
+    finally:
+        db.close()
+    rebuilt = balances()
+
+    assert rebuilt.keys() == incremental.keys()
+    for reseller, values in incremental.items():
+        assert rebuilt[reseller] == pytest.approx(values)
+
+
+def test_reserve_payout_conflict_returns_409(client, auth_headers, place_order, monkeypatch):
+    from database.database import SessionLocal
+    from database.models import Payout
+    from services import ledger
+
+    place_order()
+    reseller = reseller_id()
+    before = balances()[reseller]
+
+    # A balance read just before another request spent most of it
+    db = SessionLocal()
+    try:
+        stale = ledger.get_balance(db, reseller)
+        db.expunge(stale)
+    finally:
+        db.close()
+    stale.available = before[0] + 1000
+    monkeypatch.setattr(ledger, "lock_balance", lambda db, reseller_id: stale)
+
+    response = client.post(
+        "/api/payouts/request",
+        json={"amount": before[0] + 500},
+        headers=auth_headers(RESELLER_EMAIL)
+    )
+    assert response.status_code == 409
+    assert balances()[reseller] == pytest.approx(before)
+
+    db = SessionLocal()
+    try:
+        assert db.query(Payout).filter(Payout.amount == before[0] + 500).count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,118 @@
+"""
+Month-end payout batches (services.payout_batches) end to end through the
+admin API: build a batch with its bank file, then reconcile a status file.
+"""
+
+import csv
+
+import pytest
+
+ADMIN_EMAIL = "admin@jewelryplatform.com"
+RESELLER_EMAIL = "demo@mystore.com"
+SLUG = "sparkle-jewels"
+
+
+@pytest.fixture
+def payable_reseller(seeded, test_dir, monkeypatch):
+    """The demo reseller with a UPI id, bank files written to the test directory"""
+    from database.database import SessionLocal
+    from database.models import Reseller
+    from services import payout_batches
+
+    monkeypatch.setattr(payout_batches, "PAYOUT_FILES_DIR", test_dir)
+    db = SessionLocal()
+    try:
+        reseller = db.query(Reseller).filter(Reseller.slug == SLUG).one()
+        reseller.upi_id = "sparkle@upi"
+        db.commit()
+        return reseller.id
+    finally:
+        db.close()
+
+
+def balance_of(reseller_id: int) -> dict:
+    from database.database import SessionLocal
+    from services import ledger
+
+    db = SessionLocal()
+    try:
+        balance = ledger.get_balance(db, reseller_id)
+        return {
+            "available": balance.available,
+            "pending": balance.pending,
+            "total_paid": balance.total_paid
+        }
+    finally:
+        db.close()
+
+
+def test_batch_reconcile_settles_ledger(client, auth_headers, place_order, payable_reseller):
+    from database.database import SessionLocal
+    from database.models import CommissionLedgerEntry, Payout
+
+    place_order(quantity=3)
+    reseller = auth_headers(RESELLER_EMAIL)
+    admin = auth_headers(ADMIN_EMAIL)
+    payout_ids = []
+    for amount in (100, 150):
+        response = client.post("/api/payouts/request", json={"amount": amount}, headers=reseller)
+        assert response.status_code == 200, response.text
+        payout_ids.append(response.json()["id"])
+    paid_id, failed_id = payout_ids
+
+    response = client.post("/api/admin/payouts/batches", headers=admin)
+    assert response.status_code == 200, response.text
+    batch = response.json()
+    response = client.get(f"/api/admin/payouts/batches/{batch['id']}/file", headers=admin)
+    assert response.status_code == 200
+    references = {int(row["reference"]) for row in csv.DictReader(response.text.splitlines())}
+    assert set(payout_ids) <= references
+
+    before = balance_of(payable_reseller)
+    status_file = "\n".join([
+        "reference,status,utr,reason",
+        f"{paid_id},SUCCESS,UTR123,",
+        f"{failed_id},FAILED,,Account closed",
+        "999999,SUCCESS,UTR999,",
+        "not-a-payout,SUCCESS,,",
+    ])
+    response = client.post(
+        f"/api/admin/payouts/batches/{batch['id']}/reconcile",
+        files={"file": ("status.csv", status_file.encode(), "text/csv")},
+        headers=admin
+    )
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["completed"], result["failed"], result["unknown"]) == (1, 1, 2)
+
+    after = balance_of(payable_reseller)
+    assert after["available"] == pytest.approx(before["available"] + 150)
+    assert after["pending"] == pytest.approx(before["pending"] - 250)
+    assert after["total_paid"] == pytest.approx(before["total_paid"] + 100)
+
+    db = SessionLocal()
+    try:
+        paid = db.query(Payout).filter(Payout.id == paid_id).one()
+        failed = db.query(Payout).filter(Payout.id == failed_id).one()
+        assert (paid.status, paid.payment_reference) == ("completed", "UTR123")
+        assert paid.completed_at is not None
+        assert (failed.status, failed.notes) == ("failed", "Account closed")
+
+        reversal = db.query(CommissionLedgerEntry).filter(
+            CommissionLedgerEntry.payout_id == failed_id,
+            CommissionLedgerEntry.reason == "payout_reversed"
+        ).one()
+        assert reversal.amount == 150
+        assert reversal.balance_after == pytest.approx(after["available"])
+    finally:
+        db.close()
+
+    # The same file again changes nothing
+    response = client.post(
+        f"/api/admin/payouts/batches/{batch['id']}/reconcile",
+        files={"file": ("status.csv", status_file.encode(), "text/csv")},
+        headers=admin
+    )
+    assert response.status_code == 200
+    assert (response.json()["completed"], response.json()["failed"]) == (0, 0)
+    assert balance_of(payable_reseller) == pytest.approx(after)
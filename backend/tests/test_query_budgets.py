@@ -0,0 +1,103 @@
+"""
+Query budgets per endpoint.
+
+Places a few multi-item orders on the seeded store, then calls each endpoint
+in BUDGETS and reads the statement count from the X-DB-Queries header
+(services.query_stats). An endpoint issuing more queries than its budget
+fails, so a new N+1 loop fails the run instead of going unnoticed.
+
+Budgets are set for the seeded dataset. Per-row loops show up because the
+checkout and bulk update run over several products and the order lists over
+several orders; an endpoint whose count grows with the data will blow its
+budget here.
+"""
+
+import pytest
+
+from benchmarks.explain_plans import CHECKOUT, LOGINS, SLUG
+
+ORDERS = 3
+ITEMS_PER_ORDER = 4
+
+# (role, method, url, budget); {order_id} and {product_slug} are filled in.
+# Checkout places ITEMS_PER_ORDER items: two lookups, then the order, item,
+# stock and leaderboard writes for each item. The bulk update covers every
+# seeded product.
+BUDGETS = [
+    (None, "GET", f"/api/store/{SLUG}", 3),
+    (None, "GET", f"/api/store/{SLUG}/products", 4),
+    (None, "GET", f"/api/store/{SLUG}/products?sort=bestsellers", 4),
+    (None, "GET", f"/api/store/{SLUG}/categories", 3),
+    (None, "GET", f"/api/store/{SLUG}/featured", 3),
+    (None, "GET", f"/api/store/{SLUG}/products/{{product_slug}}", 3),
+    ("reseller", "GET", "/api/resellers/dashboard/stats", 6),
+    ("reseller", "GET", "/api/resellers/dashboard/revenue", 2),
+    ("reseller", "GET", "/api/resellers/dashboard/timeseries", 2),
+    ("reseller", "GET", "/api/resellers/dashboard/top-products", 2),
+    ("reseller", "GET", "/api/resellers/analytics/products", 3),
+    ("reseller", "GET", "/api/products/catalog", 2),
+    ("reseller", "GET", "/api/products/my-products", 3),
+    ("reseller", "GET", "/api/orders", 2),
+    ("reseller", "GET", "/api/orders/{order_id}", 2),
+    ("reseller", "GET", f"/api/orders/search?email={CHECKOUT['customer_email']}", 2),
+    ("reseller", "GET", "/api/orders/stats/summary", 2),
+    ("reseller", "GET", "/api/payouts", 2),
+    ("reseller", "GET", "/api/payouts/balance", 2),
+    ("manufacturer", "GET", "/api/manufacturers/products", 3),
+    ("manufacturer", "GET", "/api/manufacturers/dashboard/stats", 2),
+    ("manufacturer", "GET", "/api/manufacturers/dashboard/top-products", 2),
+    ("manufacturer", "GET", "/api/manufacturers/dashboard/top-resellers", 2),
+    ("admin", "GET", "/api/admin/dashboard", 5),
+    ("admin", "GET", "/api/admin/resellers", 3),
+    ("admin", "GET", "/api/admin/orders", 3),
+    ("admin", "GET", "/api/admin/payouts", 3),
+    (None, "POST", f"/api/orders/storefront/{SLUG}", 17),
+    ("reseller", "POST", "/api/products/my-products/bulk-update", 3),
+    ("admin", "PATCH", "/api/orders/{order_id}/status", 6),
+]
+
+
+@pytest.fixture(scope="module")
+def store(seeded):
+    """Client, access tokens, products and placed orders shared by every budget"""
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    tokens = {
+        role: client.post("/api/auth/login/json", json={"email": email, "password": password}).json()["access_token"]
+        for role, (email, password) in LOGINS.items()
+    }
+
+    products = client.get(f"/api/store/{SLUG}/products", params={"per_page": 20}).json()["products"]
+    items = [{"product_id": product["id"], "quantity": 1} for product in products[:ITEMS_PER_ORDER]]
+    order_ids = []
+    for _ in range(ORDERS):
+        response = client.post(f"/api/orders/storefront/{SLUG}", json={**CHECKOUT, "items": items})
+        assert response.status_code == 200, response.text
+        order_ids.append(response.json()["order_id"])
+
+    bodies = {
+        f"/api/orders/storefront/{SLUG}": {**CHECKOUT, "items": items},
+        "/api/products/my-products/bulk-update": {
+            "product_ids": [product["id"] for product in products], "markup_percent": 50
+        },
+        "/api/orders/{order_id}/status": {"status": "confirmed"},
+    }
+    return client, tokens, products, order_ids, bodies
+
+
+@pytest.mark.parametrize("role,method,url,budget", BUDGETS, ids=[f"{method} {url}" for _, method, url, _ in BUDGETS])
+def test_query_budget(store, role, method, url, budget):
+    from services.query_stats import QueryBudgetExceeded, assert_query_budget
+
+    client, tokens, products, order_ids, bodies = store
+    path = url.format(order_id=order_ids[0], product_slug=products[0]["slug"])
+    headers = {"Authorization": f"Bearer {tokens[role]}"} if role else {}
+
+    response = client.request(method, path, headers=headers, json=bodies.get(url))
+    assert response.status_code < 400, response.text[:120]
+    try:
+        assert_query_budget(response, budget, f"{method} {path}")
+    except QueryBudgetExceeded as e:
+        pytest.fail(str(e))
@@ -0,0 +1,54 @@
+"""
+Login rate limits (services.ratelimit). Limiting is off for the test run, so
+each test switches it on with small rules of its own.
+"""
+
+import pytest
+
+RESELLER_EMAIL = "demo@mystore.com"
+
+
+@pytest.fixture
+def login_rules(monkeypatch):
+    """Enable the limiter with fresh buckets allowing 2 logins per IP and 3 per email a minute"""
+    from services.ratelimit import limiter, Rule, TokenBuckets
+
+    monkeypatch.setattr(limiter, "enabled", True)
+    monkeypatch.setattr(limiter, "shared", None)
+    monkeypatch.setattr(limiter, "_local", {
+        **limiter._local,
+        "login_ip": TokenBuckets(Rule(limit=2, period=60)),
+        "login_email": TokenBuckets(Rule(limit=3, period=60)),
+    })
+    return limiter
+
+
+def login(client, email: str):
+    # Wrong password: the limits are checked before the password is
+    return client.post("/api/auth/login/json", json={"email": email, "password": "wrong-password"})
+
+
+def test_login_limited_per_ip(client, login_rules):
+    assert login(client, RESELLER_EMAIL).status_code == 401
+    assert login(client, "someone@example.com").status_code == 401
+
+    response = login(client, "another@example.com")
+    assert response.status_code == 429
+    # Two logins a minute refill one every 30 seconds
+    assert 1 <= int(response.headers["Retry-After"]) <= 30
+    assert login_rules.limited["login_ip"] == 1
+
+
+def test_login_limited_per_email(client, login_rules, monkeypatch):
+    from services import ratelimit
+
+    # A new client IP per request, so only the email rule applies
+    addresses = iter(f"10.0.0.{i}" for i in range(1, 10))
+    monkeypatch.setattr(ratelimit, "client_ip", lambda request: next(addresses))
+
+    for _ in range(3):
+        assert login(client, RESELLER_EMAIL).status_code == 401
+
+    response = login(client, RESELLER_EMAIL.upper())
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 20
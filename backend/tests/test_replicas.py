@@ -0,0 +1,129 @@
+"""
+Read routing in services.replicas, with a second SQLite file as the replica.
+
+The replica is refreshed by copying the primary file (replicate), so a test
+controls exactly what it has seen. Tests tell replica reads from primary
+reads by the store description, which they change on the primary only.
+"""
+
+from datetime import datetime, timedelta, timezone
+import os
+import sqlite3
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+SLUG = "sparkle-jewels"
+RESELLER_EMAIL = "demo@mystore.com"
+
+
+@pytest.fixture
+def replica(seeded, test_dir, monkeypatch):
+    from database.database import make_engine
+    from services.cache import TTLCache
+    from services.replicas import read_router, REPLICA_STICKY_SECONDS
+
+    engine = make_engine(f"sqlite:///{os.path.join(test_dir, 'replica.db')}")
+    monkeypatch.setattr(read_router, "replicas", [sessionmaker(autocommit=False, autoflush=False, bind=engine)])
+    monkeypatch.setattr(read_router, "lag", [None])
+    monkeypatch.setattr(read_router, "failing", [False])
+    monkeypatch.setattr(read_router, "sticky", TTLCache(maxsize=100, ttl=REPLICA_STICKY_SECONDS))
+    monkeypatch.setattr(read_router, "last_beat", None)
+    monkeypatch.setattr(read_router, "reads", {"replica": 0, "sticky": 0, "lagging": 0})
+    yield engine
+    engine.dispose()
+
+
+def replicate(replica_engine) -> None:
+    """Copy the primary's current contents to the replica"""
+    from database.database import engine
+
+    replica_engine.dispose()
+    source = sqlite3.connect(engine.url.database)
+    target = sqlite3.connect(replica_engine.url.database)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def set_description(description: str) -> None:
+    """Change the store on the primary only"""
+    from database.database import SessionLocal
+    from database.models import Reseller
+
+    db = SessionLocal()
+    try:
+        db.query(Reseller).filter(Reseller.slug == SLUG).update({"description": description})
+        db.commit()
+    finally:
+        db.close()
+
+
+def store_description(client, headers=None) -> str:
+    response = client.get(f"/api/store/{SLUG}", headers=headers or {})
+    assert response.status_code == 200
+    return response.json()["store"]["description"]
+
+
+def catch_up(replica_engine) -> None:
+    """Replicate the primary and measure the replica as current"""
+    from services.replicas import read_router
+
+    read_router.check_lag()
+    replicate(replica_engine)
+    read_router.check_lag()
+    assert read_router.lag[0] is not None and read_router.lag[0] < 1
+
+
+def test_unmeasured_replica_is_not_read(replica, client):
+    from services.replicas import read_router
+
+    replicate(replica)
+    set_description("primary only")
+    assert store_description(client) == "primary only"
+    assert read_router.reads == {"replica": 0, "sticky": 0, "lagging": 1}
+
+
+def test_reads_go_to_current_replica(replica, client):
+    from services.replicas import read_router
+
+    set_description("replicated")
+    catch_up(replica)
+    set_description("not replicated yet")
+    assert store_description(client) == "replicated"
+    assert read_router.reads["replica"] == 1
+
+
+def test_client_reads_its_own_writes(replica, client, auth_headers):
+    from services.replicas import read_router
+
+    set_description("replicated")
+    catch_up(replica)
+    # Minted, not logged in: a login is itself a write that would pin the test client's IP
+    headers = auth_headers(RESELLER_EMAIL)
+
+    response = client.put("/api/resellers/profile", json={"description": "just edited"}, headers=headers)
+    assert response.status_code == 200
+    # The writer is pinned to the primary; everyone else still reads the replica
+    assert store_description(client, headers) == "just edited"
+    assert store_description(client) == "replicated"
+    assert read_router.reads["sticky"] == 1
+    assert read_router.reads["replica"] == 1
+
+
+def test_lagging_replica_falls_back_to_primary(replica, client):
+    from services.replicas import read_router
+
+    catch_up(replica)
+    # The replica stops applying changes a minute before the next heartbeat
+    stale = datetime.now(timezone.utc) - timedelta(minutes=1)
+    with replica.begin() as conn:
+        conn.exec_driver_sql("UPDATE replica_heartbeats SET beat_at = ? WHERE id = 1", (stale.isoformat(sep=" "),))
+    read_router.check_lag()
+    assert read_router.lag[0] > 30
+
+    set_description("primary only")
+    assert store_description(client) == "primary only"
+    assert read_router.reads == {"replica": 0, "sticky": 0, "lagging": 1}
@@ -0,0 +1,51 @@
+"""
+Refresh token rotation (services.tokens): every refresh issues a new token in
+the same family, and presenting a rotated token again revokes the family.
+"""
+
+RESELLER_EMAIL = "demo@mystore.com"
+RESELLER_PASSWORD = "demo123"
+
+
+def login(client) -> dict:
+    response = client.post("/api/auth/login/json", json={"email": RESELLER_EMAIL, "password": RESELLER_PASSWORD})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def refresh(client, refresh_token: str):
+    return client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_rotates_token(client):
+    first = login(client)
+
+    response = refresh(client, first["refresh_token"])
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != first["refresh_token"]
+
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {rotated['access_token']}"})
+    assert me.status_code == 200
+    assert me.json()["email"] == RESELLER_EMAIL
+
+    # The new token rotates in turn
+    assert refresh(client, rotated["refresh_token"]).status_code == 200
+
+
+def test_reused_token_revokes_family(client):
+    session = login(client)
+    other_session = login(client)
+
+    rotated = refresh(client, session["refresh_token"]).json()
+
+    # Replaying the rotated token ends the session it belonged to...
+    assert refresh(client, session["refresh_token"]).status_code == 401
+    assert refresh(client, rotated["refresh_token"]).status_code == 401
+
+    # ...and only that one
+    assert refresh(client, other_session["refresh_token"]).status_code == 200
+
+
+def test_unknown_token_rejected(client):
+    assert refresh(client, "not-a-refresh-token").status_code == 401
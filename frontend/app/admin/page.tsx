@@ -51,6 +51,7 @@ export default function AdminPage() {
 
     const handleLogout = () => {
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         logout();
         router.push('/');
     };
@@ -92,6 +92,7 @@ export default function OrdersPage() {
 
     const handleLogout = () => {
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         logout();
         router.push('/');
     };
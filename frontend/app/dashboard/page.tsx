@@ -51,6 +51,7 @@ export default function DashboardPage() {
 
     const handleLogout = () => {
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         logout();
         router.push('/');
     };
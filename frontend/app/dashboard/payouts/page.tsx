@@ -86,6 +86,7 @@ export default function PayoutsPage() {
 
     const handleLogout = () => {
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         logout();
         router.push('/');
     };
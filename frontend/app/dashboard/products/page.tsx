@@ -136,6 +136,7 @@ export default function ProductsPage() {
 
     const handleLogout = () => {
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         logout();
         router.push('/');
     };
@@ -22,9 +22,10 @@ export default function LoginPage() {
         setLoading(true);
 
         try {
-            const { access_token } = await api.login(email, password);
+            const { access_token, refresh_token } = await api.login(email, password);
             setToken(access_token);
             localStorage.setItem('token', access_token);
+            if (refresh_token) localStorage.setItem('refresh_token', refresh_token);
 
             // Fetch user and reseller data
             const user = await api.getCurrentUser();
@@ -41,9 +41,10 @@ export default function RegisterPage() {
         setLoading(true);
 
         try {
-            const { access_token } = await api.register(email, password, businessName) as any;
+            const { access_token, refresh_token } = await api.register(email, password, businessName) as any;
             setToken(access_token);
             localStorage.setItem('token', access_token);
+            if (refresh_token) localStorage.setItem('refresh_token', refresh_token);
 
             // Fetch user and reseller data
             const user = await api.getCurrentUser();
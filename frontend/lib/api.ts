@@ -23,7 +23,37 @@ class ApiClient {
         this.baseUrl = baseUrl;
     }
 
-    private async request<T>(endpoint: string, options: FetchOptions = {}): Promise<T> {
+    private refreshing: Promise<string | null> | null = null;
+
+    // Access tokens are short-lived; swap the stored refresh token for a new pair.
+    // Concurrent 401s share one refresh since each refresh token is single-use.
+    private refreshAccessToken(): Promise<string | null> {
+        if (typeof window === 'undefined') return Promise.resolve(null);
+        const refreshToken = localStorage.getItem('refresh_token');
+        if (!isValidToken(refreshToken)) return Promise.resolve(null);
+
+        if (!this.refreshing) {
+            this.refreshing = fetch(`${this.baseUrl}/auth/refresh`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ refresh_token: refreshToken }),
+            })
+                .then(async (response) => {
+                    if (!response.ok) return null;
+                    const data = await response.json();
+                    localStorage.setItem('token', data.access_token);
+                    localStorage.setItem('refresh_token', data.refresh_token);
+                    return data.access_token as string;
+                })
+                .catch(() => null)
+                .finally(() => {
+                    this.refreshing = null;
+                });
+        }
+        return this.refreshing;
+    }
+
+    private async request<T>(endpoint: string, options: FetchOptions = {}, retried = false): Promise<T> {
         const { token, ...fetchOptions } = options;
 
         const headers: any = {
@@ -49,8 +79,15 @@ class ApiClient {
         if (!response.ok) {
             // Handle 401 Unauthorized errors globally
             if (response.status === 401 && !endpoint.includes('/auth/login')) {
+                if (!retried && !endpoint.startsWith('/auth/refresh')) {
+                    const newToken = await this.refreshAccessToken();
+                    if (newToken) {
+                        return this.request<T>(endpoint, { ...options, token: newToken }, true);
+                    }
+                }
                 if (typeof window !== 'undefined') {
                     localStorage.removeItem('token');
+                    localStorage.removeItem('refresh_token');
                     // We don't use router.push here because we're not in a component
                     window.location.href = '/login';
                 }
@@ -84,7 +121,7 @@ class ApiClient {
     }
 
     async login(email: string, password: string) {
-        return this.request<{ access_token: string }>('/auth/login/json', {
+        return this.request<{ access_token: string; refresh_token?: string }>('/auth/login/json', {
             method: 'POST',
             body: JSON.stringify({ email, password }),
         });
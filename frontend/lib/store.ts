@@ -52,6 +52,7 @@ export const useAuthStore = create<AuthState>()(
             logout: () => {
                 if (typeof window !== 'undefined') {
                     localStorage.removeItem('token');
+                    localStorage.removeItem('refresh_token');
                 }
                 set({ token: null, user: null, reseller: null });
             },